@@ -0,0 +1,156 @@
+import os
+import asyncio
+import contextlib
+from struct import unpack, iter_unpack
+from concurrent.futures import ProcessPoolExecutor
+from parse_stl import BIN_STL_TRIANGLE, parse_stl, is_text_stl, iter_txt_stl_facets
+from parse_obj import parse_obj
+from mmesh import measure_mesh, measure_facets, measure_triangles, finish_measurements, merge_totals
+from progress import CancelToken, track
+
+# The number of bytes read from a file at a time. Binary STL chunks are rounded down to whole facets.
+CHUNK_BYTES = 1 << 20
+
+def measure_stl_chunk(data, is_binary, volume=False, area=False, length=False):
+	"""Measures a chunk of an STL file holding only whole facets, given as bytes, and returns its running totals as described by `measure_facets`.
+	This is the work sent to the executor, so it is kept at the top level of the module where worker processes can find it."""
+	if is_binary:
+		return measure_triangles(iter_unpack(BIN_STL_TRIANGLE, data), volume, area, length)
+	return measure_facets(iter_txt_stl_facets(data.decode().splitlines()), volume, area, length)
+
+def _measure_parsed(file_path, volume, area, length, progress, token):
+	mesh = parse_obj(file_path, progress=progress, token=token)
+	measure_mesh(mesh, volume, area, length, token=token)
+	measurements = {key: mesh.meta[key] for key in ('volume', 'area', 'x_length', 'y_length', 'z_length', 'bounds') if key in mesh.meta}
+	measurements['facet_count'] = len(mesh)
+	return measurements
+
+def _parse_file(file_path, given_normals, progress, token):
+	if file_path.split('.')[-1] == 'stl':
+		return parse_stl(file_path, given_normals, progress, token)
+	return parse_obj(file_path, given_normals, progress, token)
+
+def _measure_mesh(mesh, kwargs, progress, token):
+	measure_mesh(mesh, progress=progress, token=token, **kwargs)
+	return mesh.meta
+
+def _thread_callback(loop, progress):
+	"""Wraps a progress callback so that calls from a worker thread are run on the event loop instead."""
+	if progress is None:
+		return None
+	return lambda tracker: loop.call_soon_threadsafe(progress, tracker)
+
+async def _run_cancellable(executor, function, *args, progress=None, token=None):
+	"""Runs a function taking `progress` and `token` as its last two arguments in the executor and returns its result.
+	In a thread, it is given a CancelToken which is cancelled if the awaiting task is, so the thread stops at its next check, and progress
+	callbacks are run on the event loop. Worker processes cannot share either, so they are only given None, and the token is checked before starting."""
+	loop = asyncio.get_running_loop()
+	if isinstance(executor, ProcessPoolExecutor):
+		if token is not None:
+			token.check()
+		return await loop.run_in_executor(executor, function, *args, None, None)
+	job_token = CancelToken(parent=token)
+	try:
+		return await loop.run_in_executor(executor, function, *args, _thread_callback(loop, progress), job_token)
+	except asyncio.CancelledError:
+		job_token.cancel()
+		raise
+
+async def _read_stl_chunks(fp, is_binary, chunk_bytes):
+	"""Yields chunks of an open STL file holding only whole facets, reading each in the event loop's default executor."""
+	loop = asyncio.get_running_loop()
+	if is_binary:
+		header = await loop.run_in_executor(None, fp.read, 84)
+		if len(header) < 84:
+			raise EOFError(f'measure_file_async: Reached end-of-file before reading the header of "{fp.name}". File may be malformed.')
+		remaining = unpack('<I', header[80:])[0]
+		while remaining > 0:
+			data = await loop.run_in_executor(None, fp.read, 50 * min(max(1, chunk_bytes // 50), remaining))
+			if len(data) < 50:
+				raise EOFError(f'measure_file_async: Reached end-of-file before reading the provided number of facets in "{fp.name}". File may be malformed.')
+			data = data[:len(data) - len(data) % 50]
+			remaining -= len(data) // 50
+			yield data
+		return
+	buffer = b''
+	while True:
+		data = await loop.run_in_executor(None, fp.read, chunk_bytes)
+		if not data:
+			break
+		buffer += data
+		# Cut after the last complete facet, keeping the rest for the next chunk.
+		end = buffer.rfind(b'endfacet')
+		end = buffer.find(b'\n', end) if end >= 0 else -1
+		if end >= 0:
+			yield buffer[:end + 1]
+			buffer = buffer[end + 1:]
+	if buffer.strip():
+		yield buffer
+
+async def measure_file_async(file_path, volume=False, area=False, length=False, executor=None, semaphore=None, chunk_bytes=CHUNK_BYTES, progress=None, token=None):
+	"""Measures the mesh in an .stl or .obj file without blocking the event loop and returns a dictionary of measurements using the keys
+	`measure_mesh` stores in `mesh.meta`, plus `facet_count`.
+	STL files are read `chunk_bytes` at a time in the event loop's default executor, and each chunk of whole facets is decoded and reduced in
+	`executor`, which may be any `concurrent.futures.Executor` and defaults to the event loop's default executor, while the next chunk is read.
+	OBJ faces may refer to any vertex before them, so OBJ files are parsed and measured as a whole in `executor`.
+	If `semaphore` is given as an `asyncio.Semaphore`, it is held while the file is measured, which limits the number of files measured at once.
+	`progress` and `token` report the bytes read and cancel between chunks as for `parse_stl`, and the callback is always called on the event loop.
+	Cancelling the awaiting task stops the measurement at its next chunk, or its next check when running in a thread, and closes the file."""
+	extension = file_path.split('.')[-1]
+	if extension not in ('stl', 'obj'):
+		raise ValueError(f'measure_file_async: Unsupported file format "{extension}".')
+	async with semaphore or contextlib.nullcontext():
+		if extension == 'obj':
+			return await _run_cancellable(executor, _measure_parsed, file_path, volume, area, length, progress=progress, token=token)
+
+		loop = asyncio.get_running_loop()
+		try:
+			is_binary = not is_text_stl(file_path)
+			fp = open(file_path, 'rb')
+		except FileNotFoundError:
+			raise FileNotFoundError(f'measure_file_async: Failed to locate file "{file_path}" in the current directory.')
+		tracker = track(progress, token, os.fstat(fp.fileno()).st_size)
+		totals = measure_facets([])
+		pending = None
+		try:
+			async with contextlib.aclosing(_read_stl_chunks(fp, is_binary, chunk_bytes)) as chunks:
+				async for data in chunks:
+					if tracker is not None:
+						tracker.update(fp.tell())
+					if pending is not None:
+						merge_totals(totals, await pending)
+					# The chunk is reduced while the next one is read.
+					pending = loop.run_in_executor(executor, measure_stl_chunk, data, is_binary, volume, area, length)
+			if pending is not None:
+				merge_totals(totals, await pending)
+				pending = None
+		finally:
+			if pending is not None:
+				pending.cancel()
+			fp.close()
+		if tracker is not None:
+			tracker.finish()
+	measurements = finish_measurements(totals, volume, area, length)
+	measurements['facet_count'] = totals['facet_count']
+	return measurements
+
+async def parse_file_async(file_path, given_normals=False, executor=None, semaphore=None, progress=None, token=None):
+	"""Parses an .stl or .obj file into a mesh in `executor` without blocking the event loop, as `parse_stl` or `parse_obj` would.
+	`executor`, `semaphore`, `progress`, and `token` are used as described by `measure_file_async`. Meshes parsed in worker processes are
+	copied back to the event loop's process, which for large meshes may take longer than parsing them in a thread."""
+	extension = file_path.split('.')[-1]
+	if extension not in ('stl', 'obj'):
+		raise ValueError(f'parse_file_async: Unsupported file format "{extension}".')
+	async with semaphore or contextlib.nullcontext():
+		return await _run_cancellable(executor, _parse_file, file_path, given_normals, progress=progress, token=token)
+
+async def measure_mesh_async(mesh, executor=None, semaphore=None, progress=None, token=None, **kwargs):
+	"""Measures a mesh with `measure_mesh` in `executor` without blocking the event loop, passing on any other keyword arguments.
+	`executor`, `semaphore`, `progress`, and `token` are used as described by `measure_file_async`, with progress counted in facets.
+	The measurements are stored in `mesh.meta`, which is also returned. Meshes measured in worker processes are copied there and their
+	measurements copied back, so a FrozenMesh (see `freeze_mesh`) is best for process executors."""
+	async with semaphore or contextlib.nullcontext():
+		meta = await _run_cancellable(executor, _measure_mesh, mesh, kwargs, progress=progress, token=token)
+	if meta is not mesh.meta:
+		mesh.meta.update(meta)
+	return mesh.meta
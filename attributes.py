@@ -0,0 +1,290 @@
+from array import array
+from collections.abc import MutableMapping
+from vector3 import Vector3
+
+# Presence flags stored for every row of a channel.
+ABSENT = 0
+PRESENT = 1
+NONE = 2
+
+class AttributeChannel:
+	"""A single named attribute stored for every facet of a mesh in flat typed arrays, indexed by the facet's row.
+	`kind` is one of:
+		`'scalar'`, one int or float per row stored in an array of type `typecode`,
+		`'vector'`, one Vector3 per row stored as three values in an array of type `typecode`,
+		`'list'`, a list of ints per row stored back to back in an array of type `typecode`, with None elements stored as the type's minimum value,
+		`'object'`, any value per row stored in a plain list.
+	Every row also has a presence flag, so rows may be absent or hold None in any kind of channel."""
+
+	def __init__(self, kind='object', typecode=None):
+		if kind not in ('scalar', 'vector', 'list', 'object'):
+			raise ValueError(f'AttributeChannel.__init__: Unknown channel kind "{kind}".')
+		if typecode is None:
+			typecode = 'q' if kind == 'list' else 'd'
+		self.kind = kind
+		self.typecode = typecode
+		self.present = bytearray()
+		if kind == 'object':
+			self.values = []
+		else:
+			self.values = array(typecode)
+		if kind == 'list':
+			self.starts = array('q')
+			self.lengths = array('l')
+			self.missing = -(1 << (8 * self.values.itemsize - 1))
+
+	def infer(value):
+		"""Returns the `(kind, typecode)` of the most compact channel able to hold the given value."""
+		value_type = type(value)
+		if value_type is int:
+			return 'scalar', 'q'
+		if value_type is float:
+			return 'scalar', 'd'
+		if isinstance(value, Vector3):
+			return 'vector', 'd'
+		if value_type is list or value_type is tuple:
+			if all(element is None or type(element) is int for element in value):
+				return 'list', 'q'
+		return 'object', None
+
+	def fits(self, value):
+		"""Determines if the given value can be stored in the channel without changing its kind."""
+		if value is None or self.kind == 'object':
+			return True
+		kind, typecode = AttributeChannel.infer(value)
+		if kind != self.kind:
+			return False
+		if kind == 'scalar' and typecode == 'd':
+			return self.typecode in ('f', 'd')
+		return True
+
+	def __len__(self):
+		return len(self.present)
+
+	def _extend(self, row_count):
+		"""Adds absent rows until the channel holds `row_count` rows."""
+		added = row_count - len(self.present)
+		if added <= 0:
+			return
+		self.present.extend(bytes(added))
+		if self.kind == 'object':
+			self.values.extend([None] * added)
+		elif self.kind == 'scalar':
+			self.values.extend(array(self.typecode, bytes(added * self.values.itemsize)))
+		elif self.kind == 'vector':
+			self.values.extend(array(self.typecode, bytes(3 * added * self.values.itemsize)))
+		else:
+			self.starts.extend(array('q', bytes(8 * added)))
+			self.lengths.extend(array('l', bytes(added * self.lengths.itemsize)))
+
+	def get(self, row):
+		"""Returns the value of the given row. Raises KeyError if the row is absent."""
+		if row >= len(self.present) or self.present[row] == ABSENT:
+			raise KeyError(row)
+		if self.present[row] == NONE:
+			return None
+		if self.kind == 'object' or self.kind == 'scalar':
+			return self.values[row]
+		if self.kind == 'vector':
+			return Vector3(self.values[3 * row], self.values[3 * row + 1], self.values[3 * row + 2])
+		start = self.starts[row]
+		missing = self.missing
+		return [None if element == missing else element for element in self.values[start:start + self.lengths[row]]]
+
+	def set(self, row, value):
+		"""Stores the value for the given row, which must fit the channel (see `fits`)."""
+		self._extend(row + 1)
+		if value is None:
+			self.present[row] = NONE
+			return
+		if self.kind == 'object' or self.kind == 'scalar':
+			self.values[row] = value
+		elif self.kind == 'vector':
+			self.values[3 * row:3 * row + 3] = array(self.typecode, (value.x, value.y, value.z))
+		else:
+			missing = self.missing
+			elements = array(self.typecode, [missing if element is None else element for element in value])
+			# Rows are overwritten in place when the new list fits, otherwise it is appended to the end.
+			start = self.starts[row]
+			if self.present[row] != PRESENT or len(elements) > self.lengths[row]:
+				start = len(self.values)
+				self.values.extend(elements)
+			else:
+				self.values[start:start + len(elements)] = elements
+			self.starts[row] = start
+			self.lengths[row] = len(elements)
+		self.present[row] = PRESENT
+
+	def delete(self, row):
+		"""Marks the given row as absent. Raises KeyError if it already is."""
+		if row >= len(self.present) or self.present[row] == ABSENT:
+			raise KeyError(row)
+		self.present[row] = ABSENT
+		if self.kind == 'object':
+			self.values[row] = None
+
+	def has(self, row):
+		"""Determines if the given row holds a value, including None."""
+		return row < len(self.present) and self.present[row] != ABSENT
+
+	def extend_channel(self, row, other):
+		"""Appends every row of another channel of the same kind and type code, so that its first row becomes the given row.
+		The rows are copied array to array rather than one at a time."""
+		if other.kind != self.kind or other.typecode != self.typecode:
+			raise ValueError('AttributeChannel.extend_channel: Channels must have the same kind and type code.')
+		self._extend(row)
+		self.present.extend(other.present)
+		if self.kind == 'list':
+			base = len(self.values)
+			self.starts.extend(array('q', map(base.__add__, other.starts)))
+			self.lengths.extend(other.lengths)
+		self.values.extend(other.values)
+
+	def extend_values(self, values):
+		"""Appends a row holding each value of an iterable to a `'scalar'` channel in one step."""
+		if self.kind != 'scalar':
+			raise ValueError('AttributeChannel.extend_values: Only scalar channels can be extended with values.')
+		start = len(self.values)
+		self.values.extend(values)
+		self.present.extend(bytes((PRESENT,)) * (len(self.values) - start))
+
+	def to_objects(self):
+		"""Converts the channel into an `'object'` channel holding the same values."""
+		values = [self.get(row) if self.has(row) else None for row in range(len(self.present))]
+		self.kind = 'object'
+		self.typecode = None
+		self.values = values
+		for name in ('starts', 'lengths', 'missing'):
+			self.__dict__.pop(name, None)
+
+	def nbytes(self):
+		"""The approximate number of bytes used by the channel's storage, not counting objects held by `'object'` channels."""
+		total = len(self.present)
+		if self.kind == 'object':
+			return total + 8 * len(self.values)
+		total += self.values.itemsize * len(self.values)
+		if self.kind == 'list':
+			total += self.starts.itemsize * len(self.starts) + self.lengths.itemsize * len(self.lengths)
+		return total
+
+class FacetAttributes:
+	"""The per-facet attributes of a mesh, stored as named channels of flat typed arrays (see `AttributeChannel`).
+	Each facet added to the mesh is given a row, which stays the same even if other facets are added or removed, until the mesh is compacted."""
+
+	def __init__(self):
+		self.channels = {}
+		self.row_count = 0
+
+	def add_row(self, data=None):
+		"""Reserves a new row, stores the items of the `data` dictionary in it if provided, and returns the row."""
+		row = self.row_count
+		self.row_count += 1
+		if data:
+			for name, value in data.items():
+				self.set(row, name, value)
+		return row
+
+	def add_rows(self, count, channels=None):
+		"""Reserves `count` new rows in one step and returns the first of them.
+		`channels` optionally maps names to instances of AttributeChannel holding the values of the new rows, numbered from 0.
+		Each is appended to the channel of the same name in bulk if their kinds and type codes match, otherwise row by row."""
+		first_row = self.row_count
+		self.row_count += count
+		for name, other in (channels or {}).items():
+			if len(other) == 0:
+				continue
+			channel = self.channels.get(name)
+			if channel is None:
+				channel = self.channels[name] = AttributeChannel(other.kind, other.typecode)
+			if channel.kind == other.kind and channel.typecode == other.typecode:
+				channel.extend_channel(first_row, other)
+				continue
+			for row in range(len(other)):
+				if other.has(row):
+					self.set(first_row + row, name, other.get(row))
+		return first_row
+
+	def add_channel(self, name, kind='object', typecode=None):
+		"""Creates an empty channel with the given name, kind, and array type code (see `AttributeChannel`) and returns it.
+		Declaring a channel before facets are added allows a more compact type code than would be chosen automatically."""
+		if name in self.channels:
+			raise KeyError(f'FacetAttributes.add_channel: Channel "{name}" already exists.')
+		channel = self.channels[name] = AttributeChannel(kind, typecode)
+		return channel
+
+	def get(self, row, name):
+		"""Returns the value of the named attribute for the given row. Raises KeyError if it is not set."""
+		channel = self.channels.get(name)
+		if channel is None or not channel.has(row):
+			raise KeyError(name)
+		return channel.get(row)
+
+	def set(self, row, name, value):
+		"""Sets the value of the named attribute for the given row, creating or widening its channel as needed."""
+		channel = self.channels.get(name)
+		if channel is None:
+			channel = self.channels[name] = AttributeChannel(*AttributeChannel.infer(value))
+		elif not channel.fits(value):
+			channel.to_objects()
+		try:
+			channel.set(row, value)
+		except (OverflowError, TypeError):
+			channel.to_objects()
+			channel.set(row, value)
+
+	def delete(self, row, name):
+		"""Removes the named attribute from the given row. Raises KeyError if it is not set."""
+		channel = self.channels.get(name)
+		if channel is None:
+			raise KeyError(name)
+		try:
+			channel.delete(row)
+		except KeyError:
+			raise KeyError(name)
+
+	def names(self, row):
+		"""Returns the names of the attributes set for the given row as a list."""
+		return [name for name, channel in self.channels.items() if channel.has(row)]
+
+	def clear(self, row):
+		"""Removes every attribute from the given row."""
+		for channel in self.channels.values():
+			if channel.has(row):
+				channel.delete(row)
+
+	def compact(self, rows):
+		"""Rebuilds every channel so that it only holds the given rows, renumbered in the order given, in a single pass over each channel."""
+		for name, channel in self.channels.items():
+			new_channel = AttributeChannel(channel.kind, channel.typecode)
+			for new_row, row in enumerate(rows):
+				if channel.has(row):
+					new_channel.set(new_row, channel.get(row))
+			self.channels[name] = new_channel
+		self.row_count = len(rows)
+
+	def nbytes(self):
+		"""The approximate number of bytes used by all channels (see `AttributeChannel.nbytes`)."""
+		return sum(channel.nbytes() for channel in self.channels.values())
+
+class FacetData(MutableMapping):
+	"""A dictionary-like view of the attributes of a single row of a FacetAttributes instance.
+	List and Vector3 values are rebuilt on each access, so changing a fetched value does not change the stored one; assign it back instead."""
+
+	__slots__ = ('attributes', 'row')
+
+	def __init__(self, attributes, row):
+		self.attributes = attributes
+		self.row = row
+
+	def __getitem__(self, name):
+		return self.attributes.get(self.row, name)
+	def __setitem__(self, name, value):
+		self.attributes.set(self.row, name, value)
+	def __delitem__(self, name):
+		self.attributes.delete(self.row, name)
+	def __iter__(self):
+		return iter(self.attributes.names(self.row))
+	def __len__(self):
+		return len(self.attributes.names(self.row))
+	def __repr__(self):
+		return repr(dict(self))
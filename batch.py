@@ -0,0 +1,189 @@
+import sys
+import os
+import json
+from multiprocessing import Pool
+from parse_stl import parse_stl
+from parse_obj import parse_obj
+from mmesh import measure_mesh
+from fingerprint import geometry_fingerprint, file_digest, FingerprintIndex
+
+RESULT_KEYS = ('facet_count', 'volume', 'area', 'x_length', 'y_length', 'z_length')
+
+def read_manifest(manifest_path):
+	"""Reads a JSONL manifest in which each line is an object with a `path` to a .stl or .obj file and an optional unique `id`.
+	Entries without an `id` use their `path` as their id. Blank lines are ignored.
+	Returns the entries as a list of dictionaries."""
+	entries = []
+	try:
+		with open(manifest_path, 'rt') as fp:
+			for line_number, line in enumerate(fp, 1):
+				if line.strip() == '':
+					continue
+				try:
+					entry = json.loads(line)
+				except json.JSONDecodeError:
+					raise ValueError(f'read_manifest: Invalid JSON on line {line_number} of "{manifest_path}".')
+				if not isinstance(entry, dict) or 'path' not in entry:
+					raise ValueError(f'read_manifest: Entry on line {line_number} of "{manifest_path}" has no "path".')
+				entry.setdefault('id', entry['path'])
+				entries.append(entry)
+	except FileNotFoundError:
+		raise FileNotFoundError(f'read_manifest: Failed to locate file "{manifest_path}" in the current directory.')
+	return entries
+
+def read_checkpoint(checkpoint_path):
+	"""Returns the set of entry ids recorded as completed in the given checkpoint file, or an empty set if it does not exist.
+	A final line left incomplete by an interrupted run is ignored."""
+	completed = set()
+	try:
+		with open(checkpoint_path, 'rt') as fp:
+			for line in fp:
+				if line.endswith('\n'):
+					completed.add(json.loads(line))
+	except FileNotFoundError:
+		pass
+	return completed
+
+def measure_entry(entry, index=None):
+	"""Parses and measures the file of a single manifest entry.
+	Returns a dictionary holding the entry's `id` and `path` with either its measurements or an `error` message.
+	If a FingerprintIndex is given, the result also holds the file's `digest` and the shape's `fingerprint`, and if the index already holds
+	the measurements of the same shape they are returned without measuring it again, with `cached` set. Files whose digest is in the index
+	are not parsed at all."""
+	result = {'id': entry['id'], 'path': entry['path']}
+	try:
+		if index is not None:
+			result['digest'] = file_digest(entry['path'])
+			fingerprint = index.lookup_file(result['digest'])
+			if fingerprint is not None and fingerprint in index:
+				result['fingerprint'] = fingerprint
+				result.update(index.lookup(fingerprint))
+				result['cached'] = True
+				return result
+		extension = entry['path'].split('.')[-1]
+		if extension == 'stl':
+			mesh = parse_stl(entry['path'])
+		elif extension == 'obj':
+			mesh = parse_obj(entry['path'])
+		else:
+			raise ValueError(f'measure_entry: Unsupported file format "{extension}".')
+		if index is not None:
+			result['fingerprint'] = geometry_fingerprint(mesh)
+			if result['fingerprint'] in index:
+				result.update(index.lookup(result['fingerprint']))
+				result['cached'] = True
+				return result
+		measure_mesh(mesh, volume=True, area=True, length=True)
+		result['facet_count'] = len(mesh)
+		for key in RESULT_KEYS[1:]:
+			result[key] = mesh.meta[key]
+	except Exception as error:
+		result['error'] = f'{type(error).__name__}: {error}'
+	return result
+
+# The index given to each worker process, which only reads it.
+_worker_index = None
+
+def _set_worker_index(index):
+	global _worker_index
+	_worker_index = index
+
+def _measure_worker_entry(entry):
+	return measure_entry(entry, _worker_index)
+
+def _truncate_partial_line(file_path):
+	"""Removes a final line left incomplete by an interrupted run, so that appended lines start on a line of their own."""
+	try:
+		with open(file_path, 'r+b') as fp:
+			position = fp.seek(0, os.SEEK_END)
+			if position == 0:
+				return
+			fp.seek(position - 1)
+			if fp.read(1) == b'\n':
+				return
+			# Search backwards a block at a time for the end of the last complete line.
+			while position > 0:
+				start = max(0, position - 65536)
+				fp.seek(start)
+				newline = fp.read(position - start).rfind(b'\n')
+				if newline >= 0:
+					fp.truncate(start + newline + 1)
+					return
+				position = start
+			fp.truncate(0)
+	except FileNotFoundError:
+		pass
+
+def _file_size(entry):
+	try:
+		return os.path.getsize(entry['path'])
+	except OSError:
+		return 0
+
+def run_manifest(manifest_path, output_path, checkpoint_path=None, workers=1, index_path=None):
+	"""Measures every entry of a JSONL manifest (see `read_manifest`), appending one JSON result per line to `output_path` as each finishes.
+	After each result is written, its id is appended to the checkpoint file, which defaults to `output_path` followed by `.checkpoint`.
+	Entries recorded in the checkpoint are skipped, so a run which was interrupted can be restarted with the same arguments.
+	A run killed between writing a result and recording it may repeat that single result when restarted.
+	Remaining entries are processed largest file first, which balances the load across `workers` processes.
+	If `index_path` is given, shapes already recorded in that FingerprintIndex file are answered from it without being measured, whatever
+	their format or facet order, and new shapes are added to it (see `measure_entry`). Worker processes only see the shapes recorded before the run.
+	Returns the number of entries measured by this run."""
+	if checkpoint_path is None:
+		checkpoint_path = output_path + '.checkpoint'
+	completed = read_checkpoint(checkpoint_path)
+	pending = [entry for entry in read_manifest(manifest_path) if entry['id'] not in completed]
+	pending.sort(key=_file_size, reverse=True)
+
+	index = None if index_path is None else FingerprintIndex(index_path)
+	measured = 0
+	_truncate_partial_line(output_path)
+	_truncate_partial_line(checkpoint_path)
+	with open(output_path, 'at') as output_fp, open(checkpoint_path, 'at') as checkpoint_fp:
+		def record(result):
+			output_fp.write(json.dumps(result) + '\n')
+			output_fp.flush()
+			os.fsync(output_fp.fileno())
+			checkpoint_fp.write(json.dumps(result['id']) + '\n')
+			checkpoint_fp.flush()
+			if index is not None and 'fingerprint' in result and 'error' not in result:
+				measurements = None
+				if not result.get('cached') and result['fingerprint'] not in index:
+					measurements = {key: result[key] for key in RESULT_KEYS}
+				if measurements is not None or index.lookup_file(result['digest']) != result['fingerprint']:
+					index.add(result['fingerprint'], measurements, result['digest'])
+
+		if workers > 1:
+			with Pool(workers, initializer=_set_worker_index, initargs=(index,)) as pool:
+				for result in pool.imap_unordered(_measure_worker_entry, pending):
+					record(result)
+					measured += 1
+		else:
+			for entry in pending:
+				record(measure_entry(entry, index))
+				measured += 1
+	return measured
+
+def main(argc=0, argv=[]):
+	"""
+		Measures every file listed in a JSONL manifest and appends the results to a JSONL output file.
+		Usage: batch.py <manifest> <output> [--workers=<count>] [--checkpoint=<path>] [--index=<path>]
+	"""
+	options = {}
+	arguments = []
+	for arg in argv[1:]:
+		if arg.startswith('--'):
+			name, _, value = arg[2:].partition('=')
+			options[name] = value
+		else:
+			arguments.append(arg)
+
+	if len(arguments) < 2:
+		print('Usage: batch.py <manifest> <output> [--workers=<count>] [--checkpoint=<path>] [--index=<path>]')
+		return
+
+	measured = run_manifest(arguments[0], arguments[1], options.get('checkpoint') or None, int(options.get('workers') or 1), options.get('index') or None)
+	print(f'Measured {measured:,} entries.')
+
+if __name__ == '__main__':
+	main(len(sys.argv), sys.argv)
@@ -0,0 +1,435 @@
+from array import array
+from math import inf, sqrt, atan2, pi
+from vector3 import Vector3
+from mesh import Mesh
+
+# Skewed, non axis-aligned directions used for the parity tests in `BVH.contains`.
+# Using several directions and taking the majority protects against rays which graze an edge or vertex.
+_PARITY_DIRECTIONS = (
+	(0.8017837257372732, 0.3416224483061914, 0.4902281659305407),
+	(-0.2867696345151932, 0.8784962152437613, 0.3821327916011279),
+	(0.4117914049498364, -0.5130402427462232, 0.7531228961004556),
+)
+
+def _point_tuple(point):
+	"""Returns the given point, a Vector3 or a sequence of three numbers, as an (x, y, z) tuple."""
+	if isinstance(point, Vector3):
+		return (point.x, point.y, point.z)
+	return (point[0], point[1], point[2])
+
+def closest_point_on_triangle(px, py, pz, tri, i):
+	"""Returns the squared distance and the closest point from (px, py, pz) to the triangle
+	whose nine coordinates start at index `i` of the flat array `tri`."""
+	ax, ay, az, bx, by, bz, cx, cy, cz = tri[i:i + 9]
+	abx, aby, abz = bx - ax, by - ay, bz - az
+	acx, acy, acz = cx - ax, cy - ay, cz - az
+	apx, apy, apz = px - ax, py - ay, pz - az
+	d1 = abx * apx + aby * apy + abz * apz
+	d2 = acx * apx + acy * apy + acz * apz
+	if d1 <= 0 and d2 <= 0:
+		qx, qy, qz = ax, ay, az
+	else:
+		bpx, bpy, bpz = px - bx, py - by, pz - bz
+		d3 = abx * bpx + aby * bpy + abz * bpz
+		d4 = acx * bpx + acy * bpy + acz * bpz
+		if d3 >= 0 and d4 <= d3:
+			qx, qy, qz = bx, by, bz
+		else:
+			cpx, cpy, cpz = px - cx, py - cy, pz - cz
+			d5 = abx * cpx + aby * cpy + abz * cpz
+			d6 = acx * cpx + acy * cpy + acz * cpz
+			vc = d1 * d4 - d3 * d2
+			vb = d5 * d2 - d1 * d6
+			va = d3 * d6 - d5 * d4
+			if d6 >= 0 and d5 <= d6:
+				qx, qy, qz = cx, cy, cz
+			elif vc <= 0 and d1 >= 0 and d3 <= 0:
+				t = d1 / (d1 - d3)
+				qx, qy, qz = ax + abx * t, ay + aby * t, az + abz * t
+			elif vb <= 0 and d2 >= 0 and d6 <= 0:
+				t = d2 / (d2 - d6)
+				qx, qy, qz = ax + acx * t, ay + acy * t, az + acz * t
+			elif va <= 0 and d4 - d3 >= 0 and d5 - d6 >= 0:
+				t = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+				qx, qy, qz = bx + (cx - bx) * t, by + (cy - by) * t, bz + (cz - bz) * t
+			else:
+				denom = va + vb + vc
+				if denom == 0: # Degenerate triangle, every point is on a vertex or edge already handled above.
+					qx, qy, qz = ax, ay, az
+				else:
+					v = vb / denom
+					w = vc / denom
+					qx, qy, qz = ax + abx * v + acx * w, ay + aby * v + acy * w, az + abz * v + acz * w
+	dx, dy, dz = px - qx, py - qy, pz - qz
+	return dx * dx + dy * dy + dz * dz, (qx, qy, qz)
+
+def ray_triangle_distance(ox, oy, oz, dx, dy, dz, tri, i):
+	"""Returns the distance along the ray from (ox, oy, oz) in the direction (dx, dy, dz) at which it hits the triangle
+	whose nine coordinates start at index `i` of the flat array `tri`, or `inf` if it misses.
+	Uses the Möller-Trumbore intersection test. Hits behind the origin are not counted."""
+	ax, ay, az, bx, by, bz, cx, cy, cz = tri[i:i + 9]
+	e1x, e1y, e1z = bx - ax, by - ay, bz - az
+	e2x, e2y, e2z = cx - ax, cy - ay, cz - az
+	hx, hy, hz = dy * e2z - dz * e2y, dz * e2x - dx * e2z, dx * e2y - dy * e2x
+	det = e1x * hx + e1y * hy + e1z * hz
+	if det == 0:
+		return inf
+	inv_det = 1 / det
+	sx, sy, sz = ox - ax, oy - ay, oz - az
+	u = (sx * hx + sy * hy + sz * hz) * inv_det
+	if u < 0 or u > 1:
+		return inf
+	qx, qy, qz = sy * e1z - sz * e1y, sz * e1x - sx * e1z, sx * e1y - sy * e1x
+	v = (dx * qx + dy * qy + dz * qz) * inv_det
+	if v < 0 or u + v > 1:
+		return inf
+	t = (e2x * qx + e2y * qy + e2z * qz) * inv_det
+	return t if t >= 0 else inf
+
+def triangle_solid_angle(px, py, pz, tri, i):
+	"""Returns the signed solid angle of the triangle whose nine coordinates start at index `i` of the flat array `tri`, seen from (px, py, pz).
+	Uses the formula of Van Oosterom and Strackee. The angle is positive when the triangle is wound counterclockwise when seen from outside
+	and the point is behind it."""
+	ax, ay, az = tri[i] - px, tri[i + 1] - py, tri[i + 2] - pz
+	bx, by, bz = tri[i + 3] - px, tri[i + 4] - py, tri[i + 5] - pz
+	cx, cy, cz = tri[i + 6] - px, tri[i + 7] - py, tri[i + 8] - pz
+	la = sqrt(ax * ax + ay * ay + az * az)
+	lb = sqrt(bx * bx + by * by + bz * bz)
+	lc = sqrt(cx * cx + cy * cy + cz * cz)
+	det = ax * (by * cz - bz * cy) + ay * (bz * cx - bx * cz) + az * (bx * cy - by * cx)
+	div = la * lb * lc + (ax * bx + ay * by + az * bz) * lc + (ax * cx + ay * cy + az * cz) * lb + (bx * cx + by * cy + bz * cz) * la
+	return 2 * atan2(det, div)
+
+class BVH:
+	"""A bounding volume hierarchy over the triangles of a mesh.
+	The tree is built once in bulk and stored in flat arrays so it can be reused for any number of queries.
+	Nodes are numbered in depth-first order. Each node stores its bounds in `node_bounds` (six values per node: minimums then maximums),
+	and either its two children in `node_left`/`node_right` or, for leaves (`node_left` is -1), a range of triangles given by `node_start` and `node_count`.
+	Triangles are stored in `triangles` (nine values per triangle) sorted so that each leaf's triangles are contiguous.
+	`facet_ids` maps each stored triangle back to the index of the facet it came from."""
+
+	leaf_size = 4
+
+	def __init__(self, mesh, leaf_size=None):
+		"""
+		`mesh` is either an instance of Mesh or a `(coords, facet_ids)` tuple as returned by `Mesh.triangle_arrays`.
+		`leaf_size` is the maximum number of triangles stored in a leaf node.
+		"""
+		if isinstance(mesh, Mesh):
+			coords, facet_ids = mesh.triangle_arrays()
+		elif isinstance(mesh, tuple) and len(mesh) == 2:
+			coords, facet_ids = mesh
+		else:
+			raise TypeError('BVH.__init__: Argument must be an instance of Mesh or a tuple of triangle arrays.')
+		if leaf_size is not None:
+			self.leaf_size = leaf_size
+
+		triangle_count = len(coords) // 9
+		centroids = (
+			[(coords[i] + coords[i + 3] + coords[i + 6]) / 3 for i in range(0, 9 * triangle_count, 9)],
+			[(coords[i + 1] + coords[i + 4] + coords[i + 7]) / 3 for i in range(0, 9 * triangle_count, 9)],
+			[(coords[i + 2] + coords[i + 5] + coords[i + 8]) / 3 for i in range(0, 9 * triangle_count, 9)],
+		)
+		order = list(range(triangle_count))
+
+		self.node_bounds = array('d')
+		self.node_left = array('l')
+		self.node_right = array('l')
+		self.node_start = array('l')
+		self.node_count = array('l')
+
+		# Iterative depth-first build. Each stack entry is (start, end, parent node, is right child).
+		stack = [(0, triangle_count, -1, False)] if triangle_count > 0 else []
+		while stack:
+			start, end, parent, is_right = stack.pop()
+			node = len(self.node_left)
+			if parent >= 0:
+				if is_right:
+					self.node_right[parent] = node
+				else:
+					self.node_left[parent] = node
+
+			minimums = [inf, inf, inf]
+			maximums = [-inf, -inf, -inf]
+			c_minimums = [inf, inf, inf]
+			c_maximums = [-inf, -inf, -inf]
+			for tri in order[start:end]:
+				base = 9 * tri
+				for axis in range(3):
+					values = (coords[base + axis], coords[base + 3 + axis], coords[base + 6 + axis])
+					low = min(values)
+					high = max(values)
+					if low < minimums[axis]:
+						minimums[axis] = low
+					if high > maximums[axis]:
+						maximums[axis] = high
+					centroid = centroids[axis][tri]
+					if centroid < c_minimums[axis]:
+						c_minimums[axis] = centroid
+					if centroid > c_maximums[axis]:
+						c_maximums[axis] = centroid
+			self.node_bounds.extend(minimums + maximums)
+			self.node_left.append(-1)
+			self.node_right.append(-1)
+			self.node_start.append(start)
+			self.node_count.append(end - start)
+
+			count = end - start
+			extents = [c_maximums[axis] - c_minimums[axis] for axis in range(3)]
+			axis = extents.index(max(extents))
+			if count <= self.leaf_size or extents[axis] <= 0:
+				continue
+			# Split at the median centroid along the longest axis of the centroid bounds.
+			order[start:end] = sorted(order[start:end], key=centroids[axis].__getitem__)
+			mid = (start + end) // 2
+			self.node_count[node] = 0
+			stack.append((mid, end, node, True))
+			stack.append((start, mid, node, False))
+
+		self.triangles = array('d')
+		self.facet_ids = array('l')
+		for tri in order:
+			self.triangles.extend(coords[9 * tri:9 * tri + 9])
+			self.facet_ids.append(facet_ids[tri])
+
+	def __len__(self):
+		return len(self.facet_ids)
+
+	def _ray_box(self, node, ox, oy, oz, inv_x, inv_y, inv_z, max_distance):
+		"""Returns the entry distance of a ray into the bounds of `node`, or `inf` if the ray misses them."""
+		b = self.node_bounds
+		i = 6 * node
+		t_min = 0
+		t_max = max_distance
+		for origin, inv, low, high in ((ox, inv_x, b[i], b[i + 3]), (oy, inv_y, b[i + 1], b[i + 4]), (oz, inv_z, b[i + 2], b[i + 5])):
+			if inv == inf:
+				if origin < low or origin > high:
+					return inf
+				continue
+			t1 = (low - origin) * inv
+			t2 = (high - origin) * inv
+			if t1 > t2:
+				t1, t2 = t2, t1
+			if t1 > t_min:
+				t_min = t1
+			if t2 < t_max:
+				t_max = t2
+			if t_min > t_max:
+				return inf
+		return t_min
+
+	def _box_distance_squared(self, node, px, py, pz):
+		"""Returns the squared distance from a point to the bounds of `node`."""
+		b = self.node_bounds
+		i = 6 * node
+		total = 0
+		for value, low, high in ((px, b[i], b[i + 3]), (py, b[i + 1], b[i + 4]), (pz, b[i + 2], b[i + 5])):
+			if value < low:
+				total += (low - value) ** 2
+			elif value > high:
+				total += (value - high) ** 2
+		return total
+
+	def _ray_hits(self, origin, direction, max_distance=inf, first_only=True):
+		"""Traverses the tree with a single ray.
+		If `first_only` is set, returns `(distance, triangle)` for the closest hit (triangle is -1 on a miss).
+		Otherwise, returns the number of triangles the ray crosses."""
+		ox, oy, oz = origin
+		dx, dy, dz = direction
+		inv_x = 1 / dx if dx != 0 else inf
+		inv_y = 1 / dy if dy != 0 else inf
+		inv_z = 1 / dz if dz != 0 else inf
+		tri = self.triangles
+		best = max_distance
+		best_tri = -1
+		crossings = 0
+		if len(self.node_left) == 0:
+			return (inf, -1) if first_only else 0
+		stack = [0]
+		while stack:
+			node = stack.pop()
+			if self._ray_box(node, ox, oy, oz, inv_x, inv_y, inv_z, best) == inf:
+				continue
+			left = self.node_left[node]
+			if left >= 0:
+				stack.append(self.node_right[node])
+				stack.append(left)
+				continue
+			start = self.node_start[node]
+			for t in range(start, start + self.node_count[node]):
+				distance = ray_triangle_distance(ox, oy, oz, dx, dy, dz, tri, 9 * t)
+				if distance < best:
+					if first_only:
+						best = distance
+						best_tri = t
+					else:
+						crossings += 1
+		if first_only:
+			return (best, best_tri) if best_tri >= 0 else (inf, -1)
+		return crossings
+
+	def ray_cast(self, origins, directions, max_distance=inf):
+		"""Casts a batch of rays against the mesh.
+		`origins` and `directions` are equal length sequences of points given as Vector3 instances or sequences of three numbers.
+		Returns a tuple `(distances, facets)` of arrays giving, per ray, the distance along the ray to the closest hit
+		(in multiples of the direction's length) and the index of the facet hit. Misses are reported as `inf` and -1."""
+		distances = array('d')
+		facets = array('l')
+		for origin, direction in zip(origins, directions):
+			distance, hit = self._ray_hits(_point_tuple(origin), _point_tuple(direction), max_distance)
+			distances.append(distance)
+			facets.append(self.facet_ids[hit] if hit >= 0 else -1)
+		return distances, facets
+
+	def contains(self, points):
+		"""Tests a batch of points for being inside the mesh, which should be closed.
+		`points` is a sequence of points given as Vector3 instances or sequences of three numbers.
+		Returns an `array('b')` holding 1 for each point inside the mesh and 0 for each point outside.
+		Each point is decided by the majority of several ray parity tests."""
+		inside = array('b')
+		for point in points:
+			point = _point_tuple(point)
+			votes = 0
+			for direction in _PARITY_DIRECTIONS:
+				votes += self._ray_hits(point, direction, first_only=False) % 2
+			inside.append(1 if 2 * votes > len(_PARITY_DIRECTIONS) else 0)
+		return inside
+
+	def _nearest(self, px, py, pz, max_distance_squared=inf):
+		"""Returns `(distance squared, triangle, closest point)` for the triangle nearest to the given point."""
+		tri = self.triangles
+		best = max_distance_squared
+		best_tri = -1
+		best_point = None
+		if len(self.node_left) == 0:
+			return inf, -1, None
+		stack = [(0, self._box_distance_squared(0, px, py, pz))]
+		while stack:
+			node, box_distance = stack.pop()
+			if box_distance >= best:
+				continue
+			left = self.node_left[node]
+			if left >= 0:
+				right = self.node_right[node]
+				left_distance = self._box_distance_squared(left, px, py, pz)
+				right_distance = self._box_distance_squared(right, px, py, pz)
+				# Visit the closer child first so that the search bound tightens quickly.
+				if left_distance < right_distance:
+					stack.append((right, right_distance))
+					stack.append((left, left_distance))
+				else:
+					stack.append((left, left_distance))
+					stack.append((right, right_distance))
+				continue
+			start = self.node_start[node]
+			for t in range(start, start + self.node_count[node]):
+				distance, point = closest_point_on_triangle(px, py, pz, tri, 9 * t)
+				if distance < best:
+					best = distance
+					best_tri = t
+					best_point = point
+		return best, best_tri, best_point
+
+	def _prepare_winding(self):
+		"""Calculates the far-field approximation of each node used by `winding_numbers`, the first time it is needed.
+		Each node stores the sum of the area vectors of its triangles in `node_area_vectors`, their area-weighted centroid in `node_centers`,
+		and the distance from that centroid to the furthest corner of its bounds in `node_radii`."""
+		if hasattr(self, 'node_radii'):
+			return
+		node_count = len(self.node_left)
+		tri = self.triangles
+		area_vectors = array('d', bytes(8 * 3 * node_count))
+		centers = array('d', bytes(8 * 3 * node_count))
+		areas = array('d', bytes(8 * node_count))
+		radii = array('d', bytes(8 * node_count))
+		b = self.node_bounds
+		# Children are numbered after their parents, so walking the nodes backwards visits every child before its parent.
+		for node in range(node_count - 1, -1, -1):
+			n = 3 * node
+			left = self.node_left[node]
+			if left >= 0:
+				parts = ((area_vectors[3 * child:3 * child + 3], centers[3 * child:3 * child + 3], areas[child]) for child in (left, self.node_right[node]))
+			else:
+				parts = []
+				start = self.node_start[node]
+				for t in range(start, start + self.node_count[node]):
+					ax, ay, az, bx, by, bz, cx, cy, cz = tri[9 * t:9 * t + 9]
+					ux, uy, uz = bx - ax, by - ay, bz - az
+					vx, vy, vz = cx - ax, cy - ay, cz - az
+					vector = ((uy * vz - uz * vy) / 2, (uz * vx - ux * vz) / 2, (ux * vy - uy * vx) / 2)
+					parts.append((vector, ((ax + bx + cx) / 3, (ay + by + cy) / 3, (az + bz + cz) / 3), sqrt(vector[0] ** 2 + vector[1] ** 2 + vector[2] ** 2)))
+			total_area = 0
+			center = [0, 0, 0]
+			for vector, part_center, area in parts:
+				total_area += area
+				for axis in range(3):
+					area_vectors[n + axis] += vector[axis]
+					center[axis] += part_center[axis] * area
+			i = 6 * node
+			for axis in range(3):
+				# Triangles without area leave only the middle of the bounds as their center.
+				centers[n + axis] = center[axis] / total_area if total_area > 0 else (b[i + axis] + b[i + 3 + axis]) / 2
+			areas[node] = total_area
+			radii[node] = sqrt(sum(max(centers[n + axis] - b[i + axis], b[i + 3 + axis] - centers[n + axis]) ** 2 for axis in range(3)))
+		self.node_area_vectors = area_vectors
+		self.node_centers = centers
+		self.node_radii = radii
+
+	def _winding_number(self, px, py, pz, accuracy):
+		"""Returns the winding number of the mesh around a single point (see `winding_numbers`)."""
+		tri = self.triangles
+		area_vectors = self.node_area_vectors
+		centers = self.node_centers
+		radii = self.node_radii
+		node_left = self.node_left
+		accuracy_squared = accuracy * accuracy
+		total = 0
+		stack = [0] if len(node_left) > 0 else []
+		while stack:
+			node = stack.pop()
+			n = 3 * node
+			dx, dy, dz = centers[n] - px, centers[n + 1] - py, centers[n + 2] - pz
+			distance_squared = dx * dx + dy * dy + dz * dz
+			if distance_squared > accuracy_squared * radii[node] * radii[node]:
+				# Far from the node, its triangles look like a single dipole: their total area vector seen from the point.
+				total += (area_vectors[n] * dx + area_vectors[n + 1] * dy + area_vectors[n + 2] * dz) / (distance_squared * sqrt(distance_squared))
+				continue
+			left = node_left[node]
+			if left >= 0:
+				stack.append(self.node_right[node])
+				stack.append(left)
+				continue
+			start = self.node_start[node]
+			for t in range(start, start + self.node_count[node]):
+				total += triangle_solid_angle(px, py, pz, tri, 9 * t)
+		return total / (4 * pi)
+
+	def winding_numbers(self, points, accuracy=2.0):
+		"""Calculates the generalized winding number of the mesh around each point of a batch, which is the signed solid angle of the mesh seen
+		from the point divided by 4π. It is 1 inside a closed mesh wound counterclockwise when seen from outside and 0 outside, and varies smoothly
+		across holes, so thresholding it at 0.5 decides which points are inside even open or self-intersecting meshes.
+		`points` is a sequence of points given as Vector3 instances or sequences of three numbers. Returns an `array('d')` of winding numbers.
+		Triangles near a point are measured exactly, while nodes further than `accuracy` times their radius are approximated as a single dipole,
+		so the cost of each point grows far slower than the number of triangles. Larger values of `accuracy` are slower and more accurate."""
+		self._prepare_winding()
+		numbers = array('d')
+		for point in points:
+			numbers.append(self._winding_number(*_point_tuple(point), accuracy))
+		return numbers
+
+	def nearest_facet(self, points, max_distance=inf):
+		"""Finds the closest facet to each point of a batch.
+		`points` is a sequence of points given as Vector3 instances or sequences of three numbers.
+		Returns a tuple `(distances, facets, closest_points)` where `distances` is an `array('d')` of distances to the surface,
+		`facets` is an `array('l')` of facet indexes and `closest_points` is a list of (x, y, z) tuples on the surface.
+		Points further than `max_distance` from the surface are reported as `inf`, -1, and None."""
+		distances = array('d')
+		facets = array('l')
+		closest_points = []
+		max_distance_squared = max_distance * max_distance
+		for point in points:
+			distance, hit, closest = self._nearest(*_point_tuple(point), max_distance_squared)
+			distances.append(sqrt(distance) if hit >= 0 else inf)
+			facets.append(self.facet_ids[hit] if hit >= 0 else -1)
+			closest_points.append(closest)
+		return distances, facets, closest_points
@@ -0,0 +1,98 @@
+from array import array
+from mesh import Mesh, MeshIV
+from mmesh import measure_labeled
+
+class UnionFind:
+	"""A disjoint set forest over the integers 0 to `size - 1` stored in flat arrays.
+	Uses union by size and path halving, so any series of operations runs in near-linear time."""
+
+	def __init__(self, size=0):
+		self.parent = array('l', range(size))
+		self.size = array('l', [1]) * size
+
+	def __len__(self):
+		return len(self.parent)
+
+	def add(self):
+		"""Adds a new singleton set and returns its element."""
+		element = len(self.parent)
+		self.parent.append(element)
+		self.size.append(1)
+		return element
+
+	def find(self, element):
+		"""Returns the representative element of the set containing `element`."""
+		parent = self.parent
+		while parent[element] != element:
+			parent[element] = parent[parent[element]]
+			element = parent[element]
+		return element
+
+	def union(self, element1, element2):
+		"""Merges the sets containing `element1` and `element2` and returns the new representative."""
+		root1 = self.find(element1)
+		root2 = self.find(element2)
+		if root1 == root2:
+			return root1
+		if self.size[root1] < self.size[root2]:
+			root1, root2 = root2, root1
+		self.parent[root2] = root1
+		self.size[root1] += self.size[root2]
+		return root1
+
+def _facet_vertex_ids(mesh, weld_tolerance):
+	"""Returns a list of integer vertex ids for each facet of the mesh, along with the total number of ids.
+	`MeshIV` meshes use their vertex indexes directly. Other meshes are welded by vertex position,
+	either exactly or after snapping each coordinate to a grid of size `weld_tolerance`."""
+	if isinstance(mesh, MeshIV):
+		return [facet.vertex_indices for facet in mesh], len(mesh.vertices)
+	welded = {}
+	facet_ids = []
+	for facet in mesh:
+		ids = []
+		for vertex in facet:
+			if weld_tolerance > 0:
+				key = (round(vertex.x / weld_tolerance), round(vertex.y / weld_tolerance), round(vertex.z / weld_tolerance))
+			else:
+				key = (vertex.x, vertex.y, vertex.z)
+			vertex_id = welded.get(key)
+			if vertex_id is None:
+				vertex_id = welded[key] = len(welded)
+			ids.append(vertex_id)
+		facet_ids.append(ids)
+	return facet_ids, len(welded)
+
+def label_components(mesh, weld_tolerance=0):
+	"""Labels the connected components of the given mesh, where facets sharing a vertex belong to the same component.
+	Returns a tuple `(labels, component_count)` where `labels` is an `array('l')` holding the component of each facet.
+	Components are numbered in order of their first facet.
+	`weld_tolerance` is only used for meshes which are not instances of MeshIV, such as those read from STL files."""
+	if not isinstance(mesh, Mesh):
+		raise TypeError('label_components: Argument must be an instance of Mesh.')
+	facet_vertex_ids, vertex_count = _facet_vertex_ids(mesh, weld_tolerance)
+	sets = UnionFind(vertex_count)
+	for ids in facet_vertex_ids:
+		for vertex_id in ids[1:]:
+			sets.union(ids[0], vertex_id)
+
+	labels = array('l')
+	root_labels = {}
+	for ids in facet_vertex_ids:
+		if len(ids) == 0:
+			labels.append(-1)
+			continue
+		root = sets.find(ids[0])
+		label = root_labels.get(root)
+		if label is None:
+			label = root_labels[root] = len(root_labels)
+		labels.append(label)
+	return labels, len(root_labels)
+
+def measure_components(mesh, volume=False, area=False, length=False, weld_tolerance=0):
+	"""Measures each connected component of the given mesh separately.
+	Returns a list with one dictionary of measurements per component as described by `measure_labeled`.
+	The list is also stored under `mesh.meta['components']`."""
+	labels, component_count = label_components(mesh, weld_tolerance)
+	components = measure_labeled(mesh, labels, component_count, volume, area, length)
+	mesh.meta['components'] = components
+	return components
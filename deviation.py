@@ -0,0 +1,98 @@
+import math
+import random
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from bvh import BVH
+from mesh import Mesh
+
+def sample_surface(coords, sample_count, rng):
+	"""Picks `sample_count` random points spread evenly over the area of the triangles in the flat array `coords` (nine values per triangle).
+	The total area is split into `sample_count` equal strata and one point is picked from each, so large triangles get proportionally more
+	points and the points cover the surface more evenly than independent picks would.
+	Returns a tuple `(points, triangles)` where `points` is an `array('d')` of three coordinates per point and `triangles` is an `array('l')`
+	holding the index of the triangle each point lies on."""
+	areas = array('d')
+	for i in range(0, len(coords), 9):
+		ax, ay, az, bx, by, bz, cx, cy, cz = coords[i:i + 9]
+		ux, uy, uz = bx - ax, by - ay, bz - az
+		vx, vy, vz = cx - ax, cy - ay, cz - az
+		nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+		areas.append(math.sqrt(nx * nx + ny * ny + nz * nz) / 2)
+	cumulative = array('d', accumulate(areas))
+	points = array('d')
+	triangles = array('l')
+	total = cumulative[-1] if cumulative else 0
+	if total <= 0:
+		return points, triangles
+	last = len(cumulative) - 1
+	for stratum in range(sample_count):
+		triangle = min(bisect_right(cumulative, (stratum + rng.random()) * total / sample_count), last)
+		# Folding the unit square onto the triangle gives a uniformly distributed point.
+		s = rng.random()
+		t = rng.random()
+		if s + t > 1:
+			s, t = 1 - s, 1 - t
+		i = 9 * triangle
+		ax, ay, az = coords[i], coords[i + 1], coords[i + 2]
+		points.extend((
+			ax + s * (coords[i + 3] - ax) + t * (coords[i + 6] - ax),
+			ay + s * (coords[i + 4] - ay) + t * (coords[i + 7] - ay),
+			az + s * (coords[i + 5] - az) + t * (coords[i + 8] - az),
+		))
+		triangles.append(triangle)
+	return points, triangles
+
+def surface_distances(points, bvh):
+	"""Returns an `array('d')` holding the distance from each point of the flat array `points` (three values per point) to the nearest
+	triangle in the BVH (see `BVH.nearest_facet`)."""
+	return bvh.nearest_facet(zip(points[0::3], points[1::3], points[2::3]))[0]
+
+def surface_deviation(mesh, reference, sample_count=100000, seed=None, reference_bvh=None):
+	"""Measures how far the surface of `mesh` strays from the surface of `reference` by sampling `sample_count` points on `mesh` by area
+	(see `sample_surface`) and finding the distance from each to the nearest facet of `reference` through a BVH, which is built once.
+	A BVH of `reference` that has already been built may be passed as `reference_bvh` to reuse it for several comparisons.
+	Returns a dictionary holding:
+		`max_deviation`, `mean_deviation`, and `rms_deviation`, the largest, mean, and root mean square distances of the samples,
+		`sample_count`, the number of points sampled,
+		`facet_deviation`, an `array('d')` holding the largest distance of the samples on each facet slot of `mesh`, or NaN for facets
+			without any samples.
+	The largest distance is a lower bound on the true largest distance, which it approaches as `sample_count` grows."""
+	if not isinstance(mesh, Mesh) or not isinstance(reference, Mesh):
+		raise TypeError('surface_deviation: Arguments must be instances of Mesh.')
+	if reference_bvh is None:
+		reference_bvh = BVH(reference)
+	if len(reference_bvh) == 0:
+		raise ValueError('surface_deviation: Reference mesh has no surface to compare against.')
+	coords, facet_ids = mesh.triangle_arrays()
+	points, triangles = sample_surface(coords, sample_count, random.Random(seed))
+	distances = surface_distances(points, reference_bvh)
+
+	facet_deviation = array('d', [math.nan]) * mesh.slot_count
+	for triangle, distance in zip(triangles, distances):
+		facet_ind = facet_ids[triangle]
+		# NaN compares false, so unsampled facets take their first distance.
+		if not distance <= facet_deviation[facet_ind]:
+			facet_deviation[facet_ind] = distance
+	count = len(distances)
+	return {
+		'max_deviation': max(distances, default=0),
+		'mean_deviation': math.fsum(distances) / count if count else 0,
+		'rms_deviation': math.sqrt(math.fsum(distance * distance for distance in distances) / count) if count else 0,
+		'sample_count': count,
+		'facet_deviation': facet_deviation,
+	}
+
+def compare_meshes(mesh, reference, sample_count=100000, seed=None):
+	"""Compares the surface of `mesh`, such as a decimated or repaired copy, with the surface of `reference`, such as the original.
+	Returns the dictionary of `surface_deviation` for `mesh` against `reference`, plus:
+		`reverse_max_deviation`, the largest distance from points sampled on `reference` to `mesh`, which catches parts of `reference` that
+			`mesh` has lost,
+		`hausdorff`, the symmetric Hausdorff distance between the surfaces, the larger of `max_deviation` and `reverse_max_deviation`.
+	Both directions sample `sample_count` points, so the cost depends on `sample_count` and only grows with the logarithm of the number
+	of facets once the BVHs are built."""
+	result = surface_deviation(mesh, reference, sample_count, seed)
+	reverse = surface_deviation(reference, mesh, sample_count, None if seed is None else seed + 1)
+	result['reverse_max_deviation'] = reverse['max_deviation']
+	result['hausdorff'] = max(result['max_deviation'], reverse['max_deviation'])
+	return result
@@ -0,0 +1,153 @@
+import json
+import math
+import hashlib
+from array import array
+
+SECOND_MOMENTS = ((0, 0), (1, 1), (2, 2), (0, 1), (1, 2), (2, 0))
+
+def geometry_fingerprint(mesh, tolerance=1e-5):
+	"""Returns a fingerprint of the shape of a mesh as a string of 32 hexadecimal digits, which is the same for any copy of the shape
+	whatever the order of its facets, the order of the vertices within them, how its polygons were split into triangles, or the file format
+	it was read from.
+	Coordinates are first rounded to single precision, as binary STL files store them, and then to a grid whose spacing is the power of two
+	nearest below `tolerance` times the diagonal of the mesh's bounds, which welds vertices closer together than it.
+	The fingerprint combines the set of welded vertices used by facets with area with the area, volume, and first and second moments of the
+	surface, which are the same for a planar polygon and any split of it into triangles. The moments are rounded to a relative `tolerance`."""
+	mesh.compute_normals()
+	snap = lambda vertex: array('f', (vertex.x, vertex.y, vertex.z)).tolist()
+	lower = [math.inf] * 3
+	upper = [-math.inf] * 3
+	for facet in mesh:
+		for vertex in facet.vertices:
+			for axis, value in enumerate(snap(vertex)):
+				lower[axis] = min(lower[axis], value)
+				upper[axis] = max(upper[axis], value)
+	diagonal = math.dist(lower, upper) if lower[0] <= upper[0] else 0
+	# Powers of two keep the grid the same for copies whose bounds differ in the last digits.
+	spacing = 2.0 ** math.floor(math.log2(tolerance * diagonal)) if diagonal > 0 else 1.0
+	moment_spacing = 2.0 ** round(math.log2(1 / tolerance))
+
+	vertices = set()
+	area = volume = 0
+	first = [0] * 3
+	second = [0] * 6
+	for facet in mesh:
+		points = []
+		for vertex in facet.vertices:
+			point = tuple(round(value / spacing) for value in snap(vertex))
+			if not points or point != points[-1]:
+				points.append(point)
+		if len(points) > 1 and points[0] == points[-1]:
+			points.pop()
+		if len(points) < 3:
+			continue
+
+		# Newell's method gives the winding of the rounded polygon, which is reversed if it disagrees with the facet's normal.
+		nx = ny = nz = 0
+		for (x1, y1, z1), (x2, y2, z2) in zip(points, points[1:] + points[:1]):
+			nx += (y1 - y2) * (z1 + z2)
+			ny += (z1 - z2) * (x1 + x2)
+			nz += (x1 - x2) * (y1 + y2)
+		normal = facet.normal
+		if nx * normal.x + ny * normal.y + nz * normal.z < 0:
+			points.reverse()
+
+		facet_area = 0
+		p0 = points[0]
+		x0, y0, z0 = p0
+		for p1, p2 in zip(points[1:], points[2:]):
+			(x1, y1, z1), (x2, y2, z2) = p1, p2
+			ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+			vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+			cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+			triangle_area = math.sqrt(cx * cx + cy * cy + cz * cz) / 2
+			if triangle_area == 0:
+				continue
+			facet_area += triangle_area
+			volume += (x0 * (y1 * z2 - z1 * y2) + y0 * (z1 * x2 - x1 * z2) + z0 * (x1 * y2 - y1 * x2)) / 6
+			sums = (x0 + x1 + x2, y0 + y1 + y2, z0 + z1 + z2)
+			for i in range(3):
+				first[i] += triangle_area * sums[i] / 3
+			# The mean of x_i * x_j over a triangle is the sum of the products at its corners plus the product of their sums, over 12.
+			for ind, (i, j) in enumerate(SECOND_MOMENTS):
+				second[ind] += triangle_area * (p0[i] * p0[j] + p1[i] * p1[j] + p2[i] * p2[j] + sums[i] * sums[j]) / 12
+		if facet_area > 0:
+			area += facet_area
+			vertices.update(points)
+
+	total = 0
+	for point in vertices:
+		total += int.from_bytes(hashlib.blake2b(repr(point).encode(), digest_size=16).digest(), 'little')
+	total &= (1 << 128) - 1
+	# Moments of the surface are rounded relative to its size, with a spacing growing with their order.
+	moments = [round(area / moment_spacing), round(volume / moment_spacing ** 2)]
+	moments += [round(value / moment_spacing ** 2) for value in first]
+	moments += [round(value / moment_spacing ** 3) for value in second]
+	return hashlib.blake2b(repr((len(vertices), moments)).encode() + total.to_bytes(16, 'little'), digest_size=16).hexdigest()
+
+def file_digest(file_path):
+	"""Returns the SHA-256 digest of a file's bytes as a hexadecimal string, read a block at a time."""
+	digest = hashlib.sha256()
+	try:
+		with open(file_path, 'rb') as fp:
+			for block in iter(lambda: fp.read(1 << 20), b''):
+				digest.update(block)
+	except FileNotFoundError:
+		raise FileNotFoundError(f'file_digest: Failed to locate file "{file_path}" in the current directory.')
+	return digest.hexdigest()
+
+class FingerprintIndex:
+	"""An index of the measurements of previously measured shapes by their `geometry_fingerprint`, along with the fingerprints of previously
+	read files by their `file_digest`, so that files with exactly the same bytes need not even be parsed.
+	If `index_path` is given, the index is read from that JSONL file and every addition is appended to it, so it is kept between runs."""
+
+	def __init__(self, index_path=None):
+		self.index_path = index_path
+		self.measurements = {}
+		self.fingerprints = {}
+		if index_path is None:
+			return
+		try:
+			with open(index_path, 'r+b') as fp:
+				complete = 0
+				for line in fp:
+					if not line.endswith(b'\n'):
+						# A final line left incomplete by an interrupted run is removed, so that appended lines start on a line of their own.
+						fp.truncate(complete)
+						break
+					self._load(json.loads(line))
+					complete += len(line)
+		except FileNotFoundError:
+			pass
+
+	def _load(self, record):
+		if 'measurements' in record:
+			self.measurements[record['fingerprint']] = record['measurements']
+		if 'digest' in record:
+			self.fingerprints[record['digest']] = record['fingerprint']
+
+	def __len__(self):
+		return len(self.measurements)
+	def __contains__(self, fingerprint):
+		return fingerprint in self.measurements
+
+	def lookup(self, fingerprint):
+		"""Returns a copy of the measurements stored for the given fingerprint, or None if there are none."""
+		measurements = self.measurements.get(fingerprint)
+		return None if measurements is None else dict(measurements)
+
+	def lookup_file(self, digest):
+		"""Returns the fingerprint of the file with the given digest, or None if it has not been read."""
+		return self.fingerprints.get(digest)
+
+	def add(self, fingerprint, measurements=None, digest=None):
+		"""Stores the measurements of the shape with the given fingerprint and/or the fingerprint of the file with the given digest."""
+		record = {'fingerprint': fingerprint}
+		if measurements is not None:
+			record['measurements'] = dict(measurements)
+		if digest is not None:
+			record['digest'] = digest
+		self._load(record)
+		if self.index_path is not None:
+			with open(self.index_path, 'at') as fp:
+				fp.write(json.dumps(record) + '\n')
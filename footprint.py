@@ -0,0 +1,161 @@
+import gc
+import os
+import sys
+import tempfile
+from struct import pack
+from parse_stl import parse_stl, is_text_stl, bin_stl_facet_count
+from parse_obj import parse_obj
+from frozen import FrozenMesh
+
+CATEGORIES = ('vertices', 'indices', 'normals', 'attributes', 'meta', 'facets')
+
+def deep_sizeof(obj, seen):
+	"""Returns the number of bytes used by an object and everything it refers to, found through the garbage collector's references.
+	Objects whose ids are in the set `seen` are not counted, and every counted object is added to it, so shared objects are counted once.
+	Classes, None, booleans, and small integers are shared by the interpreter and are not counted."""
+	if obj is None or obj is True or obj is False or id(obj) in seen or isinstance(obj, type):
+		return 0
+	if type(obj) is int and -5 <= obj <= 256:
+		return 0
+	seen.add(id(obj))
+	referents = gc.get_referents(obj)
+	size = _instance_sizeof(obj, referents)
+	for referent in referents:
+		size += deep_sizeof(referent, seen)
+	return size
+
+def _instance_sizeof(obj, referents):
+	"""Returns the number of bytes used by an object itself, without the objects it refers to."""
+	size = sys.getsizeof(obj)
+	if type(obj).__dictoffset__ and not any(type(referent) is dict for referent in referents):
+		# The attributes are stored inline rather than in a dictionary, which cannot be inspected without creating one.
+		# Each takes a pointer, plus the header of the values block.
+		size += 8 * sum(1 for referent in referents if not isinstance(referent, type)) + 16
+	return size
+
+def mesh_memory(mesh):
+	"""Returns the number of bytes used by a mesh as a dictionary broken down by category:
+		`vertices`, the vertex positions,
+		`indices`, the lists of vertices or vertex indexes of the facets and the reverse vertex lookup of MeshIV,
+		`normals`, the facet normals and any vertex normals in `.meta['normals']`,
+		`attributes`, the facet data (see `FacetAttributes`),
+		`meta`, the rest of `.meta`,
+		`facets`, the facet objects themselves and the mesh's list of them,
+	along with their `total`. Objects shared between facets, such as vertices, are counted once.
+	A FrozenMesh counts the bytes of its flat arrays, with its facet offsets and vertex indexes as `indices`."""
+	if isinstance(mesh, FrozenMesh):
+		usage = dict.fromkeys(CATEGORIES, 0)
+		usage['vertices'] = len(mesh.vertices) * mesh.vertices.itemsize
+		usage['normals'] = len(mesh.normals) * mesh.normals.itemsize
+		usage['indices'] = len(mesh.offsets) * mesh.offsets.itemsize + len(mesh.corners) * mesh.corners.itemsize
+		usage['attributes'] = deep_sizeof(mesh.attributes, set())
+		usage['meta'] = deep_sizeof(mesh.meta, set())
+		usage['total'] = sum(usage[category] for category in CATEGORIES)
+		return usage
+	seen = {id(mesh), id(mesh.meta), id(mesh._facets)}
+	usage = dict.fromkeys(CATEGORIES, 0)
+	if getattr(mesh, 'vertices', None) is not None:
+		usage['vertices'] += deep_sizeof(mesh.vertices, seen)
+	usage['facets'] += sys.getsizeof(mesh._facets)
+	for facet in mesh._facets:
+		if facet is None or id(facet) in seen:
+			continue
+		seen.add(id(facet))
+		usage['facets'] += _instance_sizeof(facet, gc.get_referents(facet))
+		usage['indices'] += sys.getsizeof(facet._vertices)
+		seen.add(id(facet._vertices))
+		for vertex in facet._vertices:
+			if type(vertex) is int:
+				usage['indices'] += deep_sizeof(vertex, seen)
+			else:
+				usage['vertices'] += deep_sizeof(vertex, seen)
+		usage['normals'] += deep_sizeof(facet._normal, seen)
+		usage['attributes'] += deep_sizeof(facet._data, seen)
+	if getattr(mesh, 'reverse_vertex_lookup', None) is not None:
+		usage['indices'] += deep_sizeof(mesh.reverse_vertex_lookup, seen)
+	usage['attributes'] += deep_sizeof(mesh.attributes, seen)
+	usage['normals'] += deep_sizeof(mesh.meta.get('normals'), seen)
+	seen.discard(id(mesh.meta))
+	usage['meta'] += deep_sizeof(mesh.meta, seen)
+	usage['total'] = sum(usage[category] for category in CATEGORIES)
+	return usage
+
+def _sample_file(file_path, sample_bytes, scratch_fp):
+	"""Writes a small file of the same format holding a sample of the given file's facets to `scratch_fp`.
+	Returns the ratio between the size of the whole file and the sample, and whether the sample is the whole file."""
+	file_size = os.path.getsize(file_path)
+	extension = file_path.split('.')[-1]
+	if extension == 'stl' and not is_text_stl(file_path):
+		# Binary facets are all the same size, so the first ones are read and the facet count in the header gives the ratio.
+		facet_count = bin_stl_facet_count(file_path)
+		sample_count = min(facet_count, max(1, sample_bytes // 50))
+		with open(file_path, 'rb') as fp:
+			header = fp.read(80)
+			fp.read(4)
+			facets_bin = fp.read(50 * sample_count)
+		sample_count = len(facets_bin) // 50
+		scratch_fp.write(header + pack('<I', sample_count) + facets_bin[:50 * sample_count])
+		return (facet_count / sample_count if sample_count else 0), sample_count == facet_count
+	if file_size <= sample_bytes:
+		with open(file_path, 'rb') as fp:
+			scratch_fp.write(fp.read())
+		return 1, True
+	with open(file_path, 'rb') as fp:
+		if extension == 'stl':
+			# Text facets are similar in size, so the first whole facets are read.
+			sampled = 0
+			for line in fp:
+				scratch_fp.write(line)
+				sampled += len(line)
+				if sampled >= sample_bytes and b'endfacet' in line:
+					break
+			scratch_fp.write(b'endsolid\n')
+		else:
+			# Obj files usually list their vertices before their faces, so whole lines are read from blocks spread across the file.
+			block_count = 16
+			block_size = sample_bytes // block_count
+			sampled = 0
+			for block in range(block_count):
+				fp.seek(block * (file_size - block_size) // (block_count - 1))
+				data = fp.read(block_size)
+				start = 0 if block == 0 else data.find(b'\n') + 1
+				end = data.rfind(b'\n') + 1
+				if 0 < start < end or (start == 0 and end > 0):
+					scratch_fp.write(data[start:end])
+					sampled += end - start
+	return (file_size / sampled if sampled else 0), False
+
+def estimate_file_memory(file_path, sample_bytes=1 << 20, given_normals=False):
+	"""Estimates the memory `parse_stl` or `parse_obj` would use for the given file without parsing all of it, such as when deciding whether
+	a job fits in the memory available.
+	A sample of about `sample_bytes` bytes of facets is parsed and measured with `mesh_memory`, then scaled up by the file size, or by the facet count
+	in the header of binary STL files. Returns a dictionary of the same categories and `total`, plus the estimated `facet_count`
+	and `exact`, which is set when the sample was the whole file."""
+	extension = file_path.split('.')[-1]
+	if extension not in ('stl', 'obj'):
+		raise ValueError(f'estimate_file_memory: Unsupported file format "{extension}".')
+	scratch_fd, scratch_path = tempfile.mkstemp(suffix='.' + extension)
+	try:
+		with os.fdopen(scratch_fd, 'wb') as scratch_fp:
+			ratio, exact = _sample_file(file_path, sample_bytes, scratch_fp)
+		if extension == 'stl':
+			sample_mesh = parse_stl(scratch_path, given_normals)
+		else:
+			sample_mesh = parse_obj(scratch_path, given_normals)
+	except FileNotFoundError:
+		raise FileNotFoundError(f'estimate_file_memory: Failed to locate file "{file_path}" in the current directory.')
+	finally:
+		os.remove(scratch_path)
+
+	usage = mesh_memory(sample_mesh)
+	estimate = {}
+	for category in CATEGORIES:
+		# The meta of STL meshes is only the header information, which does not grow with the file.
+		if category == 'meta' and extension == 'stl':
+			estimate[category] = usage[category]
+		else:
+			estimate[category] = round(usage[category] * ratio)
+	estimate['total'] = sum(estimate[category] for category in CATEGORIES)
+	estimate['facet_count'] = round(len(sample_mesh) * ratio)
+	estimate['exact'] = exact
+	return estimate
@@ -0,0 +1,194 @@
+import math
+from array import array
+from struct import pack, unpack_from, calcsize
+from multiprocessing import shared_memory
+from vector3 import Vector3
+from mesh import Mesh, MeshIV, MeshFacet
+from attributes import FacetAttributes
+
+# The shared block starts with this header, followed by the vertex coordinates, facet normals, facet offsets, and facet vertex indexes.
+HEADER_FORMAT = '<4sIqqq'
+HEADER_SIZE = calcsize(HEADER_FORMAT)
+MAGIC = b'MMSH'
+
+class FrozenMesh(Mesh):
+	"""A read-only mesh stored in four flat arrays, which can be published once into shared memory and attached by other processes without copying.
+		`vertices` holds three coordinates per vertex,
+		`normals` holds three components of the unit normal per facet,
+		`offsets` holds the start of each facet's vertex indexes in `corners`, plus the total count at the end,
+		`corners` holds the vertex indexes of every facet back to back.
+	The arrays are read-only memoryviews when the mesh is backed by shared memory.
+	Facets are built as instances of MeshFacet when accessed, so existing functions work unchanged, while `measure_mesh` and `triangle_arrays`
+	read the arrays directly. The mesh's `.meta` is local to each process.
+	Pickling a shared frozen mesh only sends the name of its shared memory, which the receiving process attaches."""
+
+	def __init__(self, vertices, normals, offsets, corners, shared=None, meta={}):
+		"""Wraps existing arrays. Use `freeze_mesh` to create a frozen mesh from a Mesh and `attach_mesh` to attach a published one."""
+		self.vertices = vertices
+		self.normals = normals
+		self.offsets = offsets
+		self.corners = corners
+		self.shared = shared
+		self.meta = dict(meta)
+		self.attributes = FacetAttributes()
+
+	@property
+	def name(self):
+		"""The name of the shared memory holding the mesh, or None if it is not shared."""
+		return None if self.shared is None else self.shared.name
+
+	def __reduce__(self):
+		if self.shared is None:
+			return (FrozenMesh, (array('d', self.vertices), array('d', self.normals), array('q', self.offsets), array('q', self.corners)))
+		return (attach_mesh, (self.shared.name,))
+
+	def __len__(self):
+		return len(self.offsets) - 1
+	def __iter__(self):
+		return (self.facet(facet_ind) for facet_ind in range(len(self)))
+
+	@property
+	def facets(self):
+		"""The facets of the mesh as a new list of instances of MeshFacet."""
+		return list(self)
+
+	@property
+	def slot_count(self):
+		"""The number of facets. Frozen meshes never have empty slots."""
+		return len(self)
+
+	def facet(self, facet_ind, value=None):
+		"""Builds the facet at index `facet_ind` as a MeshFacet holding copies of its vertices and normal."""
+		if value is not None:
+			raise TypeError('FrozenMesh.facet: Frozen meshes are read-only.')
+		if facet_ind < 0:
+			facet_ind += len(self)
+		vertices = self.vertices
+		facet_vertices = []
+		for vertex_ind in self.corners[self.offsets[facet_ind]:self.offsets[facet_ind + 1]]:
+			facet_vertices.append(Vector3(vertices[3 * vertex_ind], vertices[3 * vertex_ind + 1], vertices[3 * vertex_ind + 2]))
+		normals = self.normals
+		return MeshFacet(facet_vertices, Vector3(normals[3 * facet_ind], normals[3 * facet_ind + 1], normals[3 * facet_ind + 2]))
+
+	def add_facet(self, new_facet, facet_ind=None):
+		raise TypeError('FrozenMesh.add_facet: Frozen meshes are read-only.')
+	def remove_facet(self, facet_ind=-1):
+		raise TypeError('FrozenMesh.remove_facet: Frozen meshes are read-only.')
+	def transform(self, matrix):
+		raise TypeError('FrozenMesh.transform: Frozen meshes are read-only.')
+	def compact(self):
+		raise TypeError('FrozenMesh.compact: Frozen meshes are read-only.')
+	def compute_normals(self, overwrite=False):
+		"""Does nothing, as frozen meshes always store every normal."""
+		pass
+
+	def triangle_arrays(self):
+		"""Flattens the mesh into triangles stored in flat arrays, read directly from the frozen arrays. See `Mesh.triangle_arrays`."""
+		vertices, normals, offsets, corners = self.vertices, self.normals, self.offsets, self.corners
+		coords = array('d')
+		facet_ids = array('l')
+		for facet_ind in range(len(self)):
+			start, end = offsets[facet_ind], offsets[facet_ind + 1]
+			if end - start < 3:
+				continue
+			nx, ny, nz = normals[3 * facet_ind], normals[3 * facet_ind + 1], normals[3 * facet_ind + 2]
+			p = 3 * corners[start]
+			px, py, pz = vertices[p], vertices[p + 1], vertices[p + 2]
+			for corner in range(start + 1, end - 1):
+				q, r = 3 * corners[corner], 3 * corners[corner + 1]
+				ax, ay, az = vertices[q] - px, vertices[q + 1] - py, vertices[q + 2] - pz
+				bx, by, bz = vertices[r] - px, vertices[r + 1] - py, vertices[r + 2] - pz
+				if (ay * bz - az * by) * nx + (az * bx - ax * bz) * ny + (ax * by - ay * bx) * nz < 0:
+					q, r = r, q
+				coords.extend((px, py, pz, vertices[q], vertices[q + 1], vertices[q + 2], vertices[r], vertices[r + 1], vertices[r + 2]))
+				facet_ids.append(facet_ind)
+		return coords, facet_ids
+
+	def close(self):
+		"""Releases the views of the shared memory and detaches this process from it. The mesh cannot be used afterwards."""
+		if self.shared is None:
+			return
+		for view in (self.vertices, self.normals, self.offsets, self.corners):
+			view.release()
+		self.shared.close()
+
+	def unlink(self):
+		"""Frees the shared memory once every process has closed it. Called once, by the process which published the mesh."""
+		if self.shared is not None:
+			self.shared.unlink()
+
+	def __enter__(self):
+		return self
+	def __exit__(self, *args):
+		self.close()
+
+def freeze_arrays(mesh):
+	"""Converts a mesh into the four flat arrays of a FrozenMesh, returned as a tuple `(vertices, normals, offsets, corners)`.
+	Missing normals are calculated first. MeshIV vertices keep their indexes, with removed vertices stored as NaN.
+	Other meshes have their vertices numbered in order of first use, with vertices shared between facets stored once."""
+	if isinstance(mesh, FrozenMesh):
+		return array('d', mesh.vertices), array('d', mesh.normals), array('q', mesh.offsets), array('q', mesh.corners)
+	mesh.compute_normals()
+	vertices = array('d')
+	normals = array('d')
+	offsets = array('q', [0])
+	corners = array('q')
+	if isinstance(mesh, MeshIV):
+		for vertex in mesh.vertices:
+			vertices.extend((math.nan,) * 3 if vertex is None else (vertex.x, vertex.y, vertex.z))
+		for facet in mesh:
+			corners.extend(facet.vertex_indices)
+			offsets.append(len(corners))
+			normals.extend((facet.normal.x, facet.normal.y, facet.normal.z))
+	else:
+		# The original vertices are kept alongside their indexes so that their ids cannot be reused during the pass.
+		vertex_ids = {}
+		for facet in mesh:
+			for vertex in facet.vertices:
+				pair = vertex_ids.get(id(vertex))
+				if pair is None:
+					pair = vertex_ids[id(vertex)] = (vertex, len(vertex_ids))
+					vertices.extend((vertex.x, vertex.y, vertex.z))
+				corners.append(pair[1])
+			offsets.append(len(corners))
+			normals.extend((facet.normal.x, facet.normal.y, facet.normal.z))
+	return vertices, normals, offsets, corners
+
+def freeze_mesh(mesh, shared=True, name=None):
+	"""Creates a FrozenMesh holding the geometry of the given mesh (see `freeze_arrays`).
+	If `shared` is set, the arrays are published into a new block of shared memory, named `name` or a generated name,
+	which other processes can attach with `attach_mesh(frozen.name)` or by receiving the frozen mesh through pickling.
+	The publishing process should call `unlink` on it once the other processes are done with it."""
+	vertices, normals, offsets, corners = freeze_arrays(mesh)
+	if not shared:
+		return FrozenMesh(vertices, normals, offsets, corners)
+	size = HEADER_SIZE + sum(len(part) * part.itemsize for part in (vertices, normals, offsets, corners))
+	block = shared_memory.SharedMemory(name=name, create=True, size=max(1, size))
+	position = HEADER_SIZE
+	block.buf[:HEADER_SIZE] = pack(HEADER_FORMAT, MAGIC, 1, len(vertices) // 3, len(offsets) - 1, len(corners))
+	for part in (vertices, normals, offsets, corners):
+		data = part.tobytes()
+		block.buf[position:position + len(data)] = data
+		position += len(data)
+	block.close()
+	return attach_mesh(block.name)
+
+def attach_mesh(name):
+	"""Attaches the FrozenMesh published into shared memory under the given name without copying it.
+	Call `close` on it when done."""
+	try:
+		block = shared_memory.SharedMemory(name=name, track=False)
+	except TypeError:
+		block = shared_memory.SharedMemory(name=name)
+	magic, version, vertex_count, facet_count, corner_count = unpack_from(HEADER_FORMAT, block.buf)
+	if magic != MAGIC or version != 1:
+		block.close()
+		raise ValueError(f'attach_mesh: Shared memory "{name}" does not hold a frozen mesh.')
+	buffer = block.buf.toreadonly()
+	views = []
+	position = HEADER_SIZE
+	for length, typecode in ((3 * vertex_count, 'd'), (3 * facet_count, 'd'), (facet_count + 1, 'q'), (corner_count, 'q')):
+		views.append(buffer[position:position + 8 * length].cast(typecode))
+		position += 8 * length
+	buffer.release()
+	return FrozenMesh(*views, shared=block)
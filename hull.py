@@ -0,0 +1,197 @@
+import math
+from array import array
+from mesh import Mesh, MeshIV
+from frozen import FrozenMesh
+
+def hull_points(source, dedupe=False):
+	"""Collects the points of a convex hull's input into a flat `array('d')` holding three coordinates per point.
+	`source` may be an instance of MeshIV, whose `.vertices` are used, a FrozenMesh, whose flat `.vertices` are used, any other Mesh, whose facets' vertices are used, a flat array of coordinates,
+	or a sequence of points given as instances of Vector3 or sequences of three numbers.
+	If `dedupe` is set, points with exactly the same coordinates are only kept once."""
+	if isinstance(source, MeshIV):
+		points = ((vertex.x, vertex.y, vertex.z) for vertex in source.vertices if vertex is not None)
+	elif isinstance(source, FrozenMesh):
+		vertices = source.vertices
+		# Removed vertices are stored as NaN, which is the only value not equal to itself.
+		points = ((vertices[i], vertices[i + 1], vertices[i + 2]) for i in range(0, len(vertices), 3) if vertices[i] == vertices[i])
+	elif isinstance(source, Mesh):
+		points = ((vertex.x, vertex.y, vertex.z) for facet in source for vertex in facet.vertices)
+	elif isinstance(source, array):
+		if len(source) % 3 != 0:
+			raise ValueError('hull_points: Flat arrays of coordinates must hold three values per point.')
+		if not dedupe:
+			return array('d', source)
+		points = zip(source[0::3], source[1::3], source[2::3])
+	else:
+		points = ((point.x, point.y, point.z) if hasattr(point, 'x') else tuple(point) for point in source)
+	if dedupe:
+		points = dict.fromkeys(points)
+	coords = array('d')
+	for point in points:
+		coords.extend(point)
+	return coords
+
+def convex_hull(source, dedupe=False):
+	"""Calculates the convex hull of a set of points with the QuickHull algorithm, in O(n log n) expected time.
+	`source` is any input accepted by `hull_points`, and `dedupe` removes repeated points first.
+	Returns a tuple `(coords, faces)` where `coords` is the `array('d')` of the points and `faces` is an `array('l')` holding three point indexes
+	per triangle of the hull, wound counterclockwise when seen from outside.
+	If the points do not span any volume, `faces` is empty."""
+	coords = hull_points(source, dedupe)
+	faces = array('l')
+	point_count = len(coords) // 3
+	if point_count < 4:
+		return coords, faces
+	xs = coords[0::3]
+	ys = coords[1::3]
+	zs = coords[2::3]
+	scale = max(max(xs) - min(xs), max(ys) - min(ys), max(zs) - min(zs))
+	if scale == 0:
+		return coords, faces
+	epsilon = scale * 1e-10
+
+	def point(i):
+		return xs[i], ys[i], zs[i]
+
+	# The initial tetrahedron is built from the two farthest apart extreme points, the point farthest from the line between them,
+	# and the point farthest from the plane through all three.
+	extremes = [
+		min(range(point_count), key=xs.__getitem__), max(range(point_count), key=xs.__getitem__),
+		min(range(point_count), key=ys.__getitem__), max(range(point_count), key=ys.__getitem__),
+		min(range(point_count), key=zs.__getitem__), max(range(point_count), key=zs.__getitem__),
+	]
+	def distance_squared(i, j):
+		return (xs[i] - xs[j]) ** 2 + (ys[i] - ys[j]) ** 2 + (zs[i] - zs[j]) ** 2
+	p0, p1 = max(((i, j) for i in extremes for j in extremes), key=lambda pair: distance_squared(*pair))
+	ax, ay, az = point(p0)
+	dx, dy, dz = xs[p1] - ax, ys[p1] - ay, zs[p1] - az
+	def line_distance_squared(i):
+		vx, vy, vz = xs[i] - ax, ys[i] - ay, zs[i] - az
+		cx, cy, cz = vy * dz - vz * dy, vz * dx - vx * dz, vx * dy - vy * dx
+		return cx * cx + cy * cy + cz * cz
+	p2 = max(range(point_count), key=line_distance_squared)
+	if line_distance_squared(p2) <= (epsilon * math.sqrt(distance_squared(p0, p1))) ** 2:
+		return coords, faces
+	ex, ey, ez = xs[p2] - ax, ys[p2] - ay, zs[p2] - az
+	nx, ny, nz = dy * ez - dz * ey, dz * ex - dx * ez, dx * ey - dy * ex
+	magnitude = math.sqrt(nx * nx + ny * ny + nz * nz)
+	nx, ny, nz = nx / magnitude, ny / magnitude, nz / magnitude
+	def plane_distance(i):
+		return abs((xs[i] - ax) * nx + (ys[i] - ay) * ny + (zs[i] - az) * nz)
+	p3 = max(range(point_count), key=plane_distance)
+	if plane_distance(p3) <= epsilon:
+		return coords, faces
+
+	# Faces are stored in parallel lists indexed by face id. Each directed edge (u, v) maps to the face it belongs to,
+	# so the neighbor across it is the face holding (v, u).
+	face_vertices = []
+	face_planes = []
+	face_alive = bytearray()
+	outside = []
+	edge_faces = {}
+
+	def add_face(a, b, c):
+		(x0, y0, z0), (x1, y1, z1), (x2, y2, z2) = point(a), point(b), point(c)
+		ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+		vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+		nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+		magnitude = math.sqrt(nx * nx + ny * ny + nz * nz) or 1
+		nx, ny, nz = nx / magnitude, ny / magnitude, nz / magnitude
+		face = len(face_vertices)
+		face_vertices.append((a, b, c))
+		face_planes.append((nx, ny, nz, nx * x0 + ny * y0 + nz * z0))
+		face_alive.append(1)
+		outside.append([])
+		edge_faces[a * point_count + b] = face
+		edge_faces[b * point_count + c] = face
+		edge_faces[c * point_count + a] = face
+		return face
+
+	def distance(face, i):
+		nx, ny, nz, offset = face_planes[face]
+		return nx * xs[i] + ny * ys[i] + nz * zs[i] - offset
+
+	def assign(points, candidate_faces):
+		# Each point goes to the outside set of the first face it is in front of. Points in front of none are inside the hull.
+		for i in points:
+			for face in candidate_faces:
+				if distance(face, i) > epsilon:
+					outside[face].append(i)
+					break
+
+	# Orient the tetrahedron so that every face points away from the remaining vertex.
+	if (xs[p3] - ax) * nx + (ys[p3] - ay) * ny + (zs[p3] - az) * nz > 0:
+		p1, p2 = p2, p1
+	initial_faces = [add_face(p0, p1, p2), add_face(p0, p3, p1), add_face(p1, p3, p2), add_face(p2, p3, p0)]
+	initial_points = {p0, p1, p2, p3}
+	assign((i for i in range(point_count) if i not in initial_points), initial_faces)
+
+	pending = [face for face in initial_faces if outside[face]]
+	while pending:
+		face = pending.pop()
+		if not face_alive[face] or not outside[face]:
+			continue
+		eye = max(outside[face], key=lambda i: distance(face, i))
+
+		# Find the faces visible from the eye point and the horizon edges between them and the rest of the hull.
+		visible = {face}
+		hidden = set()
+		horizon = []
+		stack = [face]
+		while stack:
+			current = stack.pop()
+			a, b, c = face_vertices[current]
+			for u, v in ((a, b), (b, c), (c, a)):
+				neighbor = edge_faces[v * point_count + u]
+				if neighbor in visible:
+					continue
+				if neighbor not in hidden and distance(neighbor, eye) > epsilon:
+					visible.add(neighbor)
+					stack.append(neighbor)
+				else:
+					hidden.add(neighbor)
+					horizon.append((u, v))
+
+		orphans = []
+		for current in visible:
+			face_alive[current] = 0
+			orphans.extend(i for i in outside[current] if i != eye)
+			outside[current] = []
+			a, b, c = face_vertices[current]
+			for u, v in ((a, b), (b, c), (c, a)):
+				if edge_faces.get(u * point_count + v) == current:
+					del edge_faces[u * point_count + v]
+		new_faces = [add_face(u, v, eye) for u, v in horizon]
+		assign(orphans, new_faces)
+		pending.extend(new_face for new_face in new_faces if outside[new_face])
+
+	for face, alive in enumerate(face_alive):
+		if alive:
+			faces.extend(face_vertices[face])
+	return coords, faces
+
+def hull_volume_area(coords, faces):
+	"""Returns the volume and surface area of a closed hull given by `convex_hull` as a tuple `(volume, area)`."""
+	volume = 0
+	area = 0
+	if len(faces) == 0:
+		return 0, 0
+	# Coordinates are taken relative to a point on the hull to limit rounding errors far from the origin.
+	ox, oy, oz = coords[3 * faces[0]], coords[3 * faces[0] + 1], coords[3 * faces[0] + 2]
+	for i in range(0, len(faces), 3):
+		a, b, c = 3 * faces[i], 3 * faces[i + 1], 3 * faces[i + 2]
+		x0, y0, z0 = coords[a] - ox, coords[a + 1] - oy, coords[a + 2] - oz
+		x1, y1, z1 = coords[b] - ox, coords[b + 1] - oy, coords[b + 2] - oz
+		x2, y2, z2 = coords[c] - ox, coords[c + 1] - oy, coords[c + 2] - oz
+		volume += x0 * (y1 * z2 - z1 * y2) - y0 * (x1 * z2 - z1 * x2) + z0 * (x1 * y2 - y1 * x2)
+		ux, uy, uz = x1 - x0, y1 - y0, z1 - z0
+		vx, vy, vz = x2 - x0, y2 - y0, z2 - z0
+		nx, ny, nz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+		area += math.sqrt(nx * nx + ny * ny + nz * nz)
+	return volume / 6, area / 2
+
+def measure_hull(source, dedupe=False):
+	"""Calculates the volume and surface area of the convex hull of a mesh or set of points (see `convex_hull`).
+	Returns a dictionary with the keys `hull_volume` and `hull_area`."""
+	hull_volume, hull_area = hull_volume_area(*convex_hull(source, dedupe))
+	return {'hull_volume': hull_volume, 'hull_area': hull_area}
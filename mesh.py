@@ -1,18 +1,52 @@
+import math
+from array import array
 from vector3 import Vector3
+from attributes import FacetAttributes, FacetData
+from transform import check_affine, linear_determinant, normal_matrix, transform_measurements, translation_matrix, scale_matrix, rotation_matrix
+
+def polygon_normal(vertices, given_normals=[]):
+	"""Calculates the unit normal of a face from its vertices, given as a list of instances of Vector3, following their winding.
+	Faces with more than three vertices use the average normal of the triangles between each edge and the face's midpoint.
+	If any `given_normals`, such as normals provided by a file, are included, the calculated normal is inverted to match their facing."""
+	# Detect presence of provided normal value
+	has_given_normal = False
+	given_normal = Vector3(0,0,0)
+	for normal in given_normals:
+		given_normal += normal.norm()
+		has_given_normal = True
+
+	# Calculate normal from vertices
+	normal = Vector3(0,0,0)
+	if len(vertices) == 3:
+		normal = (vertices[1] - vertices[0]).cross(vertices[2] - vertices[0])
+	elif len(vertices) > 3:
+		mid_point = Vector3(0,0,0)
+		for vertex in vertices:
+			mid_point += vertex
+		mid_point /= len(vertices)
+
+		for v1, v2 in zip(vertices, vertices[1:] + vertices[:1]):
+			normal += (v1 - mid_point).cross(v2 - mid_point).norm()
+	normal = normal.norm()
+
+	# If face has a provided normal value, invert calculated normal to match provided normal's facing
+	if has_given_normal and given_normal.dot(normal) < 0:
+		normal *= -1
+	return normal
 
 class MeshFacet:
 	"""A single facet from a mesh."""
-	def __init__(self, vertices=[Vector3(0,0,0), Vector3(0,0,0), Vector3(0,0,0)], normal=Vector3(0,0,0), mesh=None, data={}):
+	def __init__(self, vertices=[Vector3(0,0,0), Vector3(0,0,0), Vector3(0,0,0)], normal=None, mesh=None, data=None):
 		"""
 		`vertices` is the facet's vertices as a list of instances of Vector3
-		`normal` is the facet's normal as an instance of Vector3
+		`normal` is the facet's normal as an instance of Vector3, or None to calculate it from the vertices when it is first needed
 		`mesh` is the facet's parent mesh as Mesh (may be None or omitted, unused by most versions of the class)
-		`data` is a dictionary containing additional arbitrary data asociated with the facet
+		`data` is a dictionary containing additional arbitrary data asociated with the facet, which is copied
 		"""
 		self._vertices = vertices
 		self._normal = normal
 		self.mesh = mesh
-		self._data = data
+		self._data = {} if data is None else dict(data)
 
 	def __iter__(self):
 		return MeshFacetIter(self)
@@ -30,22 +64,46 @@ class MeshFacet:
 
 	@property
 	def normal(self):
-		"""The normal vector of the facet as a Vector3."""
+		"""The normal vector of the facet as a Vector3.
+		If no normal was provided, it is calculated from the vertices on first access."""
+		if self._normal is None:
+			self._normal = self.compute_normal()
 		return self._normal
 	@normal.setter
 	def normal(self, new_value):
-		"""The normal vector of the facet as a Vector3."""
+		"""The normal vector of the facet as a Vector3, or None to recalculate it from the vertices when it is next needed."""
 		self._normal = new_value
 
+	@property
+	def has_normal(self):
+		"""Whether the facet's normal has been provided or already calculated."""
+		return self._normal is not None
+
+	def compute_normal(self):
+		"""Calculates the facet's unit normal from its vertices, following their winding, without storing it."""
+		return polygon_normal(self.vertices)
+
 	def data(self, data_key=None, value=None):
 		"""
 		If `data_key` is omitted or None, fetches the facet's arbitary data as a dictionary.
+		Once the facet is added to a mesh, its data is stored in the mesh's `.attributes` and this returns a dictionary-like FacetData view of it.
 		Otherwise, fetches the arbitrary data value asociated with the vertex with the given key `data_key`.
 		If `value` is not omited or None, sets fetched value before fetching.
 		"""
+		# `_data` holds a dictionary until the facet is added to a mesh, then the facet's row in the mesh's attributes.
+		if type(self._data) is int:
+			if data_key is None:
+				if value is not None:
+					self.mesh.attributes.clear(self._data)
+					for name, item in value.items():
+						self.mesh.attributes.set(self._data, name, item)
+				return FacetData(self.mesh.attributes, self._data)
+			if value is not None:
+				self.mesh.attributes.set(self._data, data_key, value)
+			return self.mesh.attributes.get(self._data, data_key)
 		if data_key is None:
 			if value is not None:
-				self._data = value
+				self._data = dict(value)
 			return self._data
 		else:
 			if value is not None:
@@ -61,11 +119,11 @@ class MeshFacet:
 
 	def convert(unknown_facet):
 		"""Converts a facet which descends from MeshFacet but is of an arbitrary child class to the current child class."""
-		return MeshFacet(unknown_facet.vertices, unknown_facet.normal, unknown_facet.mesh, unknown_facet.data())
+		return MeshFacet(unknown_facet.vertices, unknown_facet._normal, unknown_facet.mesh, unknown_facet.data())
 
 	def copy(self):
 		"""Creates a copy of the facet."""
-		return MeshFacet(self.vertices, self.normal, self.mesh, self.data())
+		return MeshFacet(self.vertices, self._normal, self.mesh, self.data())
 
 	def add_vertex(self, vertex, ind=None):
 		"""Adds the vertex to the facet at the given index. If the index is omitted, adds the vertex to the end.
@@ -83,46 +141,235 @@ class MeshFacet:
 
 class Mesh:
 	"""A 3d mesh with facets.
-	Iterable over its facets."""
+	Iterable over its facets.
+	Removed facets leave an empty slot, so the indexes of the other facets do not change until `compact` is called."""
+
+	_dead_count = 0
+
 	def __init__(self, facets=None, meta={}):
 		"""
 		`facets` is the mesh's facets a list of instances of MeshFacet.
 		`meta` is a dictionary containing arbitrary data related to the mesh.
 		"""
-		self._facets = facets
+		self.attributes = FacetAttributes()
+		self._facets = None if facets is None else [self._adopt_facet(facet) for facet in facets]
 		self.meta = {}
 
+	def _adopt_facet(self, facet):
+		"""Moves the data of a facet joining the mesh into the mesh's attribute channels and returns the facet.
+		A facet whose data is already stored by another mesh is copied first,
+		and an instance of MeshFacetIV whose vertices are stored by another mesh is converted to a MeshFacet."""
+		if facet.mesh is self and type(facet._data) is int:
+			return facet
+		if isinstance(facet, MeshFacetIV) and facet.mesh is not self:
+			facet = MeshFacet.convert(facet)
+		elif type(facet._data) is int:
+			facet = type(facet).convert(facet)
+		facet.mesh = self
+		facet._data = self.attributes.add_row(facet._data)
+		return facet
+
+	def _release_facet(self, facet):
+		"""Detaches a facet leaving the mesh, copying its data out of the mesh's attribute channels into a dictionary."""
+		if facet.mesh is self and type(facet._data) is int:
+			facet._data = dict(FacetData(self.attributes, facet._data))
+
+	def _set_slot(self, facet_ind, facet):
+		"""Stores a facet in the given slot, which may be one left empty by a removed facet."""
+		if self._facets[facet_ind] is None:
+			self._dead_count -= 1
+		self._facets[facet_ind] = facet
+
 	@property
 	def facets(self):
-		"""The facets of the mesh as a list of instances of MeshFacet."""
+		"""The facets of the mesh as a list of instances of MeshFacet.
+		If facets have been removed since the mesh was last compacted, this is a new list of the remaining facets."""
+		if self._dead_count:
+			return [facet for facet in self._facets if facet is not None]
 		return self._facets
 	@facets.setter
 	def facets(self, new_value):
 		"""The facets of the mesh as a list of instances of MeshFacet."""
-		self._facets = new_value
+		self._facets = [self._adopt_facet(facet) for facet in new_value]
+		self._dead_count = 0
+
+	@property
+	def slot_count(self):
+		"""The number of facet indexes in use, including those of removed facets which have not been compacted away."""
+		return len(self._facets)
 
 	def __iter__(self):
 		return MeshIter(self)
 	def __len__(self):
-		return len(self._facets)
+		return len(self._facets) - self._dead_count
 
 	def facet(self, facet_ind, value=None):
-		"""Fetches a single facet referred to by its index, `facet_ind`, as a MeshFacet.
+		"""Fetches a single facet referred to by its index, `facet_ind`, as a MeshFacet, or None if it has been removed.
 		If `value` is not omited or None, sets the facet to the new value before returning."""
 		if value is not None:
-			self._facets[facet_ind] = value
+			self._set_slot(facet_ind, self._adopt_facet(value))
 		return self._facets[facet_ind]
 
 	def remove_facet(self, facet_ind=-1):
-		"""Removes the facet at the given index. If the index is omitted, removes the last facet."""
-		return self.facets.pop(facet_ind)
+		"""Removes the facet at the given index in constant time and returns it. If the index is omitted, removes the facet in the last slot.
+		The slot is left empty, so the indexes of the other facets do not change until `compact` is called."""
+		if facet_ind < 0:
+			facet_ind += len(self._facets)
+		facet = self._facets[facet_ind]
+		if facet is None:
+			raise IndexError(f'Mesh.remove_facet: Facet {facet_ind} has already been removed.')
+		self._facets[facet_ind] = None
+		self._dead_count += 1
+		self._release_facet(facet)
+		return facet
 
 	def add_facet(self, new_facet, facet_ind=None):
 		"""Inserts the facet given by `new_facet` at the given index, `facet_ind`. If the index is omitted, adds it to the end."""
+		new_facet = self._adopt_facet(new_facet)
 		if facet_ind is None:
-			return self.facets.append(new_facet)
+			return self._facets.append(new_facet)
 		else:
-			return self.facets.insert(facet_ind, new_facet)
+			return self._facets.insert(facet_ind, new_facet)
+
+	def compact(self):
+		"""Drops the empty slots left by removed facets, along with the attribute rows of facets no longer in the mesh, in a single pass.
+		Returns a tuple `(facet_map, vertex_map)` of `array('l')` instances mapping each old index to its new index, or -1 if it was removed.
+		`vertex_map` is None for meshes which do not store their vertices separately from their facets."""
+		vertex_map = self._compact_vertices()
+		facet_map = array('l', [-1]) * len(self._facets)
+		facets = []
+		rows = []
+		for facet_ind, facet in enumerate(self._facets):
+			if facet is None:
+				continue
+			if vertex_map is not None:
+				vertex_indices = [vertex_map[vertex_ind] for vertex_ind in facet._vertices]
+				if -1 in vertex_indices: # Facets using a removed vertex are removed as well.
+					self._release_facet(facet)
+					continue
+				facet._vertices = vertex_indices
+			facet_map[facet_ind] = len(facets)
+			facets.append(facet)
+			rows.append(facet._data)
+		self.attributes.compact(rows)
+		for row, facet in enumerate(facets):
+			facet._data = row
+		self._facets = facets
+		self._dead_count = 0
+		return facet_map, vertex_map
+
+	def _compact_vertices(self):
+		"""Drops removed vertices for meshes which store their vertices separately from their facets and returns the map of their indexes."""
+		return None
+
+	def compute_normals(self, overwrite=False):
+		"""Calculates the normals of all facets which do not have one yet in a single pass.
+		Triangles are handled with inlined arithmetic rather than temporary instances of Vector3.
+		If `overwrite` is set, every facet's normal is recalculated from its vertices."""
+		for facet in self:
+			if facet._normal is not None and not overwrite:
+				continue
+			vertices = facet.vertices
+			if len(vertices) == 3 and type(facet).compute_normal is MeshFacet.compute_normal:
+				p, q, r = vertices
+				ax, ay, az = q.x - p.x, q.y - p.y, q.z - p.z
+				bx, by, bz = r.x - p.x, r.y - p.y, r.z - p.z
+				nx, ny, nz = ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx
+				magnitude = math.sqrt(nx * nx + ny * ny + nz * nz)
+				if magnitude > 0:
+					facet._normal = Vector3(nx / magnitude, ny / magnitude, nz / magnitude)
+				else:
+					facet._normal = Vector3(0,0,0)
+			else:
+				facet._normal = facet.compute_normal()
+
+	def transform(self, matrix):
+		"""Applies a 4x4 affine matrix, given as a list of four rows, to every vertex of the mesh in a single pass.
+		Facet normals which are set are transformed by the matrix's inverse transpose. Reflections calculate any missing normals first,
+		since they reverse the winding of the vertices.
+		Measurements stored in `.meta` by `measure_mesh` are updated without measuring the mesh again where the matrix allows it
+		(see `transform_measurements`) and removed otherwise.
+		Returns the mesh."""
+		check_affine(matrix)
+		if linear_determinant(matrix) < 0:
+			self.compute_normals()
+		(a, b, c, dx), (d, e, f, dy), (g, h, i, dz) = matrix[:3]
+		def transform_point(vertex):
+			x, y, z = vertex.x, vertex.y, vertex.z
+			return Vector3(a * x + b * y + c * z + dx, d * x + e * y + f * z + dy, g * x + h * y + i * z + dz)
+		self._transform_vertices(transform_point)
+
+		inverse_transpose = normal_matrix(matrix)
+		def transform_normal(normal):
+			if inverse_transpose is None:
+				return None
+			(a, b, c), (d, e, f), (g, h, i) = inverse_transpose
+			x, y, z = normal.x, normal.y, normal.z
+			nx, ny, nz = a * x + b * y + c * z, d * x + e * y + f * z, g * x + h * y + i * z
+			magnitude = math.sqrt(nx * nx + ny * ny + nz * nz)
+			if magnitude == 0:
+				return Vector3(0,0,0)
+			return Vector3(nx / magnitude, ny / magnitude, nz / magnitude)
+		for facet in self:
+			if facet._normal is not None:
+				facet._normal = transform_normal(facet._normal)
+		if 'normals' in self.meta:
+			self.meta['normals'] = [transform_normal(normal) if isinstance(normal, Vector3) else normal for normal in self.meta['normals']]
+
+		transform_measurements(self.meta, matrix)
+		return self
+
+	def _transform_vertices(self, transform_point):
+		"""Replaces every vertex of the mesh with the result of `transform_point`. Vertices shared between facets stay shared."""
+		# The original vertices are kept alongside their replacements so that their ids cannot be reused during the pass.
+		transformed = {}
+		for facet in self:
+			new_vertices = []
+			for vertex in facet._vertices:
+				pair = transformed.get(id(vertex))
+				if pair is None:
+					pair = transformed[id(vertex)] = (vertex, transform_point(vertex))
+				new_vertices.append(pair[1])
+			facet._vertices = new_vertices
+
+	def translate(self, dx, dy, dz):
+		"""Moves the mesh by the given offsets. See `transform`."""
+		return self.transform(translation_matrix(dx, dy, dz))
+
+	def scale(self, sx, sy=None, sz=None):
+		"""Scales the mesh about the origin. If `sy` and `sz` are omitted, the scale is uniform. See `transform`."""
+		return self.transform(scale_matrix(sx, sy, sz))
+
+	def rotate(self, axis, angle):
+		"""Rotates the mesh by `angle` radians about an axis through the origin (see `rotation_matrix`). See `transform`."""
+		return self.transform(rotation_matrix(axis, angle))
+
+	def triangle_arrays(self):
+		"""Flattens the mesh into triangles stored in flat arrays.
+		Returns a tuple `(coords, facet_ids)` where `coords` is an `array('d')` holding nine values (x1, y1, z1, x2, ..., z3) per triangle
+		and `facet_ids` is an `array('l')` holding the index of the facet each triangle came from.
+		Facets with more than three vertices are split into a fan around their first vertex.
+		Each triangle's winding is flipped where needed so that it agrees with its facet's normal."""
+		coords = array('d')
+		facet_ids = array('l')
+		for facet_ind, facet in enumerate(self._facets):
+			if facet is None:
+				continue
+			vertices = facet.vertices
+			if len(vertices) < 3:
+				continue
+			normal = facet.normal
+			nx, ny, nz = (0, 0, 0) if normal is None else (normal.x, normal.y, normal.z)
+			p = vertices[0]
+			px, py, pz = p.x, p.y, p.z
+			for q, r in zip(vertices[1:-1], vertices[2:]):
+				ax, ay, az = q.x - px, q.y - py, q.z - pz
+				bx, by, bz = r.x - px, r.y - py, r.z - pz
+				if (ay * bz - az * by) * nx + (az * bx - ax * bz) * ny + (ax * by - ay * bx) * nz < 0:
+					q, r = r, q
+				coords.extend((px, py, pz, q.x, q.y, q.z, r.x, r.y, r.z))
+				facet_ids.append(facet_ind)
+		return coords, facet_ids
 
 
 class MeshFacetIter:
@@ -153,11 +400,14 @@ class MeshIter:
 		return self
 
 	def __next__(self):
-		if self.ind >= len(self.mesh):
-			raise StopIteration
-		ret = self.mesh.facet(self.ind)
-		self.ind += 1
-		return ret
+		facets = self.mesh._facets
+		# Empty slots left by removed facets are skipped.
+		while self.ind < len(facets):
+			ret = facets[self.ind]
+			self.ind += 1
+			if ret is not None:
+				return ret
+		raise StopIteration
 
 
 class MeshFacetPFV(MeshFacet):
@@ -165,7 +415,7 @@ class MeshFacetPFV(MeshFacet):
 
 	def convert(unknown_facet):
 		"""Converts a facet which descends from MeshFacet but is of an arbitrary child class to the current child class."""
-		return MeshFacetPFV(unknown_facet.vertices, unknown_facet.normal, unknown_facet.mesh, unknown_facet.data())
+		return MeshFacetPFV(unknown_facet.vertices, unknown_facet._normal, unknown_facet.mesh, unknown_facet.data())
 
 class MeshPFV(Mesh):
 	"""A 3d mesh with facets with a "Per Facet Vertex" format, meaning the vertices are stored as part of the facet like in an STL file.
@@ -176,12 +426,13 @@ class MeshPFV(Mesh):
 		`facets` is the mesh's facets a list of instances of MeshFacet.
 		`meta` is a dictionary containing arbitrary data related to the mesh.
 		"""
+		self.attributes = FacetAttributes()
 		converted_facets = []
 		for facet in facets:
 			if isinstance(facet, MeshFacetPFV):
-				converted_facets.append(facet)
+				converted_facets.append(self._adopt_facet(facet))
 			else:
-				converted_facets.append(MeshFacetPFV.convert(facet))
+				converted_facets.append(self._adopt_facet(MeshFacetPFV.convert(facet)))
 		self._facets = converted_facets
 		self.meta = {}
 
@@ -193,20 +444,21 @@ class MeshPFV(Mesh):
 	def facets(self, new_value):
 		"""The facets of the mesh as a list of instances of MeshFacet."""
 		self._facets = []
+		self._dead_count = 0
 		for facet in new_value:
 			if isinstance(facet, MeshFacetPFV):
-				self._facets.append(facet)
+				self._facets.append(self._adopt_facet(facet))
 			else:
-				self._facets.append(MeshFacetPFV.convert(facet))
+				self._facets.append(self._adopt_facet(MeshFacetPFV.convert(facet)))
 
 	def facet(self, facet_ind, new_value=None):
 		"""Fetches a single facet referred to by its index, `facet_ind`, as a MeshFacet.
 		If `value` is not omited or None, sets the facet to the new value before returning."""
 		if new_value is not None:
 			if isinstance(new_value, MeshFacetPFV):
-				self._facets[facet_ind] = new_value
+				self._set_slot(facet_ind, self._adopt_facet(new_value))
 			else:
-				self._facets[facet_ind] = MeshFacetPFV.convert(new_value)
+				self._set_slot(facet_ind, self._adopt_facet(MeshFacetPFV.convert(new_value)))
 		return self._facets[facet_ind]
 
 	def add_facet(self, new_facet, facet_ind=None):
@@ -220,17 +472,17 @@ class MeshFacetIV(MeshFacet):
 
 	vertex_error_match = 0.0001
 
-	def __init__(self, vertices=[Vector3(0,0,0), Vector3(0,0,0), Vector3(0,0,0)], normal=Vector3(0,0,0), mesh=None, data={}):
+	def __init__(self, vertices=[Vector3(0,0,0), Vector3(0,0,0), Vector3(0,0,0)], normal=None, mesh=None, data=None):
 		"""
 		`vertices` is the facet's vertices as a list of positive integer indexes or a list of instances of Vector3.
 			In the latter case, mesh must be specified.
-		`normal` is the facet's normal as an instance of Vector3 or as a positive integer index.
+		`normal` is the facet's normal as an instance of Vector3, or None to calculate it from the vertices when it is first needed.
 		`mesh` is the facet's parent mesh as an instance of MeshIV
-		`data` is a dictionary containing additional arbitrary data asociated with the facet
+		`data` is a dictionary containing additional arbitrary data asociated with the facet, which is copied
 		"""
 		self._normal = normal
 		self.mesh = mesh
-		self._data = data
+		self._data = {} if data is None else dict(data)
 		self.vertices = vertices
 
 	@property
@@ -254,6 +506,23 @@ class MeshFacetIV(MeshFacet):
 			else:
 				raise TypeError
 
+	def compute_normal(self):
+		"""Calculates the facet's unit normal from its vertices, following their winding, without storing it.
+		If the facet's `given_normal` data holds indexes into the parent mesh's `.meta['normals']`, as read from an OBJ file,
+		the normal is inverted to match their facing."""
+		given_normals = []
+		if self.mesh is not None and 'normals' in self.mesh.meta:
+			normals = self.mesh.meta['normals']
+			for normal in self.data().get('given_normal') or []:
+				if normal is not None and 0 <= normal < len(normals) and isinstance(normals[normal], Vector3):
+					given_normals.append(normals[normal])
+		return polygon_normal(self.vertices, given_normals)
+
+	@property
+	def vertex_indices(self):
+		"""The vertices of the facet as a list of integer indexes into the parent mesh's vertices."""
+		return self._vertices
+
 	def vertex(self, vertex_ind, value=None):
 		"""Fetches the vertex with index `vertex_ind` as a Vector3.
 		If `value` is not omited or None, sets the vertex to the new value before returning."""
@@ -271,17 +540,17 @@ class MeshFacetIV(MeshFacet):
 		"""Converts a facet which descends from MeshFacet but is of an arbitrary child class to the current child class."""
 		if mesh is None:
 			mesh = unknown_facet.mesh
-		return MeshFacetIV(unknown_facet.vertices, unknown_facet.normal, mesh, unknown_facet.data())
+		return MeshFacetIV(unknown_facet.vertices, unknown_facet._normal, mesh, unknown_facet.data())
 
 	def copy(self, mesh=None):
 		"""Creates a copy of the facet.
 		If `mesh` is provided, updates the facet's mesh and vertices to reference the new mesh."""
 		if mesh is None:
-			return MeshFacetIV(self._vertices, self.normal, self.mesh, self.data())
+			return MeshFacetIV(self._vertices, self._normal, self.mesh, self.data())
 		elif self.mesh is None:
-			return MeshFacetIV(self._vertices, self.normal, mesh, self.data())
+			return MeshFacetIV(self._vertices, self._normal, mesh, self.data())
 		else:
-			return MeshFacetIV(self._vertices, self.normal, self.mesh, self.data()).swap_mesh(mesh)
+			return MeshFacetIV(self._vertices, self._normal, self.mesh, self.data()).swap_mesh(mesh)
 
 	def add_vertex(self, vertex, ind=None):
 		"""Adds the vertex to the facet at the given index. If the index is omitted, adds the vertex to the end.
@@ -310,13 +579,15 @@ class MeshFacetIV(MeshFacet):
 
 	def remove_vertex(self, vertex_ind=None):
 		"""Removes the vertex whose index is specified by `vertex_ind` from the facet.
+		If no other facet of the mesh uses it, it is also removed from the mesh (see `MeshIV.remove_vertex`).
 		Returns the removed vertex as a Vector3."""
 		removed_vertex = self._vertices.pop(vertex_ind)
 		removed_vertex_pos = self.mesh.vertices[removed_vertex]
-		self.mesh.reverse_vertex_lookup[removed_vertex].remove(self)
-		if len(self.mesh.reverse_vertex_lookup[removed_vertex]) < 1:
-			self.mesh.reverse_vertex_lookup.pop(removed_vertex)
-			self.mesh.vertices.pop(removed_vertex)
+		lookup = self.mesh.reverse_vertex_lookup
+		if removed_vertex < len(lookup) and self in lookup[removed_vertex]:
+			lookup[removed_vertex].remove(self)
+			if len(lookup[removed_vertex]) < 1:
+				self.mesh.remove_vertex(removed_vertex)
 		return removed_vertex_pos
 
 	def swap_mesh(self, mesh):
@@ -332,22 +603,29 @@ class MeshFacetIV(MeshFacet):
 class MeshIV(Mesh):
 	"""A 3d mesh with facets with an "Indexed Vertices" format, meaning the vertices are stored as part of the mesh and the vertices contain indexes to them like in an OBJ file.
 	Iterable over its facets."""
-	def __init__(self, facets=[], meta={}, vertices=[]):
+
+	_lookup_stale = False
+
+	def __init__(self, facets=[], meta={}, vertices=None):
 		"""
 		`facets` is the mesh's facets a list of instances of MeshFacet.
 		`meta` is a dictionary containing arbitrary data related to the mesh.
+		`vertices` is an initial list of vertices to store in the mesh.
 		"""
+		if vertices is None:
+			vertices = []
 		self.vertices = vertices
 		self.reverse_vertex_lookup = []
 		for vertex in vertices:
 			self.reverse_vertex_lookup.append([])
 		self.meta = {}
+		self.attributes = FacetAttributes()
 		converted_facets = []
 		for facet in facets:
 			if isinstance(facet, MeshFacetIV):
-				converted_facets.append(facet.copy(self))
+				converted_facets.append(self._adopt_facet(facet.copy(self)))
 			elif isinstance(facet, MeshFacet):
-				converted_facets.append(MeshFacetIV.convert(facet, self))
+				converted_facets.append(self._adopt_facet(MeshFacetIV.convert(facet, self)))
 			else:
 				raise TypeError('MeshIV.__init__: First argument must be a list of instances of MeshFacet.')
 		self._facets = converted_facets
@@ -360,24 +638,121 @@ class MeshIV(Mesh):
 	def facets(self, new_value):
 		"""The facets of the mesh as a list of instances of MeshFacet."""
 		self._facets = []
+		self._dead_count = 0
 		for facet in new_value:
 			if isinstance(facet, MeshFacetIV):
-				self._facets.append(facet.copy(self))
+				self._facets.append(self._adopt_facet(facet.copy(self)))
 			else:
-				self._facets.append(MeshFacetIV.convert(facet, self))
+				self._facets.append(self._adopt_facet(MeshFacetIV.convert(facet, self)))
 
 	def facet(self, facet_ind, new_value=None):
 		"""Fetches a single facet referred to by its index, `facet_ind`, as a MeshFacet.
 		If `value` is not omited or None, sets the facet to the new value before returning."""
 		if new_value is not None:
 			if isinstance(new_value, MeshFacetIV):
-				self._facets[facet_ind] = new_value.copy(self)
+				self._set_slot(facet_ind, self._adopt_facet(new_value.copy(self)))
 			else:
-				self._facets[facet_ind] = MeshFacetIV.convert(new_value, self)
+				self._set_slot(facet_ind, self._adopt_facet(MeshFacetIV.convert(new_value, self)))
 		return self._facets[facet_ind]
 
 	def add_facet(self, new_facet, facet_ind=None):
 		"""Inserts the facet given by `new_facet` at the given index, `facet_ind`. If the index is omitted, adds it to the end."""
 		if isinstance(new_facet, MeshFacetIV):
 			return super().add_facet(new_facet.copy(self), facet_ind)
-		return super().add_facet(MeshFacetIV.convert(new_facet, self), facet_ind)
\ No newline at end of file
+		return super().add_facet(MeshFacetIV.convert(new_facet, self), facet_ind)
+
+	def extend_indexed(self, offsets, indices, channels=None):
+		"""Appends facets given as flat arrays of vertex indexes in one step, which is much faster than adding them one at a time.
+		Facet `i` uses the vertex indexes `indices[offsets[i]:offsets[i + 1]]`, so `offsets` holds one more value than there are facets.
+		`channels` optionally maps attribute names to instances of AttributeChannel holding the facets' data (see `FacetAttributes.add_rows`).
+		The facets' normals are calculated when first needed."""
+		facet_count = len(offsets) - 1
+		first_row = self.attributes.add_rows(facet_count, channels)
+		self._lookup_stale = True
+		facets = self._facets
+		for facet_ind in range(facet_count):
+			facet = MeshFacetIV(indices[offsets[facet_ind]:offsets[facet_ind + 1]].tolist(), None, self)
+			facet._data = first_row + facet_ind
+			facets.append(facet)
+
+	def _transform_vertices(self, transform_point):
+		"""Replaces every vertex of the mesh with the result of `transform_point`."""
+		vertices = self.vertices
+		for vertex_ind in range(len(vertices)):
+			if vertices[vertex_ind] is not None:
+				vertices[vertex_ind] = transform_point(vertices[vertex_ind])
+
+	def remove_vertex(self, vertex_ind):
+		"""Removes the vertex at the given index from the mesh and returns it as a Vector3.
+		Its slot in `.vertices` is set to None, so the indexes of the other vertices do not change until `compact` is called.
+		The facets using it are removed along with it in constant time each (see `Mesh.remove_facet`), so iteration and measurement skip them."""
+		vertex = self.vertices[vertex_ind]
+		if vertex is None:
+			raise IndexError(f'MeshIV.remove_vertex: Vertex {vertex_ind} has already been removed.')
+		lookup = self._vertex_lookup()
+		for facet in list(lookup[vertex_ind]):
+			self.remove_facet(self._facet_slot(facet))
+		self.vertices[vertex_ind] = None
+		lookup[vertex_ind] = []
+		return vertex
+
+	def _vertex_lookup(self):
+		"""Returns `.reverse_vertex_lookup`, first rebuilding it in a single pass if facets or vertices were added without updating it,
+		such as by `extend_indexed` or the parsers."""
+		if self._lookup_stale or len(self.reverse_vertex_lookup) != len(self.vertices):
+			lookup = [[] for _ in self.vertices]
+			for facet in self:
+				for vertex_ind in set(facet._vertices):
+					lookup[vertex_ind].append(facet)
+			self.reverse_vertex_lookup = lookup
+			self._lookup_stale = False
+		return self.reverse_vertex_lookup
+
+	def _facet_slot(self, facet):
+		"""Returns the index of the slot holding the given facet. Facets' attribute rows match their slots unless facets were inserted or
+		replaced since the mesh was built or compacted, so the slot is only searched for otherwise."""
+		facets = self._facets
+		if facet._data < len(facets) and facets[facet._data] is facet:
+			return facet._data
+		return next(facet_ind for facet_ind, other in enumerate(facets) if other is facet)
+
+	def _release_facet(self, facet):
+		"""Detaches a facet leaving the mesh and removes it from the reverse vertex lookup."""
+		lookup = self.reverse_vertex_lookup
+		for vertex_ind in facet._vertices:
+			if vertex_ind < len(lookup) and facet in lookup[vertex_ind]:
+				lookup[vertex_ind].remove(facet)
+		super()._release_facet(facet)
+
+	def _compact_vertices(self):
+		"""Drops removed vertices and renumbers the rest, along with the vertex indexes in `.meta['color_data']` and `.meta['lines']`."""
+		vertex_map = array('l', [-1]) * len(self.vertices)
+		vertices = []
+		for vertex_ind, vertex in enumerate(self.vertices):
+			if vertex is not None:
+				vertex_map[vertex_ind] = len(vertices)
+				vertices.append(vertex)
+		self.vertices = vertices
+		if 'color_data' in self.meta:
+			self.meta['color_data'] = {vertex_map[vertex_ind]: color for vertex_ind, color in self.meta['color_data'].items() if vertex_map[vertex_ind] >= 0}
+		if 'lines' in self.meta:
+			lines = []
+			for line in self.meta['lines']:
+				if all(type(vertex_ind) is int for vertex_ind in line):
+					line = [vertex_map[vertex_ind] for vertex_ind in line if vertex_map[vertex_ind] >= 0]
+				lines.append(line)
+			self.meta['lines'] = lines
+		return vertex_map
+
+	def compact(self):
+		"""Drops removed facets and vertices in a single pass, renumbering the vertex indexes of the remaining facets.
+		Facets which still use a removed vertex are removed as well.
+		Returns a tuple `(facet_map, vertex_map)` of `array('l')` instances mapping each old index to its new index, or -1 if it was removed."""
+		old_lookup = self.reverse_vertex_lookup
+		facet_map, vertex_map = super().compact()
+		live_facets = set(map(id, self._facets))
+		self.reverse_vertex_lookup = [[] for _ in self.vertices]
+		for vertex_ind, facets in enumerate(old_lookup[:len(vertex_map)]):
+			if vertex_map[vertex_ind] >= 0:
+				self.reverse_vertex_lookup[vertex_map[vertex_ind]] = [facet for facet in facets if id(facet) in live_facets]
+		return facet_map, vertex_map
@@ -1,9 +1,25 @@
 import sys
+import os
+import re
 import math
+import queue
+import random
+import statistics
+import threading
+import time
+from array import array
+from heapq import heappush, heappop
+from struct import unpack, iter_unpack, error as StructError
 from vector3 import Vector3
-from mesh import MeshFacet, Mesh
-from parse_stl import parse_stl
-from parse_obj import parse_obj
+from mesh import MeshFacet, Mesh, MeshIV
+from parse_stl import BIN_STL_TRIANGLE, parse_stl, is_text_stl, bin_stl_facet_count, sample_bin_stl, iter_txt_stl_facets
+from parse_obj import LABEL_NAMES, parse_obj, iter_obj_facet_chunks, parse_obj_vertex, parse_obj_normal, parse_face_entry, resolve_obj_chunk
+from footprint import CATEGORIES, mesh_memory, estimate_file_memory
+from hull import measure_hull
+from winding import measure_winding_volume
+from deviation import compare_meshes
+from frozen import FrozenMesh
+from progress import track, tracked, UPDATE_EVERY
 
 def face_tetrahedron_volume(n, v1, v2, v3):
 	"""Returns the volume of a tetrahedron whose vertices are at the origin, v1, v2, and v3.
@@ -48,127 +64,844 @@ def triangle_area(p1, p2, p3):
 	return (p2 - p1).cross(p3 - p1).mag()/2
 
 def polygon_area(vertices):
-	"""Returns the volume of a pyramid whose base is defined by the given shape and whose tip is at the origin.
-	If the face's normal is pointing towards the origin, the face represents a concave region and is negative."""
+	"""Returns the area of a planar polygon given by its vertices in order.
+	The area is half the magnitude of the polygon's vector area, so concave polygons are measured correctly."""
 	vertex_count = len(vertices)
 	if vertex_count < 3:
 		return 0
 	elif vertex_count == 3:
 		return triangle_area(vertices[0], vertices[1], vertices[2])
 	else:
-		for vertex in vertices:
-			mid_point += vertex
-		mid_point /= vertex_count
-
-		majority_concavity = 0
-		volume = 0
+		vector_area = Vector3(0,0,0)
 		for v1, v2 in zip(vertices, vertices[1:] + [vertices[0]]):
-			concavity_sign = 1 if (v1 - mid_point).cross(v2 - mid_point).dot(mid_point) >= 0 else -1
-			# Here, `concavity_sign` measures the 2d concavity of the segment of the face, representing a cutout/overhang in the face's shape.
-			majority_concavity += concavity_sign
-			area += triangle_area(mid_point, v1, v2) * concavity_sign
-		# If the majority of the face's segments were determined to be concave, the face's vertices were actually ordered in the wrong direction
-		# and the concavity is inverted.
-		if majority_concavity < 0:
-			area *= -1
-		return area
+			vector_area += v1.cross(v2)
+		return vector_area.mag()/2
+
+def stratified_indices(facet_count, sample_count, rng):
+	"""Splits the facet indexes 0 to `facet_count - 1` into `sample_count` equally sized consecutive strata and picks one random index from each.
+	Returns the picked indexes in ascending order. If `sample_count` is at least `facet_count`, every index is returned."""
+	if sample_count >= facet_count:
+		return list(range(facet_count))
+	indices = []
+	for stratum in range(sample_count):
+		start = stratum * facet_count // sample_count
+		end = (stratum + 1) * facet_count // sample_count
+		indices.append(rng.randrange(start, end))
+	return indices
+
+def estimate_measurements(facet_count, sampled_facets, volume=False, area=False, length=False, confidence=0.95, deadline=None):
+	"""Estimates the total volume and/or area of a mesh with `facet_count` facets from an iterable of sampled facets.
+	Returns a dictionary using the same keys as `measure_mesh`, plus `volume_error` and `area_error` giving the half-width of the confidence interval
+	at the given `confidence` level, along with `approximate` and `sample_count`.
+	The interval treats the sample as a simple random sample, which is conservative for stratified samples.
+	The lengths are those of the sampled facets only and are therefore lower bounds.
+	If `deadline`, a `time.monotonic()` value, is given, sampling stops once it has passed and at least two facets have been measured."""
+	volume_values = []
+	area_values = []
+	minimums = [math.inf] * 3
+	maximums = [-math.inf] * 3
+	sample_total = 0
+	for face in sampled_facets:
+		sample_total += 1
+		if volume:
+			volume_values.append(face_pyramid_volume(face))
+		if area:
+			area_values.append(polygon_area(face.vertices))
+		if length:
+			for vertex in face:
+				for axis, value in enumerate((vertex.x, vertex.y, vertex.z)):
+					if value < minimums[axis]:
+						minimums[axis] = value
+					if value > maximums[axis]:
+						maximums[axis] = value
+		if deadline is not None and sample_total >= 2 and time.monotonic() >= deadline:
+			break
+
+	z_score = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+	def estimate_total(values):
+		if sample_total == 0:
+			return 0, 0
+		total = facet_count * statistics.fmean(values)
+		if sample_total < 2:
+			return total, math.inf
+		# The finite population correction shrinks the interval to nothing once every facet is sampled.
+		error = z_score * facet_count * math.sqrt(statistics.variance(values) / sample_total * max(0, 1 - sample_total / facet_count))
+		return total, error
+
+	results = {'approximate': True, 'sample_count': sample_total, 'confidence': confidence}
+	if volume:
+		volume_total, results['volume_error'] = estimate_total(volume_values)
+		results['volume'] = abs(volume_total) # If all the normals were flipped, the volume would be negative but otherwise accurate.
+	if area:
+		results['area'], results['area_error'] = estimate_total(area_values)
+	if length:
+		results['x_length'] = max(0, maximums[0] - minimums[0])
+		results['y_length'] = max(0, maximums[1] - minimums[1])
+		results['z_length'] = max(0, maximums[2] - minimums[2])
+	return results
 
-def measure_mesh(mesh, volume=False, area=False, length=False):
+def measure_mesh(mesh, volume=False, area=False, length=False, approximate=False, sample_count=10000, confidence=0.95, time_budget=None, seed=None, reuse=False, hull=False, progress=None, token=None, group_by=None, robust=False, resolution=32):
 	"""Iterates through the faces of a closed shape define by the given mesh and calculates the total volume, area, and/or lengths in the cardinal axies.
-	Non-closed or self-intersecting shapes may give unexpected volumes."""
+	Non-closed or self-intersecting shapes may give unexpected volumes.
+	If `approximate` is set, only `sample_count` facets, one from each equally sized range of facets, are measured and the totals are estimated
+	as described by `estimate_measurements`. `time_budget` limits the sampling to the given number of seconds and `seed` seeds the random sampling.
+	If `reuse` is set, exact measurements already stored in `.meta`, such as those kept up to date by `Mesh.transform`, are not measured again.
+	If `hull` is set, the volume and area of the mesh's convex hull are also stored as `hull_volume` and `hull_area` (see `measure_hull`).
+	They are always exact. The vertices of meshes other than MeshIV are deduplicated first, since each is repeated by every facet using it.
+	If `robust` is set, the volume found from the mesh's generalized winding numbers on a grid `resolution` cells across is also stored as
+	`robust_volume` (see `winding_volume`), which unlike `volume` is meaningful for open or self-intersecting meshes.
+	Exact measurements of a FrozenMesh are read from its flat arrays by `measure_frozen`.
+	If a `progress` callback is given, it is called with a Progress counting the facets measured at most twice a second, and if a CancelToken
+	is given as `token`, it is checked every few thousand facets and raises Cancelled once cancelled, leaving `.meta` unchanged.
+	If `group_by` is given as a list of facet data keys, such as `('object', 'group', 'material')` read by `parse_obj`, the facets are also
+	grouped by each key as described by `group_labels`, and every group of every key is measured in the same pass as the whole mesh.
+	`.meta['grouped'][key]` then maps the name of each group to its measurements as described by `measure_labeled`. Groups are always measured
+	exactly and are measured again even if `reuse` is set."""
 	if not isinstance(mesh, Mesh):
 		raise TypeError('measure_mesh: Argument must be an instance of Mesh.')
-	volume_total = 0
-	area_total = 0
-	minimums = {'x':math.inf,'y':math.inf,'z':math.inf}
-	maximums = {'x':0,'y':0,'z':0}
+	if group_by and approximate:
+		raise ValueError('measure_mesh: Groups cannot be measured approximately.')
+	if reuse:
+		hull = hull and not ('hull_volume' in mesh.meta and 'hull_area' in mesh.meta)
+	if hull:
+		mesh.meta.update(measure_hull(mesh, dedupe=not isinstance(mesh, (MeshIV, FrozenMesh))))
+	if reuse:
+		robust = robust and mesh.meta.get('robust_resolution') != resolution
+	if robust:
+		mesh.meta.update(measure_winding_volume(mesh, resolution))
+	if reuse and not group_by and not approximate and not mesh.meta.get('approximate'):
+		volume = volume and 'volume' not in mesh.meta
+		area = area and 'area' not in mesh.meta
+		length = length and not all(key in mesh.meta for key in ('x_length', 'y_length', 'z_length', 'bounds'))
+		if not (volume or area or length):
+			return
+	if approximate:
+		deadline = None if time_budget is None else time.monotonic() + time_budget
+		rng = random.Random(seed)
+		# Slots left empty by removed facets are sampled but skipped.
+		indices = stratified_indices(mesh.slot_count, sample_count, rng)
+		if deadline is not None:
+			rng.shuffle(indices) # Sample the strata in random order so that stopping early still leaves an unbiased sample.
+		sampled_facets = (mesh.facet(i) for i in indices if mesh.facet(i) is not None)
+		tracker = track(progress, token, len(indices), 'facets')
+		measurements = estimate_measurements(len(mesh), tracked(sampled_facets, tracker), volume, area, length, confidence, deadline)
+		if tracker is not None:
+			tracker.finish()
+		mesh.meta.update(measurements)
+		return
+	tracker = track(progress, token, len(mesh), 'facets')
+	grouped = {}
+	if group_by:
+		if volume:
+			mesh.compute_normals()
+		groupings = [group_labels(mesh, data_key) for data_key in group_by]
+		labelings = [(labels, len(names)) for labels, names in groupings]
+		# The whole mesh is measured in the same pass as one more labeling with a single label.
+		labelings.append((array('l', bytes(array('l').itemsize * len(mesh))), 1))
+		label_totals = measure_labelings(tracked(mesh, tracker), labelings, volume, area, length)
+		totals = label_totals.pop()[0]
+		for data_key, (labels, names), group_totals in zip(group_by, groupings, label_totals):
+			grouped[data_key] = {name: finish_labeled(name_totals, volume, area, length) for name, name_totals in zip(names, group_totals)}
+	elif isinstance(mesh, FrozenMesh):
+		# The flat arrays are measured in a single pass, so the token is only checked before it.
+		if tracker is not None:
+			tracker.update(0)
+		totals = measure_frozen(mesh, volume, area, length)
+	else:
+		if volume:
+			mesh.compute_normals() # Only volumes need normals. Calculating the missing ones in bulk is cheaper than one at a time.
+		totals = measure_facets(tracked(mesh, tracker), volume, area, length)
+	if tracker is not None:
+		tracker.finish()
+	for key in ('approximate', 'sample_count', 'confidence', 'volume_error', 'area_error'):
+		mesh.meta.pop(key, None)
+	mesh.meta.update(finish_measurements(totals, volume, area, length))
+	if grouped:
+		mesh.meta.setdefault('grouped', {}).update(grouped)
+
+def measure_facets(facets, volume=False, area=False, length=False, totals=None):
+	"""Accumulates the volume, area, and/or bounds of an iterable of facets, such as a mesh or a chunk of one, into running totals.
+	`totals` is a dictionary returned by an earlier call, which is updated and returned, or None to start new totals.
+	Pass the final totals to `finish_measurements` to obtain the measurements."""
+	if totals is None:
+		totals = {'facet_count': 0, 'volume_total': 0, 'area_total': 0, 'minimums': [math.inf] * 3, 'maximums': [-math.inf] * 3}
+	volume_total = totals['volume_total']
+	area_total = totals['area_total']
+	minimums = totals['minimums']
+	maximums = totals['maximums']
+	facet_count = 0
 
-	for face in mesh:
+	for face in facets:
+		facet_count += 1
+		vertices = face.vertices
+		if len(vertices) == 3:
+			# Triangles are measured with the arithmetic inlined, as in `measure_triangles`, but with the facet's normal deciding the sign.
+			v1, v2, v3 = vertices
+			x1, y1, z1 = v1.x, v1.y, v1.z
+			x2, y2, z2 = v2.x, v2.y, v2.z
+			x3, y3, z3 = v3.x, v3.y, v3.z
+			if volume:
+				normal = face.normal
+				tetrahedron = abs(x1 * (y2 * z3 - z2 * y3) - y1 * (x2 * z3 - z2 * x3) + z1 * (x2 * y3 - y2 * x3)) / 6
+				if x1 * normal.x + y1 * normal.y + z1 * normal.z >= 0:
+					volume_total += tetrahedron
+				else:
+					volume_total -= tetrahedron
+			if area:
+				ux, uy, uz = x2 - x1, y2 - y1, z2 - z1
+				wx, wy, wz = x3 - x1, y3 - y1, z3 - z1
+				cx, cy, cz = uy * wz - uz * wy, uz * wx - ux * wz, ux * wy - uy * wx
+				area_total += math.sqrt(cx * cx + cy * cy + cz * cz) / 2
+			if length:
+				for axis, low, high in ((0, min(x1, x2, x3), max(x1, x2, x3)), (1, min(y1, y2, y3), max(y1, y2, y3)), (2, min(z1, z2, z3), max(z1, z2, z3))):
+					if low < minimums[axis]:
+						minimums[axis] = low
+					if high > maximums[axis]:
+						maximums[axis] = high
+			continue
 		if volume:
 			volume_total += face_pyramid_volume(face)
 		if area:
-			area_total += polygon_area(face.vertices)
+			area_total += polygon_area(vertices)
 		if length:
-			for vertex in face:
-				for value, axis in vertex:
+			for vertex in vertices:
+				for axis, value in enumerate((vertex.x, vertex.y, vertex.z)):
 					if value < minimums[axis]:
 						minimums[axis] = value
 					if value > maximums[axis]:
 						maximums[axis] = value
 
+	totals['facet_count'] += facet_count
+	totals['volume_total'] = volume_total
+	totals['area_total'] = area_total
+	return totals
+
+def measure_triangles(triangles, volume=False, area=False, length=False, totals=None):
+	"""Accumulates the volume, area, and/or bounds of an iterable of triangles into running totals like `measure_facets`, without creating
+	any objects for the triangles. This is the fast path used wherever a mesh is known to hold only triangles.
+	Each triangle is a tuple of the nine coordinates of its vertices, wound counterclockwise when seen from outside, as yielded by
+	`struct.iter_unpack('<9d', coords)` for a flat `array('d')` of coordinates or by `struct.iter_unpack(BIN_STL_TRIANGLE, facets_bin)`
+	for the facets of a binary STL file, whose normals are skipped."""
+	if totals is None:
+		totals = {'facet_count': 0, 'volume_total': 0, 'area_total': 0, 'minimums': [math.inf] * 3, 'maximums': [-math.inf] * 3}
+	volume_total = 0
+	area_total = 0
+	min_x, min_y, min_z = totals['minimums']
+	max_x, max_y, max_z = totals['maximums']
+	facet_count = 0
+	sqrt = math.sqrt
+
+	for x1, y1, z1, x2, y2, z2, x3, y3, z3 in triangles:
+		facet_count += 1
+		if volume:
+			# With the normal following the winding, the signed volume of `face_tetrahedron_volume` is the triple product.
+			volume_total += x1 * (y2 * z3 - z2 * y3) - y1 * (x2 * z3 - z2 * x3) + z1 * (x2 * y3 - y2 * x3)
+		if area:
+			ux, uy, uz = x2 - x1, y2 - y1, z2 - z1
+			vx, vy, vz = x3 - x1, y3 - y1, z3 - z1
+			cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+			area_total += sqrt(cx * cx + cy * cy + cz * cz)
+		if length:
+			if x1 < min_x: min_x = x1
+			if x1 > max_x: max_x = x1
+			if y1 < min_y: min_y = y1
+			if y1 > max_y: max_y = y1
+			if z1 < min_z: min_z = z1
+			if z1 > max_z: max_z = z1
+			if x2 < min_x: min_x = x2
+			if x2 > max_x: max_x = x2
+			if y2 < min_y: min_y = y2
+			if y2 > max_y: max_y = y2
+			if z2 < min_z: min_z = z2
+			if z2 > max_z: max_z = z2
+			if x3 < min_x: min_x = x3
+			if x3 > max_x: max_x = x3
+			if y3 < min_y: min_y = y3
+			if y3 > max_y: max_y = y3
+			if z3 < min_z: min_z = z3
+			if z3 > max_z: max_z = z3
+
+	totals['facet_count'] += facet_count
+	totals['volume_total'] += volume_total / 6
+	totals['area_total'] += area_total / 2
+	totals['minimums'] = [min_x, min_y, min_z]
+	totals['maximums'] = [max_x, max_y, max_z]
+	return totals
+
+def measure_frozen(frozen, volume=False, area=False, length=False, totals=None):
+	"""Accumulates the volume, area, and/or bounds of a FrozenMesh into running totals like `measure_facets`, reading its flat arrays directly.
+	Triangles are measured without creating any objects. Facets with more vertices are built and measured like those of any other mesh."""
+	if totals is None:
+		totals = {'facet_count': 0, 'volume_total': 0, 'area_total': 0, 'minimums': [math.inf] * 3, 'maximums': [-math.inf] * 3}
+	vertices, normals, offsets, corners = frozen.vertices, frozen.normals, frozen.offsets, frozen.corners
+	facet_count = len(frozen)
+	volume_total = totals['volume_total']
+	area_total = totals['area_total']
+
+	if volume or area:
+		for facet_ind in range(facet_count):
+			start = offsets[facet_ind]
+			if offsets[facet_ind + 1] - start != 3:
+				face = frozen.facet(facet_ind)
+				if volume:
+					volume_total += face_pyramid_volume(face)
+				if area:
+					area_total += polygon_area(face.vertices)
+				continue
+			p, q, r = 3 * corners[start], 3 * corners[start + 1], 3 * corners[start + 2]
+			x1, y1, z1 = vertices[p], vertices[p + 1], vertices[p + 2]
+			x2, y2, z2 = vertices[q], vertices[q + 1], vertices[q + 2]
+			x3, y3, z3 = vertices[r], vertices[r + 1], vertices[r + 2]
+			if volume:
+				# The same as `face_tetrahedron_volume`.
+				n = 3 * facet_ind
+				tetrahedron = abs(x1 * (y2 * z3 - z2 * y3) - y1 * (x2 * z3 - z2 * x3) + z1 * (x2 * y3 - y2 * x3)) / 6
+				if x1 * normals[n] + y1 * normals[n + 1] + z1 * normals[n + 2] >= 0:
+					volume_total += tetrahedron
+				else:
+					volume_total -= tetrahedron
+			if area:
+				ux, uy, uz = x2 - x1, y2 - y1, z2 - z1
+				vx, vy, vz = x3 - x1, y3 - y1, z3 - z1
+				cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+				area_total += math.sqrt(cx * cx + cy * cy + cz * cz) / 2
+	if length and len(corners) > 0:
+		# Only vertices used by a facet count, so each axis is taken over the used vertex indexes.
+		used = dict.fromkeys(corners)
+		for axis in range(3):
+			values = [vertices[3 * vertex_ind + axis] for vertex_ind in used]
+			totals['minimums'][axis] = min(totals['minimums'][axis], min(values))
+			totals['maximums'][axis] = max(totals['maximums'][axis], max(values))
+
+	totals['facet_count'] += facet_count
+	totals['volume_total'] = volume_total
+	totals['area_total'] = area_total
+	return totals
+
+def finish_measurements(totals, volume=False, area=False, length=False):
+	"""Converts running totals from `measure_facets` into a dictionary of measurements using the keys `measure_mesh` stores in `mesh.meta`."""
+	measurements = {}
 	if volume:
-		mesh.meta['volume'] = abs(volume_total) # If all the normals were flipped, the volume would be negative but otherwise accurate.
+		measurements['volume'] = abs(totals['volume_total']) # If all the normals were flipped, the volume would be negative but otherwise accurate.
 	if area:
-		mesh.meta['area'] = area_total
+		measurements['area'] = totals['area_total']
 	if length:
-		mesh.meta['x_length'] = maximums['x'] - minimums['x']
-		mesh.meta['y_length'] = maximums['y'] - minimums['y']
-		mesh.meta['z_length'] = maximums['z'] - minimums['z']
+		minimums = totals['minimums']
+		maximums = totals['maximums']
+		measurements['x_length'] = max(0, maximums[0] - minimums[0])
+		measurements['y_length'] = max(0, maximums[1] - minimums[1])
+		measurements['z_length'] = max(0, maximums[2] - minimums[2])
+		measurements['bounds'] = (tuple(minimums), tuple(maximums))
+	return measurements
+
+def merge_totals(totals, other_totals):
+	"""Adds the running totals `other_totals` from `measure_facets` into `totals` and returns `totals`."""
+	totals['facet_count'] += other_totals['facet_count']
+	totals['volume_total'] += other_totals['volume_total']
+	totals['area_total'] += other_totals['area_total']
+	for axis in range(3):
+		totals['minimums'][axis] = min(totals['minimums'][axis], other_totals['minimums'][axis])
+		totals['maximums'][axis] = max(totals['maximums'][axis], other_totals['maximums'][axis])
+	return totals
+
+def measure_bin_stl(file_path, volume=False, area=False, length=False, chunk_size=65536, progress=None, token=None):
+	"""Measures a binary STL file with `measure_triangles` while reading it in chunks of `chunk_size` facets, without building a Mesh.
+	The normals stored in the file are ignored, as `parse_stl` does by default.
+	`progress` and `token` report the bytes read and cancel between chunks as for `parse_stl`.
+	Returns a dictionary of measurements using the keys `measure_mesh` stores in `mesh.meta`, plus `facet_count`."""
+	totals = None
+	try:
+		with open(file_path, 'rb') as fp:
+			fp.read(80)
+			remaining = unpack('<I', fp.read(4))[0]
+			tracker = track(progress, token, 84 + 50 * remaining)
+			totals = measure_triangles([], volume, area, length)
+			while remaining > 0:
+				if tracker is not None:
+					tracker.update(fp.tell())
+				facets_bin = fp.read(50 * min(chunk_size, remaining))
+				if len(facets_bin) < 50:
+					raise EOFError(f'measure_bin_stl: Reached end-of-file before reading the provided number of facets in "{file_path}". File may be malformed.')
+				facets_bin = facets_bin[:len(facets_bin) - len(facets_bin) % 50]
+				remaining -= len(facets_bin) // 50
+				measure_triangles(iter_unpack(BIN_STL_TRIANGLE, facets_bin), volume, area, length, totals)
+			if tracker is not None:
+				tracker.finish(fp.tell())
+	except FileNotFoundError:
+		raise FileNotFoundError(f'measure_bin_stl: Failed to locate file "{file_path}" in the current directory.')
+	except StructError:
+		raise StructError(f'measure_bin_stl: Failed to unpack facet in "{file_path}". File may be malformed.')
+	measurements = finish_measurements(totals, volume, area, length)
+	measurements['facet_count'] = totals['facet_count']
+	return measurements
+
+def measure_file_pipelined(file_path, volume=False, area=False, length=False, workers=1, chunk_size=4096, queue_size=4, progress=None, token=None):
+	"""Measures the mesh in an .stl or .obj file while it is being read, without building a Mesh.
+	A reader thread reads raw chunks of about `chunk_size` facets into a queue holding at most `queue_size` chunks, blocking when it is full,
+	while `workers` compute threads decode the chunks and reduce them with `measure_facets`, or `measure_triangles` for binary STL files, at the same time.
+	Disk reads release the interpreter lock, so reading overlaps with decoding and geometry and memory stays bounded by the queue.
+	For OBJ files, the reader also parses the vertex and vertex normal elements, since faces refer to them by index.
+	`progress` and `token` report the bytes read and cancel between chunks as for `parse_stl`. The callback is called from the reader thread.
+	Returns a dictionary of measurements using the keys `measure_mesh` stores in `mesh.meta`, plus `facet_count`."""
+	extension = file_path.split('.')[-1]
+	if extension not in ('stl', 'obj'):
+		raise ValueError(f'measure_file_pipelined: Unsupported file format "{extension}".')
+	is_binary = extension == 'stl' and not is_text_stl(file_path)
+	chunks = queue.Queue(maxsize=queue_size)
+	stop = threading.Event()
+	errors = []
+	vertices = []
+	normals = []
+
+	def put(chunk):
+		# Waits for room in the queue, giving up if another thread has failed.
+		while not stop.is_set():
+			try:
+				chunks.put(chunk, timeout=0.1)
+				return True
+			except queue.Full:
+				continue
+		return False
+
+	def read():
+		try:
+			tracker = track(progress, token, os.path.getsize(file_path))
+			if is_binary:
+				with open(file_path, 'rb') as fp:
+					fp.read(80)
+					remaining = unpack('<I', fp.read(4))[0]
+					while remaining > 0:
+						facets_bin = fp.read(50 * min(chunk_size, remaining))
+						if not facets_bin:
+							raise EOFError(f'measure_file_pipelined: Reached end-of-file before reading the provided number of facets in "{file_path}". File may be malformed.')
+						remaining -= len(facets_bin) // 50
+						if tracker is not None:
+							tracker.update(fp.tell())
+						if not put(('bin', facets_bin)):
+							return
+			elif extension == 'stl':
+				with open(file_path, 'rt') as fp:
+					fp.readline()
+					lines = []
+					facet_count = 0
+					for line_ind, line in enumerate(fp):
+						if tracker is not None and line_ind % UPDATE_EVERY == 0:
+							tracker.update(fp.buffer.tell())
+						lines.append(line)
+						if 'endfacet' in line:
+							facet_count += 1
+							if facet_count >= chunk_size:
+								if not put(('txt', lines)):
+									return
+								lines = []
+								facet_count = 0
+					if lines and not put(('txt', lines)):
+						return
+			else:
+				ptn_arg_split = re.compile(r'\s+')
+				with open(file_path, 'rt') as fp:
+					faces = []
+					for line_ind, line in enumerate(fp):
+						if tracker is not None and line_ind % UPDATE_EVERY == 0:
+							tracker.update(fp.buffer.tell())
+						if not line.startswith('v') and not line.startswith('f'):
+							continue
+						entry = ptn_arg_split.split(line.strip())
+						if entry[0] == 'f':
+							faces.append(entry)
+							if len(faces) < chunk_size:
+								continue
+						elif entry[0] not in ('v', 'vn'):
+							continue
+						# Every face in a chunk is read with the same vertex and normal counts, so relative indexes resolve correctly.
+						if faces and not put(('obj', (faces, len(vertices), len(normals)))):
+							return
+						faces = []
+						if entry[0] == 'v':
+							vertices.append(parse_obj_vertex(entry))
+						elif entry[0] == 'vn':
+							normals.append(parse_obj_normal(entry))
+					if faces and not put(('obj', (faces, len(vertices), len(normals)))):
+						return
+		except Exception as error:
+			errors.append(error)
+			stop.set()
+		finally:
+			for _ in range(workers):
+				chunks.put(None)
+
+	def compute(totals):
+		while True:
+			chunk = chunks.get()
+			if chunk is None:
+				return
+			if stop.is_set():
+				continue # Keep draining so the reader is never left blocked.
+			try:
+				kind, data = chunk
+				if kind == 'bin':
+					# Binary facets are always triangles, so they skip facet objects entirely.
+					measure_triangles(iter_unpack(BIN_STL_TRIANGLE, data), volume, area, length, totals)
+					continue
+				elif kind == 'txt':
+					facets = iter_txt_stl_facets(data)
+				else:
+					faces, vertex_count, normal_count = data
+					parsed_faces = []
+					for entry in faces:
+						vertex_ind, _, normal_ind = parse_face_entry(entry, vertex_count, 0, normal_count)
+						parsed_faces.append((vertex_ind, normal_ind))
+					facets = resolve_obj_chunk(parsed_faces, vertices, normals)
+				measure_facets(facets, volume, area, length, totals)
+			except Exception as error:
+				errors.append(error)
+				stop.set()
+
+	worker_totals = [measure_facets([]) for _ in range(workers)]
+	threads = [threading.Thread(target=read, daemon=True)]
+	threads += [threading.Thread(target=compute, args=(totals,), daemon=True) for totals in worker_totals]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	if errors:
+		raise errors[0]
+
+	totals = measure_facets([])
+	for other_totals in worker_totals:
+		merge_totals(totals, other_totals)
+	measurements = finish_measurements(totals, volume, area, length)
+	measurements['facet_count'] = totals['facet_count']
+	return measurements
+
+def measure_obj_out_of_core(file_path, volume=False, area=False, length=False, chunk_size=65536, scratch_dir=None):
+	"""Measures the mesh in an OBJ file without holding its vertices in memory, as described by `iter_obj_facet_chunks`.
+	Returns a dictionary of measurements using the keys `measure_mesh` stores in `mesh.meta`, plus `facet_count`."""
+	totals = None
+	for chunk in iter_obj_facet_chunks(file_path, chunk_size, scratch_dir):
+		totals = measure_facets(chunk, volume, area, length, totals)
+	if totals is None:
+		totals = measure_facets([])
+	measurements = finish_measurements(totals, volume, area, length)
+	measurements['facet_count'] = totals['facet_count']
+	return measurements
+
+def measure_labeled(mesh, labels, label_count, volume=False, area=False, length=False):
+	"""Measures every labeled part of the given mesh in a single pass over its faces.
+	`labels` holds a label between 0 and `label_count - 1` for each facet of the mesh, or a negative value to skip the facet.
+	Returns a list with one dictionary of measurements per label, using the same keys as `measure_mesh` stores in `mesh.meta`,
+	plus `facet_count`."""
+	if not isinstance(mesh, Mesh):
+		raise TypeError('measure_labeled: Argument must be an instance of Mesh.')
+	label_totals = measure_labelings(mesh, [(labels, label_count)], volume, area, length)[0]
+	return [finish_labeled(totals, volume, area, length) for totals in label_totals]
+
+def measure_labelings(facets, labelings, volume=False, area=False, length=False):
+	"""Measures the labeled parts of an iterable of facets under several labelings at once, in a single pass over the facets.
+	`labelings` is a list of `(labels, label_count)` tuples as taken by `measure_labeled`. Each facet is measured once and its measurements are
+	added to the running totals of its label in every labeling.
+	Returns a list holding, for each labeling, a list of running totals in the form returned by `measure_facets`, one per label."""
+	label_totals = [
+		[{'facet_count': 0, 'volume_total': 0, 'area_total': 0, 'minimums': [math.inf] * 3, 'maximums': [-math.inf] * 3} for _ in range(label_count)]
+		for labels, label_count in labelings
+	]
+	facet_volume = facet_area = 0
+	for facet_ind, face in enumerate(facets):
+		vertices = face.vertices
+		if len(vertices) == 3:
+			# Triangles are measured with the arithmetic inlined, as in `measure_facets`.
+			v1, v2, v3 = vertices
+			x1, y1, z1 = v1.x, v1.y, v1.z
+			x2, y2, z2 = v2.x, v2.y, v2.z
+			x3, y3, z3 = v3.x, v3.y, v3.z
+			if volume:
+				normal = face.normal
+				facet_volume = abs(x1 * (y2 * z3 - z2 * y3) - y1 * (x2 * z3 - z2 * x3) + z1 * (x2 * y3 - y2 * x3)) / 6
+				if x1 * normal.x + y1 * normal.y + z1 * normal.z < 0:
+					facet_volume = -facet_volume
+			if area:
+				ux, uy, uz = x2 - x1, y2 - y1, z2 - z1
+				wx, wy, wz = x3 - x1, y3 - y1, z3 - z1
+				cx, cy, cz = uy * wz - uz * wy, uz * wx - ux * wz, ux * wy - uy * wx
+				facet_area = math.sqrt(cx * cx + cy * cy + cz * cz) / 2
+			if length:
+				facet_minimums = (min(x1, x2, x3), min(y1, y2, y3), min(z1, z2, z3))
+				facet_maximums = (max(x1, x2, x3), max(y1, y2, y3), max(z1, z2, z3))
+		else:
+			if volume:
+				facet_volume = face_pyramid_volume(face)
+			if area:
+				facet_area = polygon_area(vertices)
+			if length:
+				xs, ys, zs = zip(*((vertex.x, vertex.y, vertex.z) for vertex in vertices))
+				facet_minimums = (min(xs), min(ys), min(zs))
+				facet_maximums = (max(xs), max(ys), max(zs))
+		for (labels, label_count), totals in zip(labelings, label_totals):
+			label = labels[facet_ind]
+			if label < 0:
+				continue
+			totals = totals[label]
+			totals['facet_count'] += 1
+			totals['volume_total'] += facet_volume
+			totals['area_total'] += facet_area
+			if length:
+				minimums = totals['minimums']
+				maximums = totals['maximums']
+				for axis in range(3):
+					if facet_minimums[axis] < minimums[axis]:
+						minimums[axis] = facet_minimums[axis]
+					if facet_maximums[axis] > maximums[axis]:
+						maximums[axis] = facet_maximums[axis]
+	return label_totals
+
+def finish_labeled(totals, volume=False, area=False, length=False):
+	"""Converts the running totals of a single label into its measurements as described by `measure_labeled`."""
+	measurements = {'facet_count': totals['facet_count']}
+	measurements.update(finish_measurements(totals, volume, area, length))
+	return measurements
+
+def group_labels(mesh, data_key):
+	"""Labels the facets of the given mesh by the value of their data for `data_key`, such as the `'material'` read by `parse_obj`.
+	Returns a tuple `(labels, names)` where `labels` is an `array('l')` holding the label of each facet and `names` is a list of the name of each label.
+	If `.meta` holds a list of names for the key (see `LABEL_NAMES`), the data indexes it, and facets with a negative index are named None.
+	Otherwise the data itself is the name. Facets without data for the key are also named None. Labels are numbered in order of their first facet."""
+	if not isinstance(mesh, Mesh):
+		raise TypeError('group_labels: Argument must be an instance of Mesh.')
+	meta_names = mesh.meta.get(LABEL_NAMES.get(data_key))
+	labels = array('l')
+	name_labels = {}
+	for facet in mesh:
+		name = facet.data().get(data_key)
+		if meta_names is not None and name is not None:
+			name = meta_names[name] if name >= 0 else None
+		label = name_labels.get(name)
+		if label is None:
+			label = name_labels[name] = len(name_labels)
+		labels.append(label)
+	return labels, list(name_labels)
+
+def slice_profile(mesh, heights):
+	"""Calculates the cross-sectional area and perimeter of a closed shape defined by the given mesh at each of the given z heights.
+	Returns a tuple `(areas, perimeters)` of arrays ordered like `heights`.
+	Facets are sorted by their z extent once, then the heights are swept in ascending order while only the facets spanning the current height are kept active."""
+	if not isinstance(mesh, Mesh):
+		raise TypeError('slice_profile: Argument must be an instance of Mesh.')
+	coords, _ = mesh.triangle_arrays()
+	triangle_count = len(coords) // 9
+	z_minimums = [min(coords[i + 2], coords[i + 5], coords[i + 8]) for i in range(0, 9 * triangle_count, 9)]
+	z_maximums = [max(coords[i + 2], coords[i + 5], coords[i + 8]) for i in range(0, 9 * triangle_count, 9)]
+	by_minimum = sorted(range(triangle_count), key=z_minimums.__getitem__)
+
+	areas = array('d', bytes(8 * len(heights)))
+	perimeters = array('d', bytes(8 * len(heights)))
+	active = set()
+	expiring = [] # Heap of (z maximum, triangle) for the active triangles.
+	next_ind = 0
+	for height_ind in sorted(range(len(heights)), key=heights.__getitem__):
+		height = heights[height_ind]
+		# A triangle crosses the plane when it has at least one vertex below the height and one at or above it.
+		while next_ind < triangle_count and z_minimums[by_minimum[next_ind]] < height:
+			tri = by_minimum[next_ind]
+			active.add(tri)
+			heappush(expiring, (z_maximums[tri], tri))
+			next_ind += 1
+		while expiring and expiring[0][0] < height:
+			active.discard(heappop(expiring)[1])
+
+		area_total = 0
+		perimeter_total = 0
+		for tri in active:
+			i = 9 * tri
+			points = ((coords[i], coords[i + 1], coords[i + 2]), (coords[i + 3], coords[i + 4], coords[i + 5]), (coords[i + 6], coords[i + 7], coords[i + 8]))
+			crossings = []
+			for (x1, y1, z1), (x2, y2, z2) in zip(points, points[1:] + points[:1]):
+				if (z1 < height) != (z2 < height):
+					t = (height - z1) / (z2 - z1)
+					crossings.append((x1 + (x2 - x1) * t, y1 + (y2 - y1) * t))
+			if len(crossings) != 2:
+				continue
+			(px, py), (qx, qy) = crossings
+			# Orient the segment counter-clockwise around the solid when viewed from above, meaning along z × n, where n is the triangle's normal.
+			(ax, ay, az), (bx, by, bz), (cx, cy, cz) = points
+			nx = (by - ay) * (cz - az) - (bz - az) * (cy - ay)
+			ny = (bz - az) * (cx - ax) - (bx - ax) * (cz - az)
+			if (qx - px) * -ny + (qy - py) * nx < 0:
+				px, py, qx, qy = qx, qy, px, py
+			area_total += (px * qy - qx * py) / 2
+			perimeter_total += math.sqrt((qx - px) ** 2 + (qy - py) ** 2)
+		areas[height_ind] = abs(area_total) # If all the normals were flipped, the area would be negative but otherwise accurate.
+		perimeters[height_ind] = perimeter_total
+
+	return areas, perimeters
+
+def estimate_mesh_file(file_path, volume=False, area=False, length=False, sample_count=10000, confidence=0.95, time_budget=None, byte_budget=None, seed=None):
+	"""Estimates the measurements of the mesh in the given .stl or .obj file as described by `estimate_measurements` and returns them as a dictionary.
+	Binary STL files are sampled by seeking directly to the sampled facets, so the rest of the file is never read.
+	`byte_budget` limits the number of facet bytes read from binary STL files. Text STL and OBJ files must be parsed in full before sampling.
+	`time_budget` limits the total time spent to roughly the given number of seconds, provided parsing finishes within it."""
+	deadline = None if time_budget is None else time.monotonic() + time_budget
+	extension = file_path.split('.')[-1]
+	if extension == 'stl' and not is_text_stl(file_path):
+		facet_count = bin_stl_facet_count(file_path)
+		if byte_budget is not None:
+			sample_count = min(sample_count, max(2, byte_budget // 50))
+		rng = random.Random(seed)
+		indices = stratified_indices(facet_count, sample_count, rng)
+		if deadline is not None:
+			rng.shuffle(indices) # Sample the strata in random order so that stopping early still leaves an unbiased sample.
+		return estimate_measurements(facet_count, sample_bin_stl(file_path, indices), volume, area, length, confidence, deadline)
+	elif extension == 'stl':
+		mesh = parse_stl(file_path)
+	elif extension == 'obj':
+		mesh = parse_obj(file_path)
+	else:
+		raise ValueError(f'estimate_mesh_file: Unsupported file format "{extension}".')
+	remaining = None if deadline is None else max(0, deadline - time.monotonic())
+	measure_mesh(mesh, volume, area, length, approximate=True, sample_count=sample_count, confidence=confidence, time_budget=remaining, seed=seed)
+	return mesh.meta
 
 def display_round(x):
 	"""Rounds `x` to two or more decimal places, such that it contains at least two more places than the 
 	most significant digit and has a minimum of at least two decimal places."""
+	if x == 0:
+		return 0, 0
 	min_decimal_count = max(0, -math.floor(math.log(x, 10)))
 	return round(x, min_decimal_count + 2), min_decimal_count
 
+def print_measurement(label, value, error=None):
+	"""Prints a single measurement rounded by `display_round`, followed by its error margin if one is given."""
+	value, value_mdc = display_round(value)
+	if value_mdc < 2: 
+		line = f'{label}: {value:,.2f}'
+	else:
+		line = f'{label}: {value:,f}'
+	if error is not None:
+		if value_mdc < 2:
+			line += f' ± {error:,.2f}'
+		else:
+			line += f' ± {error:,f}'
+	print(line)
+
+def print_memory(usage, estimated=False):
+	"""Prints a breakdown of memory use as returned by `mesh_memory` or `estimate_file_memory`."""
+	print('Estimated Memory:' if estimated else 'Memory:')
+	for category in CATEGORIES + ('total',):
+		print(f'  {category.capitalize()}: {usage[category]:,} bytes')
+
 def main(argc=0, argv=[]):
 	"""
 		Calculates and prints the volume, surface area, and z, y, and z lengths of a mesh contained within a user provided 3d model file.
 		Currently supports .stl and .obj formats.
+		Options:
+			--approximate           Estimates the measurements from a sample of the facets. (See `estimate_mesh_file`.)
+			--samples=<count>       The number of facets to sample when approximating. Defaults to 10000.
+			--time-budget=<seconds> Limits the time spent approximating.
+			--byte-budget=<bytes>   Limits the number of facet bytes read when approximating binary STL files.
+			--out-of-core           Measures OBJ files with their vertices spilled to disk. (See `measure_obj_out_of_core`.)
+			--pipelined             Measures the file while it is being read. (See `measure_file_pipelined`.)
+			--workers=<count>       The number of compute threads used by `--pipelined`. Defaults to 1.
+			--hull                  Also prints the volume and surface area of the convex hull. (See `measure_hull`.)
+			--memory                Also prints the memory used by the parsed mesh. (See `mesh_memory`.)
+			--estimate-memory       Only prints an estimate of the memory parsing the file would use, read from a sample of it. (See `estimate_file_memory`.)
+			--robust                Also prints the volume found from the generalized winding numbers, for open or self-intersecting meshes.
+			--resolution=<cells>    The number of grid cells across the mesh used by `--robust`. Defaults to 32. (See `winding_volume`.)
+			--group-by=<keys>       Also prints the volume and surface area of each group of facets for the comma separated facet data keys,
+			                        such as `object,group,material` for OBJ files.
+			--compare=<path>        Also prints how far the surface deviates from that of the mesh in another .stl or .obj file, such as the
+			                        original of a decimated or repaired copy. `--samples` sets the number of points sampled on each surface,
+			                        which defaults to 100000. (See `compare_meshes`.)
 	"""
 
+	# Options are given as `--name` or `--name=value` and may appear anywhere after the program name.
+	options = {}
+	arguments = []
+	for arg in argv[1:]:
+		if arg.startswith('--'):
+			name, _, value = arg[2:].partition('=')
+			options[name] = value
+		else:
+			arguments.append(arg)
+
 	# If a file path is passed with the program call, the program usses the passed value.
 	# If not, the program requests a file path to find the model at.
 	file_path = ''
-	if argc > 1:
-		file_path = argv[1]
+	if len(arguments) > 0:
+		file_path = arguments[0]
 	else:
 		file_path = input('Please provide a valid mesh file (.stl or .obj): ')
 
+	while file_path.split('.')[-1] not in ('stl', 'obj'):
+		print('Invalid format.')
+		if len(arguments) > 0:
+			return
+		else:
+			file_path = input('Please provide a valid mesh file (.stl or .obj) or leave blank to close: ')
+			if file_path.strip() == '':
+				return
+
+	if 'estimate-memory' in options:
+		estimate = estimate_file_memory(file_path)
+		print(f"Facets: {estimate['facet_count']:,}")
+		print_memory(estimate, estimated=not estimate['exact'])
+		return
+
 	mesh = None
-	while mesh is None:
+	if 'approximate' in options:
+		measurements = estimate_mesh_file(
+			file_path, volume=True, area=True, length=True,
+			sample_count=int(options.get('samples') or 10000),
+			time_budget=float(options['time-budget']) if options.get('time-budget') else None,
+			byte_budget=int(options['byte-budget']) if options.get('byte-budget') else None
+		)
+		print(f"Estimated from {measurements['sample_count']:,} facets at {measurements['confidence']:.0%} confidence. Lengths are lower bounds.")
+	elif 'out-of-core' in options and file_path.split('.')[-1] == 'obj':
+		measurements = measure_obj_out_of_core(file_path, volume=True, area=True, length=True)
+	elif 'pipelined' in options:
+		measurements = measure_file_pipelined(file_path, volume=True, area=True, length=True, workers=int(options.get('workers') or 1))
+	elif file_path.split('.')[-1] == 'stl' and not is_text_stl(file_path) and not {'hull', 'robust', 'memory', 'group-by', 'compare'} & options.keys():
+		# Binary STL files hold only triangles, so when no mesh is needed afterwards they are measured straight from the file.
+		measurements = measure_bin_stl(file_path, volume=True, area=True, length=True)
+	else:
 		extension = file_path.split('.')[-1]
 		if extension == 'stl':
 			mesh = parse_stl(file_path)
-		elif extension == 'obj':
-			mesh = parse_obj(file_path)
 		else:
-			print('Invalid format.')
-			if argc > 1:
-				return
-			else:
-				file_path = input('Please provide a valid mesh file (.stl or .obj) or leave blank to close: ')
-				if file_path.strip() == '':
-					return
-
-	measure_mesh(mesh, volume=True, area=True, length=True)
-
-	volume, volume_mdc = display_round(mesh.meta['volume'])
-	area, area_mdc = display_round(mesh.meta['area'])
-	x_length, x_length_mdc = display_round(mesh.meta['x_length'])
-	y_length, y_length_mdc = display_round(mesh.meta['y_length'])
-	z_length, z_length_mdc = display_round(mesh.meta['z_length'])
+			mesh = parse_obj(file_path)
+		group_by = options['group-by'].split(',') if options.get('group-by') else None
+		measure_mesh(
+			mesh, volume=True, area=True, length=True, hull='hull' in options, group_by=group_by,
+			robust='robust' in options, resolution=int(options.get('resolution') or 32)
+		)
+		measurements = mesh.meta
 
-	if volume_mdc < 2: 
-		print(f'Volume: {volume:,.2f}')
-	else:
-		print(f'Volume: {volume:,f}')
-	if area_mdc < 2: 
-		print(f'Surface Area: {area:,.2f}')
-	else:
-		print(f'Surface Area: {area:,f}')
-	if x_length_mdc < 2: 
-		print(f'X Length: {x_length:,.2f}')
-	else:
-		print(f'X Length: {x_length:,f}')
-	if y_length_mdc < 2: 
-		print(f'Y Length: {y_length:,.2f}')
-	else:
-		print(f'Y Length: {y_length:,f}')
-	if z_length_mdc < 2: 
-		print(f'Z Length: {z_length:,.2f}')
-	else:
-		print(f'Z Length: {z_length:,f}')
+	print_measurement('Volume', measurements['volume'], measurements.get('volume_error'))
+	print_measurement('Surface Area', measurements['area'], measurements.get('area_error'))
+	print_measurement('X Length', measurements['x_length'])
+	print_measurement('Y Length', measurements['y_length'])
+	print_measurement('Z Length', measurements['z_length'])
+	if 'hull_volume' in measurements:
+		print_measurement('Hull Volume', measurements['hull_volume'])
+		print_measurement('Hull Surface Area', measurements['hull_area'])
+	if 'robust_volume' in measurements:
+		print_measurement('Robust Volume', measurements['robust_volume'])
+	for data_key, groups in measurements.get('grouped', {}).items():
+		for name, group in groups.items():
+			print(f'{data_key.capitalize()} {name}: {group["facet_count"]:,} facets')
+			print_measurement('  Volume', group['volume'])
+			print_measurement('  Surface Area', group['area'])
+	if options.get('compare') and mesh is not None:
+		reference_path = options['compare']
+		if reference_path.split('.')[-1] not in ('stl', 'obj'):
+			print('Invalid format for the compared mesh.')
+			return
+		reference = parse_stl(reference_path) if reference_path.split('.')[-1] == 'stl' else parse_obj(reference_path)
+		deviation = compare_meshes(mesh, reference, sample_count=int(options.get('samples') or 100000))
+		print_measurement('Hausdorff Distance', deviation['hausdorff'])
+		print_measurement('Max Deviation', deviation['max_deviation'])
+		print_measurement('Mean Deviation', deviation['mean_deviation'])
+		print_measurement('RMS Deviation', deviation['rms_deviation'])
+	if 'memory' in options and mesh is not None:
+		print_memory(mesh_memory(mesh))
 
 if __name__ == '__main__':
 	main(len(sys.argv), sys.argv)
\ No newline at end of file
@@ -1,167 +1,481 @@
 import re
+import os
+import math
+import mmap
+import tempfile
+from array import array
+from itertools import repeat
 from vector3 import Vector3
-from mesh import MeshFacetIV, MeshIV
+from multiprocessing import Pool
+from mesh import MeshIV, MeshFacetPFV, polygon_normal
+from attributes import AttributeChannel
+from progress import track, UPDATE_EVERY
 
-def parse_obj(file_path):
+def parse_obj_index(text, count, prefix_length):
+	"""Converts a single OBJ index to a 0-based index.
+	Positive indexes count from 1 while negative indexes count back from the end of the `count` elements read so far.
+	If `text` is not a plain integer, the first `prefix_length` characters are skipped. Raises ValueError if it still is not."""
 	try:
-		with open(file_path, 'rt') as fp:
-			mesh = MeshIV()
-			ptn_arg_split = re.compile(r'\s+')
-			for line in fp:
-				if line.endswith('\n'):
-					line = line[:-1]
-				entry = ptn_arg_split.split(line)
-				if entry[-1] == '':
-					entry.pop()
-				arg_count = len(entry)
-				if arg_count < 1: # Ignore blank lines
-					continue
-				match entry[0]:
-					case 'v': # Vertex
-						if arg_count < 4:
-							raise IndexError("parse_obj: Too few vertex arguments in file. File may be malformed. Aborting parse.")
-						# Vertex may be scaled by a fourth value
-						scale = 1
-						if arg_count >= 5:
-							scale = float(entry[4])
-						mesh.vertices.append(Vector3(float(entry[1]) / scale, float(entry[2]) / scale, float(entry[3]) / scale))
-						# Some formats include vertex color data after the scale factor
-						if arg_count > 5:
-							if 'color_data' not in mesh.meta:
-								mesh.meta['color_data'] = {}
-							color_data = []
-							for arg in entry[5:]:
-								try:
-									color_data.append(float(arg))
-								except ValueError:
-									color_data.append(arg)
-							mesh.meta['color_data'][len(mesh.vertices) - 1] = color_data
-					case 'vt': # Texture Coordinates
-						if 'texture_coordinates' not in mesh.meta:
-							mesh.meta['texture_coordinates'] = []
-						txtr_coord = []
-						for arg in entry[1:]:
-							try:
-								txtr_coord.append(float(arg))
-							except ValueError:
-								txtr_coord.append(arg)
-						mesh.meta['texture_coordinates'].append(txtr_coord)
-					case 'vn': # Vertex Normal
-						if 'normals' not in mesh.meta:
-							mesh.meta['normals'] = []
-						normal = []
-						errors = False
-						for arg in entry[1:]:
-							try:
-								normal.append(float(arg))
-							except ValueError:
-								normal.append(arg)
-								errors = True
-						if len(normal) == 3 and not errors:
-							normal = Vector3(normal)
-						if len(normal) == 4 and not errors:
-							normal = Vector3(normal[:3]) / normal[3]
-						mesh.meta['normals'].append(normal)
-					case 'vp': # Parameter Space Vertices
-						if 'freeform_geometry' not in mesh.meta:
-							mesh.meta['freeform_geometry'] = []
-						ff_coord = []
-						for arg in entry[1:]:
-							try:
-								ff_coord.append(float(arg))
-							except ValueError:
-								ff_coord.append(arg)
-						mesh.meta['freeform_geometry'].append(ff_coord)
-					case 'f': # Face
-						vertex_ind = []
-						texture_ind = []
-						normal_ind = []
-						for vertex in entry[1:]:
-							indices = vertex.split('/')
+		index = int(text)
+	except ValueError:
+		index = int(text[prefix_length:])
+	return index - 1 if index > 0 else count + index
+
+def parse_face_entry(entry, vertex_count=0, texture_count=0, normal_count=0):
+	"""Parses the arguments of an OBJ face element, split into `entry`, into lists of 0-based vertex, texture coordinate, and normal indexes.
+	The counts are the numbers of each element read so far and are used to resolve relative (negative) indexes.
+	Missing or invalid texture coordinate and normal indexes are given as None."""
+	vertex_ind = []
+	texture_ind = []
+	normal_ind = []
+	for vertex in entry[1:]:
+		indices = vertex.split('/')
+		try:
+			vertex_ind.append(parse_obj_index(indices[0], vertex_count, 1))
+		except ValueError:
+			raise ValueError('parse_obj: Invalid vertex format in face element. File may be malformed. Aborting parse.')
+		ind_count = len(indices)
+		if ind_count >= 2 and indices[1] != '':
+			try:
+				texture_ind.append(parse_obj_index(indices[1], texture_count, 2))
+			except ValueError:
+				texture_ind.append(None)
+		else:
+			texture_ind.append(None)
+		if ind_count >= 3 and indices[2] != '':
+			try:
+				normal_ind.append(parse_obj_index(indices[2], normal_count, 2))
+			except ValueError:
+				normal_ind.append(None)
+		else:
+			normal_ind.append(None)
+	return vertex_ind, texture_ind, normal_ind
+
+def average_given_normal(normals, normal_ind):
+	"""Returns the normalized sum of the vertex normals referenced by the indexes `normal_ind`, or None if none of them are valid.
+	`normals` is a list of the normals read from the file."""
+	total = Vector3(0,0,0)
+	found = False
+	for ind in normal_ind:
+		if ind is not None and 0 <= ind < len(normals) and isinstance(normals[ind], Vector3):
+			total += normals[ind].norm()
+			found = True
+	if not found or total.mag() == 0:
+		return None
+	return total.norm()
+
+# The statements which label the faces following them, mapped to the facet data key holding each face's label and the `.meta` key
+# holding the list of names the labels index.
+OBJ_LABELS = {'o': ('object', 'objects'), 'g': ('group', 'groups'), 'usemtl': ('material', 'materials'), 's': ('smoothing', 'smoothing_groups')}
+# The `.meta` key holding the names of each label, by facet data key.
+LABEL_NAMES = {key: names_key for key, names_key in OBJ_LABELS.values()}
+
+# Relative indexes read by parallel workers are resolved against counts raised by this much, which marks them to be rebased once the number
+# of elements in the earlier byte ranges is known. Absolute indexes never come close to it.
+RELATIVE_OFFSET = 1 << 48
+
+def obj_byte_ranges(file_path, range_count):
+	"""Splits a file into about `range_count` consecutive `(start, end)` byte ranges of similar size, each ending at the end of a line."""
+	file_size = os.path.getsize(file_path)
+	boundaries = [0]
+	with open(file_path, 'rb') as fp:
+		for range_ind in range(1, range_count):
+			position = range_ind * file_size // range_count
+			if position <= boundaries[-1]:
+				continue
+			fp.seek(position - 1)
+			fp.readline() # Finish the line the position falls in. If the position starts a line, the previous newline is all that is read.
+			position = fp.tell()
+			if boundaries[-1] < position < file_size:
+				boundaries.append(position)
+	boundaries.append(file_size)
+	return list(zip(boundaries, boundaries[1:]))
+
+def parse_obj_range(file_path, start, end, offset=0, tracker=None):
+	"""Parses the lines of an OBJ file within the byte range from `start` to `end`, which must start and end on line boundaries,
+	into flat arrays and lists which `merge_obj_range` adds to a MeshIV.
+	Relative indexes are resolved against the numbers of elements read within the range plus `offset`, so that they can be rebased later.
+	Returns a dictionary holding:
+		`vertices`, an `array('d')` of three coordinates per vertex,
+		`offsets` and `indices`, the vertex indexes of the faces in the form taken by `MeshIV.extend_indexed`,
+		`channels`, the `texture` and `given_normal` indexes of the faces, and the `object`, `group`, `material`, and `smoothing` labels of the
+			faces (see `OBJ_LABELS`), as instances of AttributeChannel,
+		`labels`, the names of each kind of label in the order they first appear within the range, along with the label in effect at the end,
+		`meta`, the other elements in the same form as `mesh.meta`, with vertex color data keyed by the vertex's index within the range,
+		`end`, the end of the range.
+	Labels index the range's lists of names. Faces before the first statement of a kind within the range are labeled -2, since the label
+	in effect depends on the earlier ranges."""
+	vertices = array('d')
+	offsets = array('q', [0])
+	indices = array('q')
+	textures = AttributeChannel('list', 'q')
+	given_normals = AttributeChannel('list', 'q')
+	meta = {}
+	labels = {key: array('l') for key, names_key in OBJ_LABELS.values()}
+	label_names = {key: {} for key in labels}
+	current_labels = {key: -2 for key in labels}
+	ptn_arg_split = re.compile(r'\s+')
+	vertex_count = 0
+	face_count = 0
+	with open(file_path, 'rb') as fp:
+		fp.seek(start)
+		position = start
+		for line_ind, line in enumerate(fp):
+			if position >= end:
+				break
+			position += len(line)
+			if tracker is not None and line_ind % UPDATE_EVERY == 0:
+				tracker.update(position)
+			line = line.decode()
+			if line.endswith('\n'):
+				line = line[:-1]
+			entry = ptn_arg_split.split(line)
+			if entry[-1] == '':
+				entry.pop()
+			arg_count = len(entry)
+			if arg_count < 1: # Ignore blank lines
+				continue
+			match entry[0]:
+				case 'v': # Vertex
+					if arg_count < 4:
+						raise IndexError("parse_obj: Too few vertex arguments in file. File may be malformed. Aborting parse.")
+					# Vertex may be scaled by a fourth value
+					scale = 1
+					if arg_count >= 5:
+						scale = float(entry[4])
+					vertices.extend((float(entry[1]) / scale, float(entry[2]) / scale, float(entry[3]) / scale))
+					vertex_count += 1
+					# Some formats include vertex color data after the scale factor
+					if arg_count > 5:
+						if 'color_data' not in meta:
+							meta['color_data'] = {}
+						color_data = []
+						for arg in entry[5:]:
 							try:
-								vertex_ind.append(int(indices[0]) - 1)
+								color_data.append(float(arg))
 							except ValueError:
-								try:
-									vertex_ind.append(int(indices[0][1:]) - 1)
-								except ValueError:
-									raise ValueError('parse_obj: Invalid vertex format in face element. File may be malformed. Aborting parse.')
-							ind_count = len(indices)
-							if ind_count >= 2 and indices[1] != '':
-								try:
-									texture_ind.append(int(indices[1]) - 1)
-								except ValueError:
-									try:
-										texture_ind.append(int(indices[1][2:]) - 1)
-									except ValueError:
-										texture_ind.append(None)
-							else:
-								texture_ind.append(None)
-							if ind_count >= 3 and indices[2] != '':
-								try:
-									normal_ind.append(int(indices[2]) - 1)
-								except ValueError:
-									try:
-										normal_ind.append(int(indices[2][2:]) - 1)
-									except ValueError:
-										normal_ind.append(None)
-							else:
-								normal_ind.append(None)
-						data = {'texture': texture_ind, 'given_normal': normal_ind}
-						mesh.add_facet(MeshFacetIV(vertex_ind, data = data))
-						# Normal is calculated later after finished file read.
-						# Mesh is not included to prevent vertex reassignment.
-						#     (Vertex indices are treated as "floating", without an associated vector, and applied blindly.)
-					case 'l': # Line Element
-						if 'lines' not in mesh.meta:
-							mesh.meta['lines'] = []
-						new_line = []
+								color_data.append(arg)
+						meta['color_data'][vertex_count - 1] = color_data
+				case 'vt': # Texture Coordinates
+					if 'texture_coordinates' not in meta:
+						meta['texture_coordinates'] = []
+					txtr_coord = []
+					for arg in entry[1:]:
+						try:
+							txtr_coord.append(float(arg))
+						except ValueError:
+							txtr_coord.append(arg)
+					meta['texture_coordinates'].append(txtr_coord)
+				case 'vn': # Vertex Normal
+					if 'normals' not in meta:
+						meta['normals'] = []
+					normal = []
+					errors = False
+					for arg in entry[1:]:
+						try:
+							normal.append(float(arg))
+						except ValueError:
+							normal.append(arg)
+							errors = True
+					if len(normal) == 3 and not errors:
+						normal = Vector3(normal)
+					if len(normal) == 4 and not errors:
+						normal = Vector3(normal[:3]) / normal[3]
+					meta['normals'].append(normal)
+				case 'vp': # Parameter Space Vertices
+					if 'freeform_geometry' not in meta:
+						meta['freeform_geometry'] = []
+					ff_coord = []
+					for arg in entry[1:]:
 						try:
-							for vertex in entry[1:]:
-								new_line.append(int(vertex[1:]) - 1)
-							mesh.meta.append(new_line)
+							ff_coord.append(float(arg))
 						except ValueError:
-							mesh.meta.append(entry[1:])
-					case _: # Store unknown miscellaneous data
-						if 'other_tags' not in mesh.meta:
-							mesh.meta['other_tags'] = {}
-						if entry[0] in mesh.meta['other_tags']:
-							mesh.meta['other_tags'][entry[0]].append(entry[1:])
-						else:
-							mesh.meta['other_tags'][entry[0]] = [entry[1:]]
-		for facet in mesh:
-			# Detect presence of provided normal value
-			has_given_normal = False
-			given_normal = Vector3(0,0,0)
-			if 'normals' in mesh.meta:
-				normal_count = len(mesh.meta['normals'])
-				for normal in facet.data('given_normal'):
-					if normal is not None and normal < normal_count and isinstance(mesh.meta['normals'][normal], Vector3):
-						given_normal += mesh.meta['normals'][normal].norm()
-						has_given_normal = True
-
-			# Calculate normal from vertices
-			normal = Vector3(0,0,0)
-			if len(facet) == 3:
-				normal = (facet.vertex(1) - facet.vertex(0)).cross(facet.vertex(2) - facet.vertex(0))
-			elif len(facet) > 3:
-				mid_point = Vector3(0,0,0)
-				for vertex in facet:
-					mid_point += vertex
-				mid_point /= len(facet)
-
-				vertices = facet.vertices
-				for v1, v2 in zip(vertices, vertices[1:] + vertices[:1]):
-					normal += (v1 - mid_point).cross(v2 - mid_point).norm()
-			normal = normal.norm()
-
-			# If face has a provided normal value, invert calculated normal to match provided normal's facing
-			if has_given_normal and given_normal.dot(normal) < 0:
-				normal *= -1
-
-			# Assign normal
-			facet.normal = normal
-
-		return mesh
+							ff_coord.append(arg)
+					meta['freeform_geometry'].append(ff_coord)
+				case 'f': # Face
+					vertex_ind, texture_ind, normal_ind = parse_face_entry(
+						entry, vertex_count + offset, len(meta.get('texture_coordinates', [])) + offset, len(meta.get('normals', [])) + offset
+					)
+					indices.extend(vertex_ind)
+					offsets.append(len(indices))
+					textures.set(face_count, texture_ind)
+					for key, face_labels in labels.items():
+						face_labels.append(current_labels[key])
+					given_normals.set(face_count, normal_ind)
+					face_count += 1
+				case 'l': # Line Element
+					if 'lines' not in meta:
+						meta['lines'] = []
+					try:
+						new_line = [parse_obj_index(vertex.split('/')[0], vertex_count + offset, 1) for vertex in entry[1:]]
+					except ValueError:
+						new_line = entry[1:]
+					meta['lines'].append(new_line)
+				case 'o' | 'g' | 'usemtl' | 's': # Label the following faces
+					# Faces may belong to several groups at once, which are treated as one group named by all of them.
+					key = OBJ_LABELS[entry[0]][0]
+					name = ' '.join(entry[1:]) if arg_count > 1 or entry[0] != 'g' else 'default'
+					names = label_names[key]
+					if name not in names:
+						names[name] = len(names)
+					current_labels[key] = names[name]
+					# The statements are also kept as unknown tags were before they labeled faces.
+					meta.setdefault('other_tags', {}).setdefault(entry[0], []).append(entry[1:])
+				case _: # Store unknown miscellaneous data
+					if 'other_tags' not in meta:
+						meta['other_tags'] = {}
+					if entry[0] in meta['other_tags']:
+						meta['other_tags'][entry[0]].append(entry[1:])
+					else:
+						meta['other_tags'][entry[0]] = [entry[1:]]
+	channels = {'texture': textures, 'given_normal': given_normals}
+	for key, face_labels in labels.items():
+		channels[key] = AttributeChannel('scalar', 'l')
+		channels[key].extend_values(face_labels)
+	labels = {key: (list(label_names[key]), current_labels[key]) for key in labels}
+	return {'vertices': vertices, 'offsets': offsets, 'indices': indices, 'channels': channels, 'labels': labels, 'meta': meta, 'end': end}
+
+def _parse_obj_range_task(task):
+	return parse_obj_range(*task)
+
+def rebase_indices(values, offset, base):
+	"""Replaces each index in the array `values` which was resolved against a count raised by `offset` with the same index counted from `base`."""
+	if offset == 0 or len(values) == 0 or max(values) < offset // 2:
+		return
+	for value_ind, value in enumerate(values):
+		if value >= offset // 2:
+			values[value_ind] = value - offset + base
+
+def merge_obj_range(mesh, result, offset=0, current_labels=None):
+	"""Adds the elements of a byte range parsed by `parse_obj_range` to a MeshIV holding the elements of every earlier range,
+	rebasing the range's relative indexes and vertex color data against the elements already in the mesh.
+	The range's labels are renumbered to index the names in `.meta`. `current_labels` maps each kind of label to the label in effect at the
+	end of the earlier ranges, which is given to the range's first faces, and is updated for the next range."""
+	if current_labels is None:
+		current_labels = {}
+	vertex_base = len(mesh.vertices)
+	texture_base = len(mesh.meta.get('texture_coordinates', []))
+	normal_base = len(mesh.meta.get('normals', []))
+	coords = result['vertices']
+	mesh.vertices.extend(map(Vector3, coords[0::3], coords[1::3], coords[2::3]))
+
+	for key, value in result['meta'].items():
+		if key == 'color_data':
+			color_data = mesh.meta.setdefault('color_data', {})
+			for vertex_ind, color in value.items():
+				color_data[vertex_base + vertex_ind] = color
+		elif key == 'other_tags':
+			other_tags = mesh.meta.setdefault('other_tags', {})
+			for tag, entries in value.items():
+				other_tags.setdefault(tag, []).extend(entries)
+		elif key == 'lines':
+			lines = mesh.meta.setdefault('lines', [])
+			for line in value:
+				if offset != 0 and all(type(vertex_ind) is int for vertex_ind in line):
+					line = [vertex_ind - offset + vertex_base if vertex_ind >= offset // 2 else vertex_ind for vertex_ind in line]
+				lines.append(line)
+		else:
+			mesh.meta.setdefault(key, []).extend(value)
+
+	channels = result['channels']
+	rebase_indices(result['indices'], offset, vertex_base)
+	rebase_indices(channels['texture'].values, offset, texture_base)
+	rebase_indices(channels['given_normal'].values, offset, normal_base)
+	for key, (range_names, range_label) in result['labels'].items():
+		names_key = LABEL_NAMES[key]
+		if not range_names and names_key not in mesh.meta:
+			# Files without any statements of a kind, or without any so far, are not given a channel for it.
+			del channels[key]
+			continue
+		names = mesh.meta.setdefault(names_key, [])
+		name_labels = {name: label for label, name in enumerate(names)}
+		relabel = {-2: current_labels.get(key, -1)}
+		for range_label_ind, name in enumerate(range_names):
+			if name not in name_labels:
+				name_labels[name] = len(names)
+				names.append(name)
+			relabel[range_label_ind] = name_labels[name]
+		channel = channels[key]
+		channel.values = array(channel.typecode, map(relabel.__getitem__, channel.values))
+		current_labels[key] = relabel[range_label]
+		if key not in mesh.attributes.channels:
+			# Faces from earlier ranges, before the first statement, are labeled -1.
+			mesh.attributes.add_channel(key, 'scalar', channel.typecode).extend_values(repeat(-1, mesh.attributes.row_count))
+	mesh.extend_indexed(result['offsets'], result['indices'], channels)
+
+def parse_obj(file_path, given_normals=False, progress=None, token=None, workers=1, range_bytes=1 << 26):
+	"""Parses an OBJ file into a MeshIV.
+	Facet normals are calculated from the vertices when first needed. If `given_normals` is set, faces which reference vertex normals
+	instead use the average of those normals without any calculation on the vertices.
+	Each face is labeled with the `o`, `g`, `usemtl`, and `s` statements before it in compact integer channels (see `OBJ_LABELS`). For example,
+	`facet.data('material')` indexes the names in `.meta['materials']`, and is -1 for faces before the first `usemtl` statement.
+	If a `progress` callback is given, it is called with a Progress counting the bytes parsed at most twice a second, and if a CancelToken is given
+	as `token`, it is checked every few thousand lines and raises Cancelled once cancelled.
+	If `workers` is more than 1 and the file is larger than `range_bytes`, it is split at line boundaries into byte ranges of about `range_bytes`
+	bytes (see `obj_byte_ranges`), which are parsed by `workers` processes at the same time (see `parse_obj_range`).
+	The ranges are merged in order, so the mesh is the same as when parsed by a single process. Progress is then reported and the token checked
+	as each range is merged."""
+	try:
+		file_size = os.path.getsize(file_path)
+	except FileNotFoundError:
+		raise FileNotFoundError(f'parse_obj: Failed to locate file "{file_path}" in the current directory.')
+	tracker = track(progress, token, file_size)
+	mesh = MeshIV()
+	current_labels = {}
+	if workers > 1 and file_size > range_bytes:
+		ranges = obj_byte_ranges(file_path, -(-file_size // range_bytes))
+		tasks = [(file_path, start, end, RELATIVE_OFFSET) for start, end in ranges]
+		with Pool(workers) as pool:
+			for result in pool.imap(_parse_obj_range_task, tasks):
+				merge_obj_range(mesh, result, RELATIVE_OFFSET, current_labels)
+				if tracker is not None:
+					tracker.update(result['end'])
+	else:
+		merge_obj_range(mesh, parse_obj_range(file_path, 0, file_size, 0, tracker), 0, current_labels)
+
+	if given_normals:
+		normals = mesh.meta.get('normals', [])
+		for facet in mesh._facets:
+			facet._normal = average_given_normal(normals, facet.data('given_normal'))
+	if tracker is not None:
+		tracker.finish()
+	return mesh
+
+class DiskVectorArray:
+	"""An append-only array of 3d vectors which is spilled to a temporary file on disk instead of being kept in memory.
+	Appended vectors are buffered and written in blocks. Once `finish` is called, the array is read back through a memory map
+	and indexing returns (x, y, z) tuples."""
+
+	buffer_size = 65536
+
+	def __init__(self, scratch_dir=None):
+		"""`scratch_dir` is the directory the temporary file is created in. Defaults to the system's temporary directory."""
+		self._file = tempfile.TemporaryFile(dir=scratch_dir)
+		self._buffer = array('d')
+		self._length = 0
+		self._map = None
+		self._values = None
+
+	def __len__(self):
+		return self._length
 
+	def append(self, x, y, z):
+		"""Adds a vector to the end of the array. Only allowed before `finish` is called."""
+		self._buffer.extend((x, y, z))
+		self._length += 1
+		if len(self._buffer) >= 3 * self.buffer_size:
+			self._buffer.tofile(self._file)
+			self._buffer = array('d')
+
+	def finish(self):
+		"""Writes any buffered vectors and maps the file into memory for reading."""
+		self._buffer.tofile(self._file)
+		self._buffer = array('d')
+		self._file.flush()
+		if self._length > 0:
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+			self._values = memoryview(self._map).cast('d')
+
+	def __getitem__(self, ind):
+		i = 3 * ind
+		return (self._values[i], self._values[i + 1], self._values[i + 2])
+
+	def close(self):
+		"""Releases the memory map and deletes the temporary file."""
+		if self._values is not None:
+			self._values.release()
+			self._map.close()
+			self._values = None
+			self._map = None
+		self._file.close()
+
+def parse_obj_vertex(entry):
+	"""Parses the arguments of an OBJ vertex element, split into `entry`, into an (x, y, z) tuple, applying the optional scale factor."""
+	if len(entry) < 4:
+		raise IndexError("parse_obj: Too few vertex arguments in file. File may be malformed. Aborting parse.")
+	scale = float(entry[4]) if len(entry) >= 5 else 1
+	return (float(entry[1]) / scale, float(entry[2]) / scale, float(entry[3]) / scale)
+
+def parse_obj_normal(entry):
+	"""Parses the arguments of an OBJ vertex normal element, split into `entry`, into an (x, y, z) tuple.
+	Invalid normals are given as a tuple of NaN values so that later normals keep their index."""
+	try:
+		normal = [float(arg) for arg in entry[1:]]
+	except ValueError:
+		normal = []
+	if len(normal) == 3:
+		return tuple(normal)
+	elif len(normal) == 4:
+		return (normal[0] / normal[3], normal[1] / normal[3], normal[2] / normal[3])
+	return (math.nan, math.nan, math.nan)
+
+def iter_obj_facet_chunks(file_path, chunk_size=65536, scratch_dir=None):
+	"""Reads an OBJ file out-of-core, yielding its faces as lists of up to `chunk_size` instances of MeshFacetPFV.
+	The first pass spills every vertex and vertex normal to memory-mapped files in `scratch_dir`, so they are never held in memory as instances of Vector3.
+	The second pass collects the faces a chunk at a time and resolves each chunk's vertex indexes against the memory-mapped vertices in ascending order.
+	Only geometry is read. Texture coordinates, colors, and other tags are ignored."""
+	ptn_arg_split = re.compile(r'\s+')
+	vertices = DiskVectorArray(scratch_dir)
+	normals = DiskVectorArray(scratch_dir)
+	try:
+		with open(file_path, 'rt') as fp:
+			# First pass: spill vertices and normals to disk.
+			for line in fp:
+				if not line.startswith('v'):
+					continue
+				entry = ptn_arg_split.split(line.strip())
+				if entry[0] == 'v':
+					vertices.append(*parse_obj_vertex(entry))
+				elif entry[0] == 'vn':
+					normals.append(*parse_obj_normal(entry))
+			vertices.finish()
+			normals.finish()
+
+			# Second pass: resolve the faces against the spilled vertices a chunk at a time.
+			fp.seek(0)
+			vertex_count = 0
+			normal_count = 0
+			chunk = []
+			for line in fp:
+				if not line.startswith('v') and not line.startswith('f'):
+					continue
+				entry = ptn_arg_split.split(line.strip())
+				if entry[0] == 'v':
+					vertex_count += 1
+					continue
+				elif entry[0] == 'vn':
+					normal_count += 1
+					continue
+				elif entry[0] != 'f':
+					continue
+				vertex_ind, _, normal_ind = parse_face_entry(entry, vertex_count, 0, normal_count)
+				chunk.append((vertex_ind, normal_ind))
+				if len(chunk) >= chunk_size:
+					yield resolve_obj_chunk(chunk, vertices, normals)
+					chunk = []
+			if chunk:
+				yield resolve_obj_chunk(chunk, vertices, normals)
 	except FileNotFoundError:
-		raise FileNotFoundError(f'parse_obj: Failed to locate file "{file_path}" in the current directory.')
\ No newline at end of file
+		raise FileNotFoundError(f'parse_obj: Failed to locate file "{file_path}" in the current directory.')
+	finally:
+		vertices.close()
+		normals.close()
+
+def resolve_obj_chunk(chunk, vertices, normals):
+	"""Converts a list of `(vertex indexes, normal indexes)` faces into instances of MeshFacetPFV.
+	`vertices` and `normals` are indexable sequences of (x, y, z) tuples, such as instances of DiskVectorArray, where invalid normals hold NaN values."""
+	# Fetch each vertex used by the chunk only once, in file order, so the memory map is read sequentially.
+	used_vertices = sorted({ind for vertex_ind, _ in chunk for ind in vertex_ind})
+	positions = {ind: Vector3(*vertices[ind]) for ind in used_vertices}
+	normal_count = len(normals)
+	facets = []
+	for vertex_ind, normal_ind in chunk:
+		face_vertices = [positions[ind] for ind in vertex_ind]
+		given_normals = []
+		for ind in normal_ind:
+			if ind is not None and 0 <= ind < normal_count:
+				normal = normals[ind]
+				if not math.isnan(normal[0]):
+					given_normals.append(Vector3(*normal))
+		facets.append(MeshFacetPFV(face_vertices, polygon_normal(face_vertices, given_normals)))
+	return facets
@@ -1,91 +1,163 @@
 import re
+import os
 from struct import unpack, error as StructError
 from vector3 import Vector3
 from mesh import MeshFacetPFV, MeshPFV
+from progress import track, UPDATE_EVERY
 
 def parse_exp(sign, mantissa, e_sign, exponent):
 	return (-1 if sign == '-' else 1) * float(mantissa) * (10 ** ((-1 if e_sign == '-' else 1) * int(exponent)))
 
-def parse_txt_stl(file_path):
+ptn_solid = re.compile(r'\s*solid\s+(\S+)\s*')
+ptn_num_notation = re.compile(r'([+\-]?)(\d+(?:\.\d+)?)e([+\-]?)(\d+)')
+ptn_facet_normal = re.compile(r'\s*facet\s+normal\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s*')
+ptn_vertex = re.compile(r'\s*vertex\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s*')
+ptn_endfacet = re.compile(r'\s*endfacet\s*')
+
+def given_facet_normal(given_normal):
+	"""Returns the normal provided by an STL file, normalized, for use as a facet's normal.
+	Returns None for zero normals, which many exporters write instead of a real normal, so the normal is calculated from the vertices instead."""
+	if given_normal.mag() == 0:
+		return None
+	return given_normal.norm()
+
+def iter_txt_stl_facets(lines, given_normals=False):
+	"""Decodes the facets from an iterable of lines of a text STL file, not including the opening `solid` line.
+	Yields each facet as a MeshFacetPFV once its `endfacet` line is reached.
+	Facet normals are calculated from the vertices when first needed, unless `given_normals` is set, in which case the file's normals are used."""
+	current_face = None
+	for line in lines:
+		if (match := ptn_facet_normal.fullmatch(line)) is not None:
+			x = parse_exp(*ptn_num_notation.fullmatch(match.group(1)).group(1,2,3,4))
+			y = parse_exp(*ptn_num_notation.fullmatch(match.group(2)).group(1,2,3,4))
+			z = parse_exp(*ptn_num_notation.fullmatch(match.group(3)).group(1,2,3,4))
+			normal = Vector3(x, y, z)
+			current_face = {'vertices': [], 'given_normal': normal}
+		elif (match := ptn_vertex.fullmatch(line)) is not None:
+			x = parse_exp(*ptn_num_notation.fullmatch(match.group(1)).group(1,2,3,4))
+			y = parse_exp(*ptn_num_notation.fullmatch(match.group(2)).group(1,2,3,4))
+			z = parse_exp(*ptn_num_notation.fullmatch(match.group(3)).group(1,2,3,4))
+			vertex = Vector3(x, y, z)
+			current_face['vertices'].append(vertex)
+		elif ptn_endfacet.fullmatch(line) is not None:
+			if len(current_face['vertices']) < 3:
+				raise IndexError('iter_txt_stl_facets: Facet has fewer than three vertices.')
+			normal = given_facet_normal(current_face['given_normal']) if given_normals else None
+			yield MeshFacetPFV(current_face['vertices'], normal, data={'given_normal': current_face['given_normal']})
+		else:
+			pass # Do nothing. Properly formatted STL files include both blank lines and extraneous semantic lines that can be safely ignored.
+
+def parse_txt_stl(file_path, given_normals=False, progress=None, token=None):
 	meta = {'format': 'stl', 'type': 'text'}
-	facets = []
+	mesh = MeshPFV([], meta)
+	mesh.attributes.add_channel('given_normal', 'vector', 'd')
 	try:
 		with open(file_path, 'rt') as fp:
-			ptn_solid = re.compile(r'\s*solid\s+(\S+)\s*')
-			ptn_num_notation = re.compile(r'([+\-]?)(\d+(?:\.\d+)?)e([+\-]?)(\d+)')
-			ptn_facet_normal = re.compile(r'\s*facet\s+normal\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s*')
-			ptn_vertex = re.compile(r'\s*vertex\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s+([+\-]?\d+(?:\.\d+)?e[+\-]?\d+)\s*')
-			ptn_endfacet = re.compile(r'\s*endfacet\s*')
-
-			current_face = None
-
+			tracker = track(progress, token, os.fstat(fp.fileno()).st_size)
 			meta['name'] = ptn_solid.fullmatch(fp.readline()).group(1)
-			
-			for line in fp:
-				if (match := ptn_facet_normal.fullmatch(line)) is not None:
-					x = parse_exp(*ptn_num_notation.fullmatch(match.group(1)).group(1,2,3,4))
-					y = parse_exp(*ptn_num_notation.fullmatch(match.group(2)).group(1,2,3,4))
-					z = parse_exp(*ptn_num_notation.fullmatch(match.group(3)).group(1,2,3,4))
-					normal = Vector3(x, y, z)
-					current_face = {'vertices': [], 'normal': Vector3(0,0,0), 'given_normal': normal}
-				elif (match := ptn_vertex.fullmatch(line)) is not None:
-					x = parse_exp(*ptn_num_notation.fullmatch(match.group(1)).group(1,2,3,4))
-					y = parse_exp(*ptn_num_notation.fullmatch(match.group(2)).group(1,2,3,4))
-					z = parse_exp(*ptn_num_notation.fullmatch(match.group(3)).group(1,2,3,4))
-					vertex = Vector3(x, y, z)
-					current_face['vertices'].append(vertex)
-				elif ptn_endfacet.fullmatch(line) is not None:
-					current_face['normal'] = (current_face['vertices'][1] - current_face['vertices'][0]).cross(current_face['vertices'][2] - current_face['vertices'][0])
-					if current_face['normal'].mag() > 0:
-						current_face['normal'] = current_face['normal'].norm()
-					facets.append(MeshFacetPFV(current_face['vertices'], current_face['normal'], data={'given_normal': current_face['given_normal']}))
-				else:
-					pass # Do nothing. Properly formatted STL files include both blank lines and extraneous semantic lines that can be safely ignored.
+			for facet_ind, facet in enumerate(iter_txt_stl_facets(fp, given_normals)):
+				if tracker is not None and facet_ind % UPDATE_EVERY == 0:
+					tracker.update(fp.buffer.tell())
+				mesh.add_facet(facet)
+			if tracker is not None:
+				tracker.finish()
 	except FileNotFoundError:
 		raise FileNotFoundError(f'parse_txt_stl: Failed to locate file "{file_path}" in the current directory.')
 	except AttributeError:
 		raise AttributeError(f'parse_txt_stl: Failed parsing file "{file_path}". File may be malformed.')
 	except IndexError:
 		raise IndexError(f'parse_txt_stl: Failed parsing file "{file_path}". File may be malformed.')
-	return MeshPFV(facets, meta)
+	return mesh
+
+# A struct format which unpacks only the nine vertex coordinates of a 50 byte binary STL facet, skipping its normal and attribute.
+BIN_STL_TRIANGLE = '<12x9f2x'
+
+def unpack_bin_facet(facet_bin, given_normals=False):
+	"""Decodes the 50 bytes of a single binary STL facet into a MeshFacetPFV.
+	The facet's normal is calculated from the vertices when first needed, unless `given_normals` is set, in which case the file's normal is used."""
+	ni, nj, nk, v1x, v1y, v1z, v2x, v2y, v2z, v3x, v3y, v3z, color = unpack('<ffffffffffffH', facet_bin)
+	given_normal = Vector3(ni, nj, nk)
+	vector1 = Vector3(v1x, v1y, v1z)
+	vector2 = Vector3(v2x, v2y, v2z)
+	vector3 = Vector3(v3x, v3y, v3z)
+	normal = given_facet_normal(given_normal) if given_normals else None
+	return MeshFacetPFV([vector1, vector2, vector3], normal, data={'given_normal': given_normal,'color_data': color})
+
+def unpack_bin_facets(facets_bin, given_normals=False):
+	"""Decodes a buffer holding any number of consecutive 50 byte binary STL facets, yielding each as a MeshFacetPFV."""
+	for i in range(0, len(facets_bin) - 49, 50):
+		yield unpack_bin_facet(facets_bin[i:i + 50], given_normals)
+
+def bin_stl_facet_count(file_path):
+	"""Reads the number of facets declared in the header of a binary STL file without reading the facets."""
+	try:
+		with open(file_path, 'rb') as fp:
+			fp.seek(80)
+			return unpack('<I', fp.read(4))[0]
+	except FileNotFoundError:
+		raise FileNotFoundError(f'bin_stl_facet_count: Failed to locate file "{file_path}" in the current directory.')
+	except StructError:
+		raise StructError(f'bin_stl_facet_count: Failed to unpack facet count in "{file_path}". File may be malformed.')
+
+def sample_bin_stl(file_path, facet_indices):
+	"""Reads only the facets at the given indexes of a binary STL file by seeking directly to each one.
+	Yields a MeshFacetPFV for each index in the order of `facet_indices`, so the caller may stop reading at any point."""
+	try:
+		with open(file_path, 'rb') as fp:
+			for facet_ind in facet_indices:
+				fp.seek(84 + 50 * facet_ind)
+				facet_bin = fp.read(50)
+				if len(facet_bin) < 50:
+					raise EOFError(f'sample_bin_stl: Reached end-of-file before reading facet {facet_ind} in "{file_path}". File may be malformed.')
+				yield unpack_bin_facet(facet_bin)
+	except FileNotFoundError:
+		raise FileNotFoundError(f'sample_bin_stl: Failed to locate file "{file_path}" in the current directory.')
+	except StructError:
+		raise StructError(f'sample_bin_stl: Failed to unpack facet in "{file_path}". File may be malformed.')
 
-def parse_bin_stl(file_path):
+def parse_bin_stl(file_path, given_normals=False, progress=None, token=None):
 	meta = {'format': 'stl', 'type': 'binary'}
-	facets = []
+	# Binary files store single precision normals and 16 bit attributes, so the channels are declared to match.
+	mesh = MeshPFV([], meta)
+	mesh.attributes.add_channel('given_normal', 'vector', 'f')
+	mesh.attributes.add_channel('color_data', 'scalar', 'H')
 
 	try:
 		with open(file_path, 'rb') as fp:
 			meta['header'] = fp.read(80) # 80 byte header, generally ignored
 			facet_count = unpack('<I', fp.read(4))[0] # 4-byte little-endian unsigned integer indicating the number of triangular facets
-			for _ in range(facet_count):
+			tracker = track(progress, token, 84 + 50 * facet_count)
+			for facet_ind in range(facet_count):
+				if tracker is not None and facet_ind % UPDATE_EVERY == 0:
+					tracker.update(84 + 50 * facet_ind)
 				facet_bin = fp.read(50) # Each facet occupies exactly 50 bytes.
 				if not facet_bin:
 					raise EOFError(f'parse_bin_stl: Reached end-of-file before reading the provided number of facets in "{file_path}". File may be malformed.')
-				ni, nj, nk, v1x, v1y, v1z, v2x, v2y, v2z, v3x, v3y, v3z, color = unpack('ffffffffffffH', facet_bin)
-				given_normal = Vector3(ni, nj, nk)
-				vector1 = Vector3(v1x, v1y, v1z)
-				vector2 = Vector3(v2x, v2y, v2z)
-				vector3 = Vector3(v3x, v3y, v3z)
-				normal = (vector2 - vector1).cross(vector3 - vector1)
-				if normal.mag() > 0:
-					normal = normal.norm()
-				facets.append(MeshFacetPFV([vector1, vector2, vector3], normal, data={'given_normal': given_normal,'color_data': color}))
+				mesh.add_facet(unpack_bin_facet(facet_bin, given_normals))
+			if tracker is not None:
+				tracker.finish()
 	except FileNotFoundError:
 		raise FileNotFoundError(f'parse_bin_stl: Failed to locate file "{file_path}" in the current directory.')
 	except StructError:
 		raise StructError(f'parse_bin_stl: Failed to unpack facet in "{file_path}". File may be malformed.')
 
-	return MeshPFV(facets, meta)
+	return mesh
 
-def parse_stl(file_path):
+def is_text_stl(file_path):
+	"""Determines if the given STL file is in text format rather than binary format."""
 	try:
 		fp = open(file_path, 'rb')
 		is_text = fp.read(5) == b'solid'
 		fp.close()
 	except FileNotFoundError:
 		raise FileNotFoundError(f'parse_stl: Failed to locate file "{file_path}" in the current directory.')
+	return is_text
 
-	if is_text:
-		return parse_txt_stl(file_path)
+def parse_stl(file_path, given_normals=False, progress=None, token=None):
+	"""Parses a text or binary STL file into a MeshPFV.
+	If a `progress` callback is given, it is called with a Progress counting the bytes parsed at most twice a second, and if a CancelToken is given
+	as `token`, it is checked every few thousand facets and raises Cancelled once cancelled."""
+	if is_text_stl(file_path):
+		return parse_txt_stl(file_path, given_normals, progress, token)
 	else:
-		return parse_bin_stl(file_path)
\ No newline at end of file
+		return parse_bin_stl(file_path, given_normals, progress, token)
\ No newline at end of file
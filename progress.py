@@ -0,0 +1,113 @@
+import time
+import threading
+
+class Cancelled(Exception):
+	"""Raised by long running functions when their CancelToken is cancelled or its deadline passes."""
+	pass
+
+class CancelToken:
+	"""A flag which asks a long running parse or measurement to stop. It is checked between chunks of work, which then raise Cancelled.
+	The token may be cancelled from any thread, or given a `deadline` as a `time.monotonic()` value after which it counts as cancelled.
+	If a `parent` token is given, the token also counts as cancelled once its parent is, while cancelling the token leaves its parent alone."""
+
+	def __init__(self, deadline=None, parent=None):
+		self.deadline = deadline
+		self.parent = parent
+		self._event = threading.Event()
+
+	def cancel(self):
+		"""Asks every function checking the token to stop."""
+		self._event.set()
+
+	@property
+	def cancelled(self):
+		"""Determines if the token has been cancelled or its deadline has passed."""
+		if self.parent is not None and self.parent.cancelled:
+			return True
+		return self._event.is_set() or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+	def check(self):
+		"""Raises Cancelled if the token has been cancelled or its deadline has passed."""
+		if self.parent is not None:
+			self.parent.check()
+		if self.cancelled:
+			raise Cancelled('CancelToken.check: Operation was cancelled.' if self._event.is_set() else 'CancelToken.check: Deadline passed.')
+
+class Progress:
+	"""Tracks how much of a long running parse or measurement is done and reports it to a callback at most once every `interval` seconds.
+	`total` is the amount of work in `unit`s, `'bytes'` or `'facets'`, or None if it is not known. The callback is called with the Progress
+	instance, whose `done`, `total`, `fraction`, `elapsed`, and `eta` describe the work so far. If a CancelToken is given, it is checked on
+	every update."""
+
+	def __init__(self, callback=None, total=None, unit='bytes', token=None, interval=0.5):
+		self.callback = callback
+		self.total = total
+		self.unit = unit
+		self.token = token
+		self.interval = interval
+		self.done = 0
+		self.start_time = time.monotonic()
+		self.report_time = self.start_time
+
+	@property
+	def elapsed(self):
+		"""The number of seconds since the work started."""
+		return time.monotonic() - self.start_time
+
+	@property
+	def fraction(self):
+		"""The fraction of the work done, or None if the total is not known."""
+		if not self.total:
+			return None
+		return min(1.0, self.done / self.total)
+
+	@property
+	def eta(self):
+		"""The estimated number of seconds left, assuming the rest of the work goes at the same rate, or None if it cannot be estimated."""
+		fraction = self.fraction
+		if not fraction:
+			return None
+		return self.elapsed * (1 - fraction) / fraction
+
+	def update(self, done):
+		"""Records that `done` units of work are finished, checks the token, and calls the callback if `interval` seconds have passed since it was last called."""
+		self.done = done
+		if self.token is not None:
+			self.token.check()
+		if self.callback is not None:
+			now = time.monotonic()
+			if now - self.report_time >= self.interval:
+				self.report_time = now
+				self.callback(self)
+
+	def finish(self, done=None):
+		"""Records that the work is finished and calls the callback a final time."""
+		if done is not None:
+			self.done = done
+		elif self.total is not None:
+			self.done = self.total
+		if self.callback is not None:
+			self.report_time = time.monotonic()
+			self.callback(self)
+
+# The number of lines, facets, or other items processed between updates, which keeps the cost of checking negligible.
+UPDATE_EVERY = 4096
+
+def track(callback=None, token=None, total=None, unit='bytes'):
+	"""Returns a Progress for the given callback and token, or None if neither is given so that callers can skip tracking entirely."""
+	if callback is None and token is None:
+		return None
+	return Progress(callback, total, unit, token)
+
+def tracked(items, tracker, start=0):
+	"""Yields the items of an iterable, updating the tracker with the number of items yielded, plus `start`, every UPDATE_EVERY items.
+	If `tracker` is None, the iterable is returned unchanged."""
+	if tracker is None:
+		return items
+	return _tracked(items, tracker, start)
+
+def _tracked(items, tracker, start):
+	for count, item in enumerate(items, start):
+		if count % UPDATE_EVERY == 0:
+			tracker.update(count)
+		yield item
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from aio import measure_file_async, parse_file_async, measure_mesh_async
+from progress import CancelToken, Cancelled
+from test_bvh import corner_cube_mesh
+from test_mmesh import write_bin_stl, write_txt_stl
+from test_parse_obj import CUBE_OBJ, write_obj
+
+def test_measure_file_async(tmp_path):
+	bin_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(bin_path, corner_cube_mesh())
+	txt_path = str(tmp_path / 'cube_text.stl')
+	write_txt_stl(txt_path, corner_cube_mesh())
+	obj_path = write_obj(tmp_path, CUBE_OBJ)
+
+	async def measure_all():
+		# Chunks of a few facets split the files many times, while the semaphore lets only two files be measured at once.
+		semaphore = asyncio.Semaphore(2)
+		reports = []
+		with ThreadPoolExecutor(2) as executor:
+			results = await asyncio.gather(
+				measure_file_async(bin_path, volume=True, area=True, length=True, executor=executor, semaphore=semaphore, chunk_bytes=120),
+				measure_file_async(txt_path, volume=True, area=True, length=True, executor=executor, semaphore=semaphore, chunk_bytes=300,
+					progress=lambda progress: reports.append(progress.fraction)),
+				measure_file_async(obj_path, volume=True, area=True, executor=executor, semaphore=semaphore),
+			)
+		return results, reports
+
+	(bin_result, txt_result, obj_result), reports = asyncio.run(measure_all())
+	for result in (bin_result, txt_result):
+		assert result['facet_count'] == 12
+		assert result['volume'] == pytest.approx(1.0)
+		assert result['area'] == pytest.approx(6.0)
+		assert result['bounds'] == ((0, 0, 0), (1, 1, 1))
+	assert reports[-1] == 1.0
+	assert obj_result['facet_count'] == 6
+	assert obj_result['volume'] == pytest.approx(8.0)
+
+def test_parse_and_measure_mesh_async(tmp_path):
+	obj_path = write_obj(tmp_path, CUBE_OBJ)
+
+	async def parse_and_measure():
+		mesh = await parse_file_async(obj_path)
+		return await measure_mesh_async(mesh, volume=True, length=True)
+
+	meta = asyncio.run(parse_and_measure())
+	assert meta['volume'] == pytest.approx(8.0)
+	assert meta['x_length'] == pytest.approx(2.0)
+
+def test_measure_file_async_cancelled(tmp_path):
+	bin_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(bin_path, corner_cube_mesh())
+	token = CancelToken()
+	token.cancel()
+	with pytest.raises(Cancelled):
+		asyncio.run(measure_file_async(bin_path, volume=True, token=token))
+	with pytest.raises(Cancelled):
+		asyncio.run(measure_file_async(write_obj(tmp_path, CUBE_OBJ), volume=True, token=token))
+
+	async def cancel_task():
+		# Cancelling the task stops a thread parsing the file through its own token, leaving the caller's token alone.
+		own_token = CancelToken()
+		task = asyncio.create_task(parse_file_async(bin_path, token=own_token))
+		task.cancel()
+		with pytest.raises(asyncio.CancelledError):
+			await task
+		return own_token
+
+	assert not asyncio.run(cancel_task()).cancelled
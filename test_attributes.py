@@ -0,0 +1,59 @@
+from vector3 import Vector3
+from mesh import MeshPFV, MeshFacetPFV, MeshFacet
+from attributes import FacetAttributes
+from parse_obj import parse_obj
+from test_parse_obj import CUBE_OBJ, write_obj
+
+def triangle(dz=0):
+	return [Vector3(0,0,dz), Vector3(1,0,dz), Vector3(0,1,dz)]
+
+def test_facet_data_default_not_shared():
+	facet1 = MeshFacet(triangle())
+	facet2 = MeshFacet(triangle())
+	facet1.data('color_data', 5)
+	assert 'color_data' not in facet2.data()
+
+def test_facet_data_view():
+	mesh = MeshPFV([
+		MeshFacetPFV(triangle(0), data={'given_normal': Vector3(0,0,1), 'color_data': 3}),
+		MeshFacetPFV(triangle(1), data={'given_normal': None}),
+	])
+	assert set(mesh.attributes.channels) == {'given_normal', 'color_data'}
+	assert mesh.attributes.channels['given_normal'].kind == 'vector'
+	assert mesh.attributes.channels['color_data'].kind == 'scalar'
+
+	first, second = mesh.facets
+	assert first.data('given_normal').z == 1
+	assert first.data('color_data') == 3
+	assert second.data() == {'given_normal': None}
+	second.data()['color_data'] = 4
+	assert dict(second.data()) == {'given_normal': None, 'color_data': 4}
+	del first.data()['color_data']
+	assert 'color_data' not in first.data()
+
+	# Values which do not fit the channel's array widen it to plain objects.
+	second.data('color_data', 'red')
+	assert mesh.attributes.channels['color_data'].kind == 'object'
+	assert second.data('color_data') == 'red'
+
+def test_facet_data_copied_between_meshes():
+	mesh1 = MeshPFV([MeshFacetPFV(triangle(), data={'color_data': 1})])
+	mesh2 = MeshPFV(mesh1.facets)
+	mesh2.facet(0).data('color_data', 2)
+	assert mesh1.facet(0).data('color_data') == 1
+	assert mesh2.facet(0).data('color_data') == 2
+
+def test_ragged_channel():
+	attributes = FacetAttributes()
+	rows = [attributes.add_row({'texture': value}) for value in ([0, 1, 2], [None, 4], [])]
+	assert attributes.channels['texture'].kind == 'list'
+	assert [attributes.get(row, 'texture') for row in rows] == [[0, 1, 2], [None, 4], []]
+	attributes.set(rows[2], 'texture', [7, None, 8, 9])
+	assert attributes.get(rows[2], 'texture') == [7, None, 8, 9]
+	assert attributes.get(rows[0], 'texture') == [0, 1, 2]
+
+def test_parse_obj_attributes(tmp_path):
+	mesh = parse_obj(write_obj(tmp_path, CUBE_OBJ))
+	assert mesh.attributes.channels['given_normal'].kind == 'list'
+	assert mesh.facet(0).data('given_normal') == [0, 0, 0, 0]
+	assert mesh.facet(3).data('texture') == [None, None, None, None]
@@ -0,0 +1,30 @@
+import json
+from batch import run_manifest, read_checkpoint
+from test_parse_obj import CUBE_OBJ
+from pytest import approx
+
+def test_run_manifest_resumes(tmp_path):
+	paths = []
+	for name in ('a.obj', 'b.obj', 'c.obj'):
+		file_path = tmp_path / name
+		file_path.write_text(CUBE_OBJ)
+		paths.append(str(file_path))
+	manifest_path = tmp_path / 'manifest.jsonl'
+	manifest_path.write_text('\n'.join(json.dumps({'id': i, 'path': path}) for i, path in enumerate(paths)) + '\n' + json.dumps({'path': 'missing.stl'}) + '\n')
+	output_path = str(tmp_path / 'results.jsonl')
+
+	# Simulate an earlier run which completed the first entry and was killed while recording the second.
+	with open(output_path + '.checkpoint', 'w') as fp:
+		fp.write('0\n1')
+	assert read_checkpoint(output_path + '.checkpoint') == {0}
+
+	assert run_manifest(str(manifest_path), output_path, workers=2) == 3
+	assert run_manifest(str(manifest_path), output_path, workers=2) == 0
+	with open(output_path) as fp:
+		results = [json.loads(line) for line in fp]
+	assert sorted(str(result['id']) for result in results) == ['1', '2', 'missing.stl']
+	for result in results:
+		if result['id'] == 'missing.stl':
+			assert result['error'].startswith('FileNotFoundError')
+		else:
+			assert 8.0 == approx(result['volume'], abs=0.0001)
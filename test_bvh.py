@@ -0,0 +1,49 @@
+from vector3 import Vector3
+from mesh import MeshPFV, MeshFacetPFV
+from bvh import BVH
+from pytest import approx
+
+def corner_cube_mesh():
+	return MeshPFV([
+		MeshFacetPFV([Vector3(1,1,1), Vector3(1,0,1), Vector3(1,1,0)], Vector3(1,0,0)),
+		MeshFacetPFV([Vector3(1,0,0), Vector3(1,1,0), Vector3(1,0,1)], Vector3(1,0,0)),
+
+		MeshFacetPFV([Vector3(0,1,1), Vector3(0,1,0), Vector3(0,0,1)], Vector3(-1,0,0)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,0,1), Vector3(0,1,0)], Vector3(-1,0,0)),
+
+		MeshFacetPFV([Vector3(1,1,1), Vector3(1,1,0), Vector3(0,1,1)], Vector3(0,1,0)),
+		MeshFacetPFV([Vector3(0,1,0), Vector3(0,1,1), Vector3(1,1,0)], Vector3(0,1,0)),
+
+		MeshFacetPFV([Vector3(1,0,1), Vector3(0,0,1), Vector3(1,0,0)], Vector3(0,-1,0)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(1,0,0), Vector3(0,0,1)], Vector3(0,-1,0)),
+
+		MeshFacetPFV([Vector3(1,1,1), Vector3(0,1,1), Vector3(1,0,1)], Vector3(0,0,1)),
+		MeshFacetPFV([Vector3(0,0,1), Vector3(1,0,1), Vector3(0,1,1)], Vector3(0,0,1)),
+
+		MeshFacetPFV([Vector3(1,1,0), Vector3(1,0,0), Vector3(0,1,0)], Vector3(0,0,-1)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,1,0), Vector3(1,0,0)], Vector3(0,0,-1)),
+	])
+
+def test_bvh_contains():
+	bvh = BVH(corner_cube_mesh(), leaf_size=2)
+	inside = bvh.contains([(0.5,0.5,0.5), (0.1,0.9,0.2), (1.5,0.5,0.5), Vector3(-0.1,0.5,0.5), (0.5,0.5,2)])
+	assert list(inside) == [1, 1, 0, 0, 0]
+
+def test_bvh_ray_cast():
+	bvh = BVH(corner_cube_mesh(), leaf_size=2)
+	distances, facets = bvh.ray_cast([(0.25,0.5,-1), (0.5,0.5,0.5), (3,3,3)], [(0,0,1), (1,0,0), (1,0,0)])
+	assert distances[0] == approx(1.0)
+	assert facets[0] in (10, 11)
+	assert distances[1] == approx(0.5)
+	assert facets[1] in (0, 1)
+	assert facets[2] == -1
+
+def test_bvh_nearest_facet():
+	bvh = BVH(corner_cube_mesh(), leaf_size=2)
+	distances, facets, points = bvh.nearest_facet([(0.5,0.5,1.25), (0.5,0.4,0.5), (2,2,2)])
+	assert distances[0] == approx(0.25)
+	assert facets[0] in (8, 9)
+	assert points[0] == approx((0.5,0.5,1))
+	assert distances[1] == approx(0.4)
+	assert facets[1] in (6, 7)
+	assert distances[2] == approx(3 ** 0.5)
@@ -0,0 +1,62 @@
+from vector3 import Vector3
+from mesh import MeshFacetPFV, MeshIV
+from mmesh import measure_mesh
+from parse_obj import parse_obj
+from test_bvh import corner_cube_mesh
+from test_parse_obj import CUBE_OBJ, write_obj
+from pytest import approx, raises
+
+def test_remove_facets_and_compact():
+	mesh = corner_cube_mesh()
+	for facet_ind, facet in enumerate(mesh.facets):
+		facet.data('index', facet_ind)
+	degenerate = MeshFacetPFV([Vector3(0,0,0), Vector3(0,0,0), Vector3(0,0,0)], data={'index': 12})
+	mesh.add_facet(degenerate, 4)
+
+	removed = mesh.remove_facet(4)
+	assert removed is degenerate
+	assert removed.data() == {'index': 12}
+	assert len(mesh) == 12
+	assert mesh.slot_count == 13
+	assert mesh.facet(4) is None
+	assert mesh.facet(5).data('index') == 4
+	with raises(IndexError):
+		mesh.remove_facet(4)
+	mesh.remove_facet(0)
+	assert len(list(mesh)) == 11
+
+	facet_map, vertex_map = mesh.compact()
+	assert vertex_map is None
+	assert list(facet_map) == [-1, 0, 1, 2, -1] + list(range(3, 11))
+	assert mesh.slot_count == 11
+	assert mesh.attributes.row_count == 11
+	assert [facet.data('index') for facet in mesh] == list(range(1, 12))
+
+def test_remove_vertices_and_compact(tmp_path):
+	mesh = parse_obj(write_obj(tmp_path, CUBE_OBJ + 'v 9 9 9\n'))
+	mesh.meta['lines'] = [[0, 8, 1]]
+	mesh.remove_vertex(8)
+	mesh.remove_vertex(0)
+	assert len(mesh.vertices) == 9
+	# Facets 0, 2 and 5 use the first vertex, so they are skipped until the mesh is compacted.
+	assert len(mesh) == 3
+	assert [facet.vertex_indices for facet in mesh] == [[4, 5, 6, 7], [1, 2, 6, 5], [2, 3, 7, 6]]
+	measure_mesh(mesh, volume=True, area=True, length=True)
+	assert mesh.meta['area'] == approx(12)
+	assert mesh.meta['x_length'] == approx(2)
+	facet_map, vertex_map = mesh.compact()
+	assert list(vertex_map) == [-1, 0, 1, 2, 3, 4, 5, 6, -1]
+	assert list(facet_map) == [-1, 0, -1, 1, 2, -1]
+	assert len(mesh) == 3
+	assert mesh.facet(0).vertex_indices == [3, 4, 5, 6]
+	assert mesh.facet(0).data('given_normal') == [1, 1, 1, 1]
+	assert mesh.meta['lines'] == [[0]]
+
+def test_measure_removed_facets():
+	mesh = MeshIV(corner_cube_mesh().facets + [MeshFacetPFV([Vector3(5,5,5), Vector3(6,5,5), Vector3(5,6,5)], Vector3(0,0,1))])
+	mesh.remove_facet()
+	measure_mesh(mesh, volume=True, area=True, length=True)
+	assert mesh.meta['volume'] == approx(1)
+	assert mesh.meta['x_length'] == approx(1)
+	measure_mesh(mesh, area=True, approximate=True, sample_count=100)
+	assert mesh.meta['area'] == approx(6)
@@ -0,0 +1,63 @@
+from vector3 import Vector3
+from mesh import MeshPFV, MeshFacetPFV, MeshIV, MeshFacet
+from components import label_components, measure_components
+from pytest import approx
+
+def two_cube_facets(facet_class):
+	return [
+		facet_class([Vector3(1,1,1), Vector3(-1,1,1), Vector3(1,-1,1)], Vector3(0,0,1)),
+		facet_class([Vector3(-1,-1,1), Vector3(-1,1,1), Vector3(1,-1,1)], Vector3(0,0,1)),
+		facet_class([Vector3(1,1,-1), Vector3(-1,1,-1), Vector3(1,-1,-1)], Vector3(0,0,-1)),
+		facet_class([Vector3(-1,-1,-1), Vector3(-1,1,-1), Vector3(1,-1,-1)], Vector3(0,0,-1)),
+		facet_class([Vector3(1,1,1), Vector3(-1,1,1), Vector3(1,1,-1)], Vector3(0,1,0)),
+		facet_class([Vector3(-1,1,-1), Vector3(-1,1,1), Vector3(1,1,-1)], Vector3(0,1,0)),
+		facet_class([Vector3(1,-1,1), Vector3(-1,-1,1), Vector3(1,-1,-1)], Vector3(0,-1,0)),
+		facet_class([Vector3(-1,-1,-1), Vector3(-1,-1,1), Vector3(1,-1,-1)], Vector3(0,-1,0)),
+		facet_class([Vector3(1,1,1), Vector3(1,-1,1), Vector3(1,1,-1)], Vector3(1,0,0)),
+		facet_class([Vector3(1,-1,-1), Vector3(1,-1,1), Vector3(1,1,-1)], Vector3(1,0,0)),
+		facet_class([Vector3(-1,1,1), Vector3(-1,-1,1), Vector3(-1,1,-1)], Vector3(-1,0,0)),
+		facet_class([Vector3(-1,-1,-1), Vector3(-1,-1,1), Vector3(-1,1,-1)], Vector3(-1,0,0)),
+
+		facet_class([Vector3(1,1,1), Vector3(1,0,1), Vector3(1,1,0)], Vector3(1,0,0)),
+		facet_class([Vector3(1,0,0), Vector3(1,1,0), Vector3(1,0,1)], Vector3(1,0,0)),
+		facet_class([Vector3(0,1,1), Vector3(0,1,0), Vector3(0,0,1)], Vector3(-1,0,0)),
+		facet_class([Vector3(0,0,0), Vector3(0,0,1), Vector3(0,1,0)], Vector3(-1,0,0)),
+		facet_class([Vector3(1,1,1), Vector3(1,1,0), Vector3(0,1,1)], Vector3(0,1,0)),
+		facet_class([Vector3(0,1,0), Vector3(0,1,1), Vector3(1,1,0)], Vector3(0,1,0)),
+		facet_class([Vector3(1,0,1), Vector3(0,0,1), Vector3(1,0,0)], Vector3(0,-1,0)),
+		facet_class([Vector3(0,0,0), Vector3(1,0,0), Vector3(0,0,1)], Vector3(0,-1,0)),
+		facet_class([Vector3(1,1,1), Vector3(0,1,1), Vector3(1,0,1)], Vector3(0,0,1)),
+		facet_class([Vector3(0,0,1), Vector3(1,0,1), Vector3(0,1,1)], Vector3(0,0,1)),
+		facet_class([Vector3(1,1,0), Vector3(1,0,0), Vector3(0,1,0)], Vector3(0,0,-1)),
+		facet_class([Vector3(0,0,0), Vector3(0,1,0), Vector3(1,0,0)], Vector3(0,0,-1)),
+	]
+
+def offset(facets, dx):
+	for facet in facets:
+		facet.vertices = [Vector3(vertex.x + dx, vertex.y, vertex.z) for vertex in facet.vertices]
+	return facets
+
+def test_components_pfv():
+	facets = two_cube_facets(MeshFacetPFV)
+	mesh = MeshPFV(facets[:12] + offset(facets[12:], 5))
+	labels, count = label_components(mesh)
+	assert count == 2
+	assert list(labels) == [0] * 12 + [1] * 12
+	components = measure_components(mesh, volume=True, area=True, length=True)
+	assert components[0]['volume'] == approx(8.0)
+	assert components[0]['area'] == approx(24.0)
+	assert components[1]['volume'] == approx(1.0)
+	assert components[1]['area'] == approx(6.0)
+	assert components[1]['bounds'] == ((5, 0, 0), (6, 1, 1))
+	assert mesh.meta['components'] is components
+
+def test_components_iv():
+	facets = two_cube_facets(MeshFacet)
+	mesh = MeshIV(facets[:12] + offset(facets[12:], 5), vertices=[])
+	labels, count = label_components(mesh)
+	assert count == 2
+	components = measure_components(mesh, volume=True, length=True)
+	assert components[0]['volume'] == approx(8.0)
+	assert components[1]['volume'] == approx(1.0)
+	assert components[1]['x_length'] == approx(1.0)
+	assert components[0]['facet_count'] == 12
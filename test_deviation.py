@@ -0,0 +1,40 @@
+import math
+import random
+from mesh import MeshPFV
+from deviation import sample_surface, surface_deviation, compare_meshes
+from test_bvh import corner_cube_mesh
+from pytest import approx
+
+def test_sample_surface():
+	# A 2x1 rectangle split into a large and a small triangle, which should get samples in proportion to their areas.
+	coords = [0,0,0, 2,0,0, 2,1,0, 0,0,0, 2,1,0, 1,1,0]
+	points, triangles = sample_surface(coords, 900, random.Random(1))
+	assert len(points) == 3 * 900
+	assert list(triangles).count(0) == approx(600, abs=1)
+	assert all(points[i + 2] == 0 and 0 <= points[i] <= 2 and 0 <= points[i + 1] <= 1 for i in range(0, len(points), 3))
+
+def test_compare_meshes():
+	mesh = corner_cube_mesh()
+	assert compare_meshes(mesh, corner_cube_mesh(), sample_count=200, seed=1)['hausdorff'] == approx(0, abs=1e-12)
+
+	# Raising the top of the box by 0.25 moves the top away from the original, and the sides partly, while the original top is left inside.
+	raised = corner_cube_mesh()
+	raised.scale(1, 1, 1.25)
+	result = compare_meshes(raised, mesh, sample_count=2000, seed=1)
+	assert result['hausdorff'] == approx(0.25, abs=0.01)
+	assert result['max_deviation'] == approx(0.25, abs=0.01)
+	assert result['reverse_max_deviation'] == approx(0.25, abs=0.01)
+	assert 0 < result['mean_deviation'] < result['rms_deviation'] < result['max_deviation']
+	assert result['sample_count'] == 2000
+	deviation = result['facet_deviation']
+	assert len(deviation) == len(raised)
+	assert deviation[8] == approx(0.25)
+	assert deviation[0] <= 0.25 and not math.isnan(deviation[0])
+
+def test_surface_deviation_of_missing_part():
+	# The open box has lost its top, which only shows up from the side of the original.
+	open_box = MeshPFV([facet for facet_ind, facet in enumerate(corner_cube_mesh()) if facet_ind not in (8, 9)])
+	assert surface_deviation(open_box, corner_cube_mesh(), sample_count=500, seed=2)['max_deviation'] == approx(0, abs=1e-12)
+	result = compare_meshes(open_box, corner_cube_mesh(), sample_count=500, seed=2)
+	assert result['reverse_max_deviation'] == approx(0.5, abs=0.05)
+	assert len(result['facet_deviation']) == 10
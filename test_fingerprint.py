@@ -0,0 +1,63 @@
+import re
+import json
+from vector3 import Vector3
+from mesh import MeshPFV, MeshFacetPFV
+from parse_stl import parse_stl
+from parse_obj import parse_obj
+from fingerprint import geometry_fingerprint, FingerprintIndex
+from batch import run_manifest
+from test_parse_obj import CUBE_OBJ, write_obj
+from test_mmesh import write_bin_stl
+
+def triangulated_cube(mesh, offset=0.0):
+	# The quads of the cube split from their smallest vertex, with the facets and the vertices within them in a different order.
+	facets = []
+	for facet in reversed(mesh.facets):
+		points = [Vector3(vertex.x + offset, vertex.y, vertex.z) for vertex in facet.vertices]
+		start = points.index(min(points, key=lambda point: (point.x, point.y, point.z)))
+		points = points[start:] + points[:start]
+		facets.append(MeshFacetPFV([points[2], points[3], points[0]], facet.normal))
+		facets.append(MeshFacetPFV([points[1], points[2], points[0]], facet.normal))
+	return MeshPFV(facets)
+
+def test_fingerprint_ignores_order_and_format(tmp_path):
+	mesh = parse_obj(write_obj(tmp_path, CUBE_OBJ))
+	fingerprint = geometry_fingerprint(mesh)
+	assert geometry_fingerprint(triangulated_cube(mesh)) == fingerprint
+	assert geometry_fingerprint(triangulated_cube(mesh, 1e-9)) == fingerprint
+	assert geometry_fingerprint(triangulated_cube(mesh, 0.5)) != fingerprint
+
+def test_fingerprint_of_exported_copy(tmp_path):
+	# Non-integer coordinates are stored with fewer digits in binary STL files, whose exporter split the quads along the other diagonal.
+	text = re.sub(r'^v (\S+) (\S+) (\S+)$', lambda match: 'v ' + ' '.join(repr(float(value) * 12.3456 + 100.1) for value in match.groups()),
+		CUBE_OBJ, flags=re.M)
+	mesh = parse_obj(write_obj(tmp_path, text))
+	facets = []
+	for facet in mesh:
+		points = facet.vertices
+		facets.append(MeshFacetPFV([points[1], points[2], points[3]], facet.normal))
+		facets.append(MeshFacetPFV([points[1], points[3], points[0]], facet.normal))
+	stl_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(stl_path, MeshPFV(facets))
+	fingerprint = geometry_fingerprint(mesh)
+	assert geometry_fingerprint(parse_stl(stl_path)) == fingerprint
+	assert geometry_fingerprint(triangulated_cube(mesh)) == fingerprint
+	assert geometry_fingerprint(triangulated_cube(mesh, 0.01)) != fingerprint
+
+def test_manifest_index(tmp_path):
+	obj_path = write_obj(tmp_path, CUBE_OBJ)
+	stl_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(stl_path, triangulated_cube(parse_obj(obj_path)))
+	index_path = str(tmp_path / 'index.jsonl')
+	for run, path in enumerate((obj_path, stl_path, obj_path)):
+		manifest_path = tmp_path / f'manifest{run}.jsonl'
+		manifest_path.write_text(json.dumps({'path': path}) + '\n')
+		output_path = str(tmp_path / f'results{run}.jsonl')
+		assert run_manifest(str(manifest_path), output_path, index_path=index_path) == 1
+		with open(output_path) as fp:
+			result = json.loads(fp.readline())
+		assert result.get('cached', False) == (run > 0)
+		assert abs(result['volume'] - 8) < 0.0001
+	index = FingerprintIndex(index_path)
+	assert len(index) == 1
+	assert len(index.fingerprints) == 2
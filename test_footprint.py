@@ -0,0 +1,34 @@
+from vector3 import Vector3
+from mesh import MeshPFV, MeshFacetPFV
+from parse_stl import parse_stl
+from footprint import CATEGORIES, mesh_memory, estimate_file_memory
+from test_mmesh import write_bin_stl, write_txt_stl
+from pytest import approx
+
+def grid_mesh(size):
+	facets = []
+	for i in range(size):
+		for j in range(size):
+			facets.append(MeshFacetPFV([Vector3(i, j, 0), Vector3(i + 1, j, 0), Vector3(i, j + 1, 0)], Vector3(0,0,1)))
+	return MeshPFV(facets)
+
+def test_mesh_memory():
+	mesh = grid_mesh(10)
+	usage = mesh_memory(mesh)
+	assert usage['total'] == sum(usage[category] for category in CATEGORIES)
+	assert usage['vertices'] > 0 and usage['normals'] > 0 and usage['facets'] > 0
+	# Shared vertices are counted once.
+	shared = MeshPFV([MeshFacetPFV(mesh.facet(0).vertices, Vector3(0,0,1)) for _ in range(100)])
+	assert mesh_memory(shared)['vertices'] < usage['vertices'] / 50
+
+def test_estimate_file_memory(tmp_path):
+	mesh = grid_mesh(40)
+	for extension, write in (('stl', write_bin_stl), ('txt.stl', write_txt_stl)):
+		file_path = str(tmp_path / f'grid.{extension}')
+		write(file_path, mesh)
+		actual = mesh_memory(parse_stl(file_path))
+		estimate = estimate_file_memory(file_path, sample_bytes=4096)
+		assert not estimate['exact']
+		assert estimate['facet_count'] == approx(1600, rel=0.05)
+		assert estimate['total'] == approx(actual['total'], rel=0.1)
+		assert estimate_file_memory(file_path, sample_bytes=1 << 30)['exact']
@@ -0,0 +1,49 @@
+import pickle
+from multiprocessing import Pool
+from mmesh import measure_mesh
+from frozen import freeze_mesh, attach_mesh
+from bvh import BVH
+from test_bvh import corner_cube_mesh
+from test_parse_obj import CUBE_OBJ, write_obj
+from parse_obj import parse_obj
+from pytest import approx, raises
+
+def measure_in_worker(frozen):
+	measure_mesh(frozen, volume=True, area=True, length=True)
+	measurements = frozen.meta
+	frozen.close()
+	return measurements
+
+def test_frozen_measure_in_worker():
+	frozen = freeze_mesh(corner_cube_mesh())
+	try:
+		assert len(pickle.dumps(frozen)) < 100
+		with Pool(2) as pool:
+			results = pool.map(measure_in_worker, [frozen, frozen])
+		for measurements in results:
+			assert measurements['volume'] == approx(1)
+			assert measurements['area'] == approx(6)
+			assert measurements['bounds'] == ((0, 0, 0), (1, 1, 1))
+	finally:
+		frozen.close()
+		frozen.unlink()
+
+def test_frozen_read_only(tmp_path):
+	mesh = parse_obj(write_obj(tmp_path, CUBE_OBJ))
+	frozen = freeze_mesh(mesh)
+	try:
+		with attach_mesh(frozen.name) as attached:
+			assert len(attached) == len(mesh)
+			with raises(TypeError):
+				attached.remove_facet(0)
+			with raises(TypeError):
+				attached.vertices[0] = 5
+			measure_mesh(attached, volume=True, area=True, hull=True)
+			measure_mesh(mesh, volume=True, area=True)
+			assert attached.meta['volume'] == approx(mesh.meta['volume'])
+			assert attached.meta['area'] == approx(mesh.meta['area'])
+			assert attached.meta['hull_volume'] == approx(mesh.meta['volume'])
+			assert list(BVH(attached).contains([(4, 0, 0), (0, 0, 0)])) == [1, 0]
+	finally:
+		frozen.close()
+		frozen.unlink()
@@ -0,0 +1,44 @@
+import random
+from array import array
+from mesh import MeshIV
+from mmesh import measure_mesh
+from hull import convex_hull, hull_volume_area, measure_hull
+from test_bvh import corner_cube_mesh
+from pytest import approx
+
+def test_convex_hull_cube_grid():
+	# Every point of a 5x5x5 grid, with many points on the hull's faces and edges.
+	points = [(x / 4, y / 4, z / 4) for x in range(5) for y in range(5) for z in range(5)]
+	random.Random(3).shuffle(points)
+	coords, faces = convex_hull(points)
+	assert len(coords) == 3 * 125
+	assert hull_volume_area(coords, faces) == approx((1, 6))
+	# Every edge of the closed hull is shared by exactly two faces in opposite directions.
+	edges = set()
+	for i in range(0, len(faces), 3):
+		a, b, c = faces[i:i + 3]
+		edges.update(((a, b), (b, c), (c, a)))
+	assert all((v, u) in edges for u, v in edges)
+
+def test_convex_hull_inputs():
+	flat = array('d', [0,0,0, 1,0,0, 0,1,0, 0,0,1, 0.1,0.1,0.1, 0,0,0])
+	assert measure_hull(flat)['hull_volume'] == approx(1 / 6)
+	coords, faces = convex_hull(flat, dedupe=True)
+	assert len(coords) == 15
+	assert len(faces) == 12
+	planar = [(0,0,0), (1,0,0), (0,1,0), (1,1,0)]
+	assert measure_hull(planar) == {'hull_volume': 0, 'hull_area': 0}
+
+def test_measure_mesh_hull():
+	mesh = corner_cube_mesh()
+	mesh.remove_facet(0)
+	measure_mesh(mesh, volume=True, hull=True)
+	assert mesh.meta['hull_volume'] == approx(1)
+	assert mesh.meta['hull_area'] == approx(6)
+	mesh.scale(2)
+	assert mesh.meta['hull_volume'] == approx(8)
+	assert mesh.meta['hull_area'] == approx(24)
+
+	mesh = MeshIV(corner_cube_mesh().facets)
+	measure_mesh(mesh, hull=True)
+	assert mesh.meta['hull_volume'] == approx(1)
@@ -1,6 +1,9 @@
 from vector3 import Vector3
 from mesh import MeshPFV, MeshFacetPFV, MeshIV, MeshFacet
-from mmesh import measure_mesh, face_pyramid_volume
+from mmesh import measure_mesh, face_pyramid_volume, slice_profile, polygon_area, estimate_mesh_file, measure_file_pipelined, measure_bin_stl, measure_triangles
+from struct import pack, iter_unpack
+from array import array
+from parse_stl import parse_stl
 from pytest import approx
 import pytest
 
@@ -193,4 +196,149 @@ def test_mesh_volume_iv():
 	assert 2.0 == approx(offset_cube_mesh.meta['z_length'], abs=0.0001)
 	assert 1.0 == approx(corner_cube_mesh.meta['z_length'], abs=0.0001)
 
+def test_slice_profile():
+	corner_cube_mesh = MeshPFV([
+		MeshFacetPFV([Vector3(1,1,1), Vector3(1,0,1), Vector3(1,1,0)], Vector3(1,0,0)),
+		MeshFacetPFV([Vector3(1,0,0), Vector3(1,1,0), Vector3(1,0,1)], Vector3(1,0,0)),
+		
+		MeshFacetPFV([Vector3(0,1,1), Vector3(0,1,0), Vector3(0,0,1)], Vector3(-1,0,0)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,0,1), Vector3(0,1,0)], Vector3(-1,0,0)),
+
+		MeshFacetPFV([Vector3(1,1,1), Vector3(1,1,0), Vector3(0,1,1)], Vector3(0,1,0)),
+		MeshFacetPFV([Vector3(0,1,0), Vector3(0,1,1), Vector3(1,1,0)], Vector3(0,1,0)),
+		
+		MeshFacetPFV([Vector3(1,0,1), Vector3(0,0,1), Vector3(1,0,0)], Vector3(0,-1,0)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(1,0,0), Vector3(0,0,1)], Vector3(0,-1,0)),
+
+		MeshFacetPFV([Vector3(1,1,1), Vector3(0,1,1), Vector3(1,0,1)], Vector3(0,0,1)),
+		MeshFacetPFV([Vector3(0,0,1), Vector3(1,0,1), Vector3(0,1,1)], Vector3(0,0,1)),
+
+		MeshFacetPFV([Vector3(1,1,0), Vector3(1,0,0), Vector3(0,1,0)], Vector3(0,0,-1)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,1,0), Vector3(1,0,0)], Vector3(0,0,-1)),
+	])
+	areas, perimeters = slice_profile(corner_cube_mesh, [0.5, -1, 0.25, 2, 0.75])
+	assert list(areas) == approx([1.0, 0.0, 1.0, 0.0, 1.0], abs=0.0001)
+	assert list(perimeters) == approx([4.0, 0.0, 4.0, 0.0, 4.0], abs=0.0001)
+
+def test_polygon_area():
+	square = [Vector3(1,-1,-1), Vector3(1,1,-1), Vector3(1,1,1), Vector3(1,-1,1)]
+	l_shape = [Vector3(0,0,2), Vector3(2,0,2), Vector3(2,1,2), Vector3(1,1,2), Vector3(1,2,2), Vector3(0,2,2)]
+	assert 4.0 == approx(polygon_area(square), abs=0.0001)
+	assert 3.0 == approx(polygon_area(l_shape), abs=0.0001)
+
+def write_bin_stl(file_path, mesh):
+	with open(file_path, 'wb') as fp:
+		fp.write(bytes(80))
+		fp.write(pack('<I', len(mesh)))
+		for facet in mesh:
+			values = facet.normal.to_list()
+			for vertex in facet:
+				values += vertex.to_list()
+			fp.write(pack('<12fH', *values, 0))
+
+def test_approximate_measurement(tmp_path):
+	facets = []
+	# A 1x1x1 cube split into a 10x10 grid of square facets per side, each made of two triangles.
+	for axis in range(3):
+		for side in (0, 1):
+			for i in range(10):
+				for j in range(10):
+					corners = []
+					for di, dj in ((0,0), (1,0), (1,1), (0,1)):
+						position = [0, 0, 0]
+						position[axis] = side
+						position[(axis + 1) % 3] = (i + di) / 10
+						position[(axis + 2) % 3] = (j + dj) / 10
+						corners.append(Vector3(position))
+					normal = [0, 0, 0]
+					normal[axis] = 1 if side else -1
+					facets.append(MeshFacetPFV(corners[:3], Vector3(normal)))
+					facets.append(MeshFacetPFV([corners[0], corners[2], corners[3]], Vector3(normal)))
+	mesh = MeshPFV(facets)
+
+	measure_mesh(mesh, volume=True, area=True, approximate=True, sample_count=len(mesh))
+	assert 1.0 == approx(mesh.meta['volume'], abs=0.0001)
+	assert 0.0 == approx(mesh.meta['volume_error'], abs=0.0001)
+	measure_mesh(mesh, volume=True, area=True)
+	assert 'volume_error' not in mesh.meta
+
+	file_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(file_path, mesh)
+	estimate = estimate_mesh_file(file_path, volume=True, area=True, length=True, sample_count=400, seed=1)
+	assert estimate['sample_count'] == 400
+	assert estimate['volume_error'] > 0
+	assert 1.0 == approx(estimate['volume'], abs=estimate['volume_error'])
+	assert 6.0 == approx(estimate['area'], abs=0.0001) # Every facet has the same area.
+	budget_estimate = estimate_mesh_file(file_path, volume=True, byte_budget=50 * 100, seed=1)
+	assert budget_estimate['sample_count'] == 100
+
+def write_txt_stl(file_path, mesh):
+	with open(file_path, 'w') as fp:
+		fp.write('solid mesh\n')
+		for facet in mesh:
+			fp.write('facet normal {:e} {:e} {:e}\n'.format(*facet.normal.to_list()))
+			fp.write('outer loop\n')
+			for vertex in facet:
+				fp.write('vertex {:e} {:e} {:e}\n'.format(*vertex.to_list()))
+			fp.write('endloop\nendfacet\n')
+		fp.write('endsolid mesh\n')
+
+def test_measure_file_pipelined(tmp_path):
+	offset_cube_mesh = MeshPFV([
+		MeshFacetPFV([Vector3(5,1,1), Vector3(3,1,1), Vector3(3,-1,1)], Vector3(0,0,1)),
+		MeshFacetPFV([Vector3(3,-1,1), Vector3(5,-1,1), Vector3(5,1,1)], Vector3(0,0,1)),
+		MeshFacetPFV([Vector3(5,1,-1), Vector3(3,-1,-1), Vector3(3,1,-1)], Vector3(0,0,-1)),
+		MeshFacetPFV([Vector3(3,-1,-1), Vector3(5,1,-1), Vector3(5,-1,-1)], Vector3(0,0,-1)),
+		MeshFacetPFV([Vector3(5,1,1), Vector3(3,1,-1), Vector3(3,1,1)], Vector3(0,1,0)),
+		MeshFacetPFV([Vector3(3,1,-1), Vector3(5,1,1), Vector3(5,1,-1)], Vector3(0,1,0)),
+		MeshFacetPFV([Vector3(5,-1,1), Vector3(3,-1,1), Vector3(3,-1,-1)], Vector3(0,-1,0)),
+		MeshFacetPFV([Vector3(3,-1,-1), Vector3(5,-1,-1), Vector3(5,-1,1)], Vector3(0,-1,0)),
+		MeshFacetPFV([Vector3(5,1,1), Vector3(5,-1,1), Vector3(5,-1,-1)], Vector3(1,0,0)),
+		MeshFacetPFV([Vector3(5,-1,-1), Vector3(5,1,-1), Vector3(5,1,1)], Vector3(1,0,0)),
+		MeshFacetPFV([Vector3(3,1,1), Vector3(3,1,-1), Vector3(3,-1,-1)], Vector3(-1,0,0)),
+		MeshFacetPFV([Vector3(3,-1,-1), Vector3(3,-1,1), Vector3(3,1,1)], Vector3(-1,0,0)),
+	])
+	bin_path = str(tmp_path / 'bin.stl')
+	txt_path = str(tmp_path / 'txt.stl')
+	write_bin_stl(bin_path, offset_cube_mesh)
+	write_txt_stl(txt_path, offset_cube_mesh)
+	for file_path in (bin_path, txt_path):
+		measurements = measure_file_pipelined(file_path, volume=True, area=True, length=True, workers=2, chunk_size=5, queue_size=1)
+		assert measurements['facet_count'] == 12
+		assert 8.0 == approx(measurements['volume'], abs=0.0001)
+		assert 24.0 == approx(measurements['area'], abs=0.0001)
+		assert 2.0 == approx(measurements['x_length'], abs=0.0001)
+
+	measurements = measure_bin_stl(bin_path, volume=True, area=True, length=True, chunk_size=5)
+	measure_mesh(offset_cube_mesh, volume=True, area=True, length=True)
+	for key in ('facet_count', 'volume', 'area', 'x_length', 'y_length', 'z_length'):
+		assert measurements[key] == approx(offset_cube_mesh.meta.get(key, len(offset_cube_mesh)), abs=0.0001)
+	assert measurements['bounds'] == ((3, -1, -1), (5, 1, 1))
+	coords = array('d', [value for facet in offset_cube_mesh for vertex in facet for value in vertex.to_list()])
+	totals = measure_triangles(iter_unpack('<9d', coords), volume=True)
+	assert 8.0 == approx(totals['volume_total'], abs=0.0001)
+
+def test_lazy_normals(tmp_path):
+	tetrahedron_mesh = MeshPFV([
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,1,0), Vector3(1,0,0)], Vector3(0,0,-1)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(1,0,0), Vector3(0,0,1)], Vector3(0,-1,0)),
+		MeshFacetPFV([Vector3(0,0,0), Vector3(0,0,1), Vector3(0,1,0)], Vector3(-1,0,0)),
+		MeshFacetPFV([Vector3(1,0,0), Vector3(0,1,0), Vector3(0,0,1)], Vector3(0.57735026919,0.57735026919,0.57735026919)),
+	])
+	file_path = str(tmp_path / 'tetrahedron.stl')
+	write_bin_stl(file_path, tetrahedron_mesh)
+
+	mesh = parse_stl(file_path)
+	assert not any(facet.has_normal for facet in mesh)
+	measure_mesh(mesh, area=True, length=True)
+	assert not any(facet.has_normal for facet in mesh)
+	measure_mesh(mesh, volume=True)
+	assert all(facet.has_normal for facet in mesh)
+	assert 1/6 == approx(mesh.meta['volume'], abs=0.0001)
+	assert mesh.facet(3).normal.to_list() == approx([0.57735026919] * 3, abs=0.0001)
+
+	given_mesh = parse_stl(file_path, given_normals=True)
+	assert all(facet.has_normal for facet in given_mesh)
+	assert given_mesh.facet(0).normal.to_list() == approx([0, 0, -1], abs=0.0001)
+
 pytest.main(["-v", "--tb=line", "-rN", __file__])
\ No newline at end of file
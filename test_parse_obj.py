@@ -0,0 +1,96 @@
+import re
+from parse_obj import parse_obj
+from mmesh import measure_mesh, measure_obj_out_of_core, measure_file_pipelined
+from pytest import approx
+
+CUBE_OBJ = """# A 2x2x2 cube made of quads, offset along x
+o cube
+v 3 -1 -1
+v 5 -1 -1
+v 5 1 -1
+v 3 1 -1
+v 3 -1 1
+v 5 -1 1
+v 5 1 1
+v 3 1 1
+vn 0 0 -1
+vn 0 0 1
+f 1//1 4//1 3//1 2//1
+f 5//2 6//2 7//2 8//2
+f -8 -7 -3 -4
+f 2 3 7 6
+f 3 4 8 7
+f 4 1 5 8
+"""
+
+def write_obj(tmp_path, text, name='mesh.obj'):
+	file_path = tmp_path / name
+	file_path.write_text(text)
+	return str(file_path)
+
+def test_parse_obj_relative_indices(tmp_path):
+	mesh = parse_obj(write_obj(tmp_path, CUBE_OBJ))
+	assert len(mesh) == 6
+	assert len(mesh.vertices) == 8
+	assert mesh.facet(2).vertex_indices == [0, 1, 5, 4]
+	measure_mesh(mesh, volume=True, area=True, length=True)
+	assert 8.0 == approx(mesh.meta['volume'], abs=0.0001)
+	assert 24.0 == approx(mesh.meta['area'], abs=0.0001)
+
+def test_parse_obj_parallel(tmp_path):
+	# Splitting the file into ranges of a few lines puts relative indexes, colors, and lines in ranges after the vertices they refer to.
+	text = CUBE_OBJ.replace('v 3 1 1\n', 'v 3 1 1 1 0.5 0.5 0.5\n') + 'g lines\nl 1 -1\nl 2/1 3/1\ng end\n'
+	file_path = write_obj(tmp_path, text)
+	mesh = parse_obj(file_path, given_normals=True)
+	parallel_mesh = parse_obj(file_path, given_normals=True, workers=2, range_bytes=40)
+	assert mesh.meta['lines'] == [[0, 7], [1, 2]]
+	assert mesh.meta['color_data'] == {7: [0.5, 0.5, 0.5]}
+	assert mesh.meta['other_tags']['g'] == [['lines'], ['end']]
+	for key in ('lines', 'color_data', 'other_tags'):
+		assert parallel_mesh.meta[key] == mesh.meta[key]
+	assert [vertex.to_list() for vertex in parallel_mesh.vertices] == [vertex.to_list() for vertex in mesh.vertices]
+	for facet, parallel_facet in zip(mesh, parallel_mesh):
+		assert parallel_facet.vertex_indices == facet.vertex_indices
+		assert dict(parallel_facet.data()) == dict(facet.data())
+		assert parallel_facet.normal.to_list() == approx(facet.normal.to_list())
+	assert mesh.facet(0).data('given_normal') == [0, 0, 0, 0]
+
+def test_measure_obj_out_of_core(tmp_path):
+	measurements = measure_obj_out_of_core(write_obj(tmp_path, CUBE_OBJ), volume=True, area=True, length=True, chunk_size=4, scratch_dir=str(tmp_path))
+	assert measurements['facet_count'] == 6
+	assert 8.0 == approx(measurements['volume'], abs=0.0001)
+	assert 24.0 == approx(measurements['area'], abs=0.0001)
+	assert 2.0 == approx(measurements['x_length'], abs=0.0001)
+	assert 2.0 == approx(measurements['z_length'], abs=0.0001)
+
+def test_measure_obj_pipelined(tmp_path):
+	measurements = measure_file_pipelined(write_obj(tmp_path, CUBE_OBJ), volume=True, area=True, length=True, workers=2, chunk_size=2)
+	assert measurements['facet_count'] == 6
+	assert 8.0 == approx(measurements['volume'], abs=0.0001)
+	assert 24.0 == approx(measurements['area'], abs=0.0001)
+
+def test_parse_obj_labels(tmp_path):
+	# Two cubes in separate objects, with the top and bottom of the first painted a second material.
+	lines = CUBE_OBJ.replace('o cube', 'o second').replace('v 3', 'v 13').replace('v 5', 'v 15').splitlines()
+	second_cube = '\n'.join(re.sub(r'(?<= )\d+', lambda match: str(int(match.group()) + 8), line) if line.startswith('f') else line for line in lines)
+	text = CUBE_OBJ.replace('f 1//1', 'usemtl paint\nf 1//1').replace('f -8', 'usemtl steel\nf -8') + second_cube + '\n'
+	file_path = write_obj(tmp_path, text)
+	mesh = parse_obj(file_path)
+	assert mesh.meta['objects'] == ['cube', 'second']
+	assert mesh.meta['materials'] == ['paint', 'steel']
+	assert [facet.data('material') for facet in mesh] == [0, 0] + [1] * 10
+	assert mesh.meta['other_tags']['usemtl'] == [['paint'], ['steel']]
+	parallel_mesh = parse_obj(file_path, workers=2, range_bytes=60)
+	for facet, parallel_facet in zip(mesh, parallel_mesh):
+		assert dict(parallel_facet.data()) == dict(facet.data())
+
+	measure_mesh(mesh, volume=True, area=True, length=True, group_by=('object', 'material'))
+	assert mesh.meta['volume'] == approx(16.0)
+	objects = mesh.meta['grouped']['object']
+	assert list(objects) == ['cube', 'second']
+	assert objects['second']['volume'] == approx(8.0)
+	assert objects['second']['bounds'] == ((13, -1, -1), (15, 1, 1))
+	materials = mesh.meta['grouped']['material']
+	assert materials['paint']['area'] == approx(8.0)
+	assert materials['paint']['facet_count'] == 2
+	assert materials['steel']['area'] == approx(40.0)
@@ -0,0 +1,49 @@
+import time
+import pytest
+from parse_stl import parse_stl
+from parse_obj import parse_obj
+from mmesh import measure_mesh, measure_bin_stl, measure_file_pipelined
+from progress import CancelToken, Cancelled, Progress
+from test_bvh import corner_cube_mesh
+from test_mmesh import write_bin_stl
+from test_parse_obj import CUBE_OBJ, write_obj
+
+def test_progress_reports_and_cancels(tmp_path):
+	file_path = str(tmp_path / 'cube.stl')
+	write_bin_stl(file_path, corner_cube_mesh())
+	reports = []
+	mesh = parse_stl(file_path, progress=lambda progress: reports.append((progress.done, progress.fraction, progress.unit)))
+	assert reports[-1] == (84 + 50 * 12, 1.0, 'bytes')
+
+	reports = []
+	measure_mesh(mesh, volume=True, progress=lambda progress: reports.append((progress.done, progress.total, progress.unit)))
+	assert reports[-1] == (12, 12, 'facets')
+
+	token = CancelToken()
+	token.cancel()
+	with pytest.raises(Cancelled):
+		parse_obj(write_obj(tmp_path, CUBE_OBJ), token=token)
+	with pytest.raises(Cancelled):
+		measure_mesh(mesh, area=True, token=token)
+	assert 'area' not in mesh.meta
+	with pytest.raises(Cancelled):
+		measure_bin_stl(file_path, volume=True, token=CancelToken(deadline=time.monotonic()))
+	with pytest.raises(Cancelled):
+		measure_file_pipelined(file_path, volume=True, token=token)
+
+def test_progress_eta():
+	progress = Progress(total=200, unit='facets')
+	progress.start_time -= 10
+	progress.update(50)
+	assert progress.fraction == 0.25
+	assert progress.eta == pytest.approx(30, abs=0.1)
+
+def test_cancel_token_parent():
+	parent = CancelToken()
+	child = CancelToken(parent=parent)
+	child.cancel()
+	assert child.cancelled and not parent.cancelled
+	child = CancelToken(parent=parent)
+	parent.cancel()
+	with pytest.raises(Cancelled):
+		child.check()
@@ -0,0 +1,61 @@
+import math
+from vector3 import Vector3
+from mesh import MeshIV
+from mmesh import measure_mesh
+from transform import scale_matrix, rotation_matrix, multiply_matrices, translation_matrix
+from test_bvh import corner_cube_mesh
+from pytest import approx
+
+def measured(mesh):
+	measure_mesh(mesh, volume=True, area=True, length=True)
+	return dict(mesh.meta)
+
+def test_transform_updates_measurements():
+	mesh = corner_cube_mesh()
+	measured(mesh)
+	mesh.transform(multiply_matrices(translation_matrix(1, 2, 3), scale_matrix(2, 3, 4)))
+	assert mesh.meta['volume'] == approx(24)
+	assert 'area' not in mesh.meta
+	assert (mesh.meta['x_length'], mesh.meta['y_length'], mesh.meta['z_length']) == approx((2, 3, 4))
+	assert mesh.meta['bounds'] == ((1, 2, 3), (3, 5, 7))
+
+	measure_mesh(mesh, volume=True, area=True, length=True, reuse=True)
+	assert mesh.meta['area'] == approx(2 * (6 + 8 + 12))
+	assert measured(mesh)['volume'] == approx(24)
+
+def test_transform_updates_robust_volume():
+	mesh = corner_cube_mesh()
+	measure_mesh(mesh, robust=True, resolution=8)
+	mesh.scale(2)
+	measure_mesh(mesh, volume=True, robust=True, resolution=8, reuse=True)
+	assert mesh.meta['volume'] == approx(8)
+	assert mesh.meta['robust_volume'] == approx(8)
+	assert mesh.meta['robust_resolution'] == 8
+
+def test_transform_rotation_and_reflection():
+	mesh = corner_cube_mesh()
+	measured(mesh)
+	mesh.rotate('z', math.pi / 6).scale(2)
+	assert mesh.meta['volume'] == approx(8)
+	assert mesh.meta['area'] == approx(24)
+	assert 'x_length' not in mesh.meta
+	assert measured(mesh)['volume'] == approx(8)
+
+	mesh = corner_cube_mesh()
+	measured(mesh)
+	for facet in mesh:
+		facet.normal = None
+	mesh.scale(-1, 1, 1)
+	assert mesh.meta['volume'] == approx(1)
+	assert mesh.facet(0).normal.x == approx(-1)
+	assert measured(mesh)['volume'] == approx(1)
+	assert mesh.meta['bounds'] == ((-1, 0, 0), (0, 1, 1))
+
+def test_transform_iv():
+	mesh = MeshIV(corner_cube_mesh().facets)
+	vertex_count = len(mesh.vertices)
+	mesh.transform(rotation_matrix(Vector3(0, 0, 1), math.pi / 2))
+	assert len(mesh.vertices) == vertex_count
+	meta = measured(mesh)
+	assert meta['volume'] == approx(1)
+	assert meta['bounds'][0] == approx((-1, 0, 0))
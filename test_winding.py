@@ -0,0 +1,30 @@
+from mesh import MeshPFV
+from bvh import BVH
+from mmesh import measure_mesh
+from winding import winding_volume
+from test_bvh import corner_cube_mesh
+from pytest import approx
+
+def test_winding_numbers():
+	bvh = BVH(corner_cube_mesh(), leaf_size=2)
+	points = [(0.5,0.5,0.5), (0.1,0.9,0.2), (1.5,0.5,0.5), (5,5,5), (0.5,0.5,1)]
+	assert list(bvh.winding_numbers(points)) == approx([1, 1, 0, 0, 0.5], abs=1e-9)
+	# Without any far-field approximation, every triangle is measured exactly.
+	assert list(bvh.winding_numbers(points, accuracy=1e9)) == approx([1, 1, 0, 0, 0.5], abs=1e-9)
+
+def test_winding_volume():
+	assert winding_volume(corner_cube_mesh(), resolution=16) == approx(1.0)
+
+	# An open box away from the origin, whose volume from pyramids depends on where the origin is.
+	open_box = MeshPFV([facet for facet_ind, facet in enumerate(corner_cube_mesh()) if facet_ind not in (8, 9)])
+	open_box.translate(3, 2, 1)
+	measure_mesh(open_box, volume=True, robust=True, resolution=16)
+	assert open_box.meta['volume'] != approx(1.0)
+	assert open_box.meta['robust_volume'] == approx(1.0, abs=0.05)
+	assert open_box.meta['robust_resolution'] == 16
+
+	# Overlapping copies of the same box are only counted once.
+	doubled = MeshPFV(list(corner_cube_mesh()) + list(corner_cube_mesh()))
+	measure_mesh(doubled, volume=True, robust=True, resolution=8)
+	assert doubled.meta['volume'] == approx(2.0)
+	assert doubled.meta['robust_volume'] == approx(1.0)
@@ -0,0 +1,144 @@
+import math
+
+def identity_matrix():
+	"""Returns the 4x4 identity matrix as a list of four rows."""
+	return [[1.0 if row == column else 0.0 for column in range(4)] for row in range(4)]
+
+def translation_matrix(dx, dy, dz):
+	"""Returns a 4x4 matrix moving points by the given offsets."""
+	matrix = identity_matrix()
+	matrix[0][3], matrix[1][3], matrix[2][3] = dx, dy, dz
+	return matrix
+
+def scale_matrix(sx, sy=None, sz=None):
+	"""Returns a 4x4 matrix scaling points about the origin. If `sy` and `sz` are omitted, the scale is uniform."""
+	if sy is None:
+		sy = sx
+	if sz is None:
+		sz = sx
+	matrix = identity_matrix()
+	matrix[0][0], matrix[1][1], matrix[2][2] = sx, sy, sz
+	return matrix
+
+def rotation_matrix(axis, angle):
+	"""Returns a 4x4 matrix rotating points about an axis through the origin by `angle` radians, counterclockwise when looking against the axis.
+	`axis` is `'x'`, `'y'`, `'z'`, or a direction given as a Vector3 or a sequence of three numbers."""
+	if axis in ('x', 'y', 'z'):
+		axis = [1.0 if axis == name else 0.0 for name in ('x', 'y', 'z')]
+	elif hasattr(axis, 'x'):
+		axis = [axis.x, axis.y, axis.z]
+	magnitude = math.sqrt(axis[0] ** 2 + axis[1] ** 2 + axis[2] ** 2)
+	if magnitude == 0:
+		raise ValueError('rotation_matrix: Axis must not be zero.')
+	x, y, z = (component / magnitude for component in axis)
+	cos = math.cos(angle)
+	sin = math.sin(angle)
+	other = 1 - cos
+	# Rodrigues' rotation formula
+	return [
+		[cos + x * x * other, x * y * other - z * sin, x * z * other + y * sin, 0.0],
+		[y * x * other + z * sin, cos + y * y * other, y * z * other - x * sin, 0.0],
+		[z * x * other - y * sin, z * y * other + x * sin, cos + z * z * other, 0.0],
+		[0.0, 0.0, 0.0, 1.0],
+	]
+
+def multiply_matrices(matrix1, matrix2):
+	"""Returns the product of two 4x4 matrices, which applies `matrix2` first and then `matrix1`."""
+	return [[sum(matrix1[row][k] * matrix2[k][column] for k in range(4)) for column in range(4)] for row in range(4)]
+
+def check_affine(matrix):
+	"""Raises ValueError unless the matrix is a 4x4 affine transform, whose last row is (0, 0, 0, 1)."""
+	if len(matrix) != 4 or any(len(row) != 4 for row in matrix):
+		raise ValueError('check_affine: Matrix must have four rows of four values.')
+	if list(matrix[3]) != [0, 0, 0, 1]:
+		raise ValueError('check_affine: Matrix must be affine, with a last row of (0, 0, 0, 1).')
+
+def linear_determinant(matrix):
+	"""Returns the determinant of the upper-left 3x3 part of a 4x4 matrix, which is the factor it scales volumes by, negative for reflections."""
+	(a, b, c, _), (d, e, f, _), (g, h, i, _) = matrix[:3]
+	return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+def normal_matrix(matrix):
+	"""Returns the inverse transpose of the upper-left 3x3 part of a 4x4 matrix as a list of three rows, which transforms normals.
+	Returns None if the matrix is singular."""
+	(a, b, c, _), (d, e, f, _), (g, h, i, _) = matrix[:3]
+	determinant = linear_determinant(matrix)
+	if determinant == 0:
+		return None
+	# The inverse transpose is the cofactor matrix divided by the determinant.
+	return [
+		[(e * i - f * h) / determinant, (f * g - d * i) / determinant, (d * h - e * g) / determinant],
+		[(c * h - b * i) / determinant, (a * i - c * g) / determinant, (b * g - a * h) / determinant],
+		[(b * f - c * e) / determinant, (c * d - a * f) / determinant, (a * e - b * d) / determinant],
+	]
+
+def similarity_scale(matrix, tolerance=1e-9):
+	"""Returns the factor a 4x4 matrix scales every length by if it is a similarity transform (any mix of rotation, reflection, uniform scale,
+	and translation), otherwise None."""
+	columns = [[matrix[row][column] for row in range(3)] for column in range(3)]
+	squares = [sum(value * value for value in column) for column in columns]
+	scale_squared = squares[0]
+	limit = tolerance * max(scale_squared, 1)
+	for first, second in ((0, 1), (0, 2), (1, 2)):
+		if abs(sum(p * q for p, q in zip(columns[first], columns[second]))) > limit:
+			return None
+	if abs(squares[1] - scale_squared) > limit or abs(squares[2] - scale_squared) > limit:
+		return None
+	return math.sqrt(scale_squared)
+
+def axis_mapping(matrix):
+	"""If a 4x4 matrix maps each axis onto a single axis (any mix of axis-aligned scales, axis swaps, and translation),
+	returns a list giving the `(source_axis, factor)` for each axis of the result, otherwise None."""
+	mapping = []
+	for row in range(3):
+		nonzero = [column for column in range(3) if matrix[row][column] != 0]
+		if len(nonzero) != 1:
+			return None
+		mapping.append((nonzero[0], matrix[row][nonzero[0]]))
+	if len(set(source for source, _ in mapping)) != 3:
+		return None
+	return mapping
+
+def transform_measurements(measurements, matrix):
+	"""Updates a dictionary of measurements, as stored by `measure_mesh` in `mesh.meta`, to describe the mesh after it is transformed by `matrix`.
+	Volumes are scaled by the absolute determinant. Areas are scaled only by similarity transforms, and lengths and bounds only by transforms
+	mapping each axis onto a single axis. Measurements which cannot be updated are removed.
+	The robust volume stored by `winding_volume` is scaled like the volume it approximates.
+	Each dictionary under the `components` key, as stored by `measure_components`, and each group under the `grouped` key, as stored by
+	`measure_mesh`, is updated the same way."""
+	volume_factor = abs(linear_determinant(matrix))
+	scale = similarity_scale(matrix)
+	mapping = axis_mapping(matrix)
+
+	# Affine transforms map the convex hull onto the convex hull of the transformed mesh, so its measurements scale the same way.
+	for key in ('volume', 'volume_error', 'hull_volume', 'robust_volume'):
+		if key in measurements:
+			measurements[key] *= volume_factor
+	for key in ('area', 'area_error', 'hull_area'):
+		if key in measurements:
+			if scale is None:
+				del measurements[key]
+			else:
+				measurements[key] *= scale * scale
+	lengths = [measurements.get(key) for key in ('x_length', 'y_length', 'z_length')]
+	bounds = measurements.get('bounds')
+	for key in ('x_length', 'y_length', 'z_length', 'bounds'):
+		measurements.pop(key, None)
+	if mapping is not None:
+		if all(length is not None for length in lengths):
+			for key, (source, factor) in zip(('x_length', 'y_length', 'z_length'), mapping):
+				measurements[key] = lengths[source] * abs(factor)
+		if bounds is not None:
+			minimums = []
+			maximums = []
+			for row, (source, factor) in enumerate(mapping):
+				ends = (bounds[0][source] * factor + matrix[row][3], bounds[1][source] * factor + matrix[row][3])
+				minimums.append(min(ends))
+				maximums.append(max(ends))
+			measurements['bounds'] = (tuple(minimums), tuple(maximums))
+	for component in measurements.get('components') or []:
+		transform_measurements(component, matrix)
+	for groups in (measurements.get('grouped') or {}).values():
+		for group in groups.values():
+			transform_measurements(group, matrix)
+	return measurements
@@ -0,0 +1,65 @@
+import math
+from bvh import BVH
+from mesh import Mesh
+
+def winding_volume(source, resolution=32, accuracy=2.0, margin=0.25):
+	"""Calculates the volume of a mesh from its generalized winding numbers (see `BVH.winding_numbers`), which stays meaningful for meshes
+	with holes, overlapping parts, or self-intersections, where `face_pyramid_volume` is not.
+	`source` is an instance of Mesh or a BVH built from one. The bounds of the mesh are divided into a grid of cubic cells, `resolution`
+	cells along their longest side, and each cell whose center has a winding number above 0.5 counts as inside.
+	The grid is evaluated as an octree. A block of cells is classified as a whole by the winding number at its center when no triangle is within
+	the block and the winding number is further than `margin` from 0.5. Otherwise it is split into eight, so only the cells near the surface or
+	near holes are evaluated one at a time and the number of evaluations grows with the square of `resolution` rather than its cube.
+	Cells the surface passes through are counted as partly inside by their distance to the surface."""
+	if isinstance(source, Mesh):
+		bvh = BVH(source)
+	elif isinstance(source, BVH):
+		bvh = source
+	else:
+		raise TypeError('winding_volume: Argument must be an instance of Mesh or BVH.')
+	if resolution < 1:
+		raise ValueError('winding_volume: Resolution must be at least 1.')
+	if len(bvh) == 0:
+		return 0
+	bounds = bvh.node_bounds[0:6]
+	cell = max(bounds[3 + axis] - bounds[axis] for axis in range(3)) / resolution
+	if cell <= 0:
+		return 0
+	counts = [max(1, math.ceil((bounds[3 + axis] - bounds[axis]) / cell)) for axis in range(3)]
+	block = 1 << math.ceil(math.log2(max(counts)))
+
+	inside_cells = 0
+	stack = [(0, 0, 0, block)]
+	while stack:
+		x, y, z, size = stack.pop()
+		# Blocks are clipped to the grid, so those on its far sides may hold fewer cells than their size.
+		ends = (min(x + size, counts[0]), min(y + size, counts[1]), min(z + size, counts[2]))
+		if ends[0] <= x or ends[1] <= y or ends[2] <= z:
+			continue
+		px = bounds[0] + (x + ends[0]) * cell / 2
+		py = bounds[1] + (y + ends[1]) * cell / 2
+		pz = bounds[2] + (z + ends[2]) * cell / 2
+		winding = bvh.winding_numbers([(px, py, pz)], accuracy)[0]
+		if size == 1:
+			# A cell the surface passes through is only partly inside. Treating the surface as a plane at the distance of the nearest point
+			# of the mesh, perpendicular to an axis, gives the share of the cell on the same side as its center.
+			distances, facets, _ = bvh.nearest_facet([(px, py, pz)], cell / 2)
+			share = 0.5 + distances[0] / cell if facets[0] >= 0 else 1
+			inside_cells += share if winding > 0.5 else 1 - share
+			continue
+		half_diagonal = math.sqrt((ends[0] - x) ** 2 + (ends[1] - y) ** 2 + (ends[2] - z) ** 2) * cell / 2
+		if abs(winding - 0.5) > margin and bvh.nearest_facet([(px, py, pz)], half_diagonal)[1][0] < 0:
+			if winding > 0.5:
+				inside_cells += (ends[0] - x) * (ends[1] - y) * (ends[2] - z)
+			continue
+		half = size // 2
+		for dx in (0, half):
+			for dy in (0, half):
+				for dz in (0, half):
+					stack.append((x + dx, y + dy, z + dz, half))
+	return inside_cells * cell * cell * cell
+
+def measure_winding_volume(source, resolution=32, accuracy=2.0):
+	"""Calculates the robust volume of a mesh as described by `winding_volume`.
+	Returns a dictionary with the keys `robust_volume` and `robust_resolution`."""
+	return {'robust_volume': winding_volume(source, resolution, accuracy), 'robust_resolution': resolution}